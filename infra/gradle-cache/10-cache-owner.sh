@@ -0,0 +1,6 @@
+#!/bin/sh
+# Exécuté en root par l'entrypoint nginx avant le démarrage : le volume
+# /var/cache/gradle est créé root, les workers nginx doivent pouvoir y écrire (PUT).
+set -e
+mkdir -p /var/cache/gradle/cache /var/cache/gradle/.tmp
+find /var/cache/gradle ! -user nginx -exec chown nginx:nginx {} +
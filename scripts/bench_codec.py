@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark des codecs de contrats (encode / decode de réponses de chat).
+Usage: python scripts/bench_codec.py [--messages 50] [--rounds 2000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from rich.console import Console
+from rich.table import Table
+
+from services.contracts import codec
+from services.contracts.models import ChatResponse, Message
+
+console = Console()
+
+
+def bench(fn, rounds):
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    messages = [Message(id=f"m{i}", role="assistant", content="Café de Paris, 1 rue de Paris " * 3,
+                        tool_name=None, created_at=datetime(2026, 1, 1, 12, 0, i % 60)) for i in range(args.messages)]
+    response = ChatResponse(messages=messages)
+    raw = response.model_dump_json().encode("utf-8")
+
+    cases = [
+        ("encode", "FastAPI (jsonable_encoder + json.dumps)", lambda: json.dumps(jsonable_encoder(response)).encode()),
+        ("encode", "Pydantic model_dump_json", lambda: response.model_dump_json()),
+        ("encode", "TypeAdapter.dump_json", lambda: codec.MESSAGES_ADAPTER.dump_json(messages)),
+        ("decode", "json.loads + Message(**m)", lambda: [Message(**m) for m in json.loads(raw)["messages"]]),
+        ("decode", "Pydantic model_validate_json", lambda: ChatResponse.model_validate_json(raw)),
+        ("decode", "TypeAdapter.validate_json", lambda: codec.CHAT_RESPONSE_ADAPTER.validate_json(raw)),
+    ]
+    if codec.msgspec is not None:
+        struct = codec.decode_chat_response(raw)
+        cases.insert(3, ("encode", "msgspec Struct", lambda: codec.encode(struct)))
+        cases.append(("decode", "msgspec Struct", lambda: codec.decode_chat_response(raw)))
+    else:
+        console.print("[yellow]msgspec absent : seules les variantes Pydantic sont mesurées[/yellow]")
+
+    table = Table(title=f"Réponse de chat, {args.messages} messages ({len(raw)} octets)")
+    table.add_column("Op")
+    table.add_column("Codec")
+    table.add_column("ops/s", justify="right")
+    table.add_column("Mo/s", justify="right")
+    for op, name, fn in cases:
+        rate = bench(fn, args.rounds)
+        table.add_row(op, name, f"{rate:,.0f}", f"{rate * len(raw) / 1e6:,.1f}")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 """
 Script de développement pour lancer le pipeline en local
 Usage: python scripts/dev_run_pipeline.py specs/examples/resa.yaml
+       python scripts/dev_run_pipeline.py specs/examples/ 'specs/**/*.yaml' [--jobs N]   (mode batch)
+       cat specs.ndjson | python scripts/dev_run_pipeline.py -                           (mode batch)
 """
 
 import sys
@@ -18,7 +20,18 @@ from rich.console import Console
 
 console = Console()
 
+def is_batch(args):
+    """Plusieurs specs, un dossier, un glob ou - (NDJSON sur stdin) : mode batch."""
+    specs = [a for a in args if not a.startswith("-") or a == "-"]
+    return len(specs) != 1 or any(a.startswith("--") for a in args) or specs[0] == "-" \
+        or os.path.isdir(specs[0]) or any(c in specs[0] for c in "*?[")
+
 def main():
+    if len(sys.argv) > 1 and is_batch(sys.argv[1:]):
+        from worker.batch import cli as batch_cli
+        # même mode que le run unique : génération Flutter complète
+        batch_cli.main(args=["--no-dry-run", *sys.argv[1:]], prog_name="dev_run_pipeline.py")
+
     if len(sys.argv) != 2:
         console.print("[bold red]Usage: python scripts/dev_run_pipeline.py <spec_file>[/bold red]")
         console.print("Example: python scripts/dev_run_pipeline.py specs/examples/resa.yaml")
@@ -0,0 +1,48 @@
+#!/usr/bin/env bash
+# Pré-remplit les caches de build partagés (pub + Gradle) à partir de la brick :
+# génère une app de référence sur le chemin stable /src/app, résout les paquets
+# pub et builde l'APK debug une fois pour pousser les tâches Gradle au nœud gradle_cache.
+#
+#   scripts/warm_build_caches.sh [--project-name NOM] [--org ORG] [--compose-project NOM]
+#
+# Le squelette doit être celui des runs (FORGE_SCAFFOLD_ORG / FORGE_SCAFFOLD_PROJECT_NAME,
+# mêmes défauts que worker/codegen.py), sinon les clés Gradle ne correspondent pas.
+# --compose-project vise une stack lancée avec `docker compose -p`.
+set -euo pipefail
+PROJECT_NAME="${FORGE_SCAFFOLD_PROJECT_NAME:-resa_cafe_atlas}"
+ORG="${FORGE_SCAFFOLD_ORG:-com.forge}"
+COMPOSE_PROJECT="${COMPOSE_PROJECT_NAME:-}"
+while [ $# -gt 0 ]; do
+  case "$1" in
+    --project-name) PROJECT_NAME="$2"; shift 2 ;;
+    --org) ORG="$2"; shift 2 ;;
+    --compose-project) COMPOSE_PROJECT="$2"; shift 2 ;;
+    *) echo "option inconnue : $1" >&2; exit 2 ;;
+  esac
+done
+COMPOSE="docker compose -f infra/docker-compose.yml${COMPOSE_PROJECT:+ -p $COMPOSE_PROJECT}"
+WARM_DIR="work/.cache_warm"
+
+rm -rf "$WARM_DIR"
+mkdir -p "$WARM_DIR/app"
+cat > "$WARM_DIR/vars.json" <<'JSON'
+{"app_name": "forge_cache_warm", "primary_color": "#000000", "navigation": "tabs", "entities": []}
+JSON
+
+$COMPOSE up -d gradle_cache
+$COMPOSE run --rm \
+  -v "$(pwd)/$WARM_DIR/app:/src/app" \
+  runner_flutter bash -lc "
+set -e
+mason init || true
+mason add mobile_app_base --path /workspace/bricks/mobile_app_base
+mason make mobile_app_base -c /work/.cache_warm/vars.json -o /src/app
+cd /src/app
+flutter create -t app --platforms android --org $ORG --project-name $PROJECT_NAME .flutter_scaffold_tmp
+cp -r .flutter_scaffold_tmp/android .
+rm -rf .flutter_scaffold_tmp
+flutter pub get
+flutter build apk --debug
+"
+rm -rf "$WARM_DIR"
+echo "Caches pub/Gradle prêts."
@@ -1,7 +1,18 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
 from datetime import datetime
+import atexit
+import base64
+import hashlib
+import json
+import os
 import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
+from services.contracts.bus import AGENT_MESSAGE_CREATED, emit
+from services.contracts.events import AgentMessageCreated
 from services.contracts.models import Conversation, Message
 
 DB_PATH = Path(__file__).parent.parent / 'app' / 'db.sqlite3'
@@ -19,45 +30,421 @@ CREATE TABLE IF NOT EXISTS messages (
     tool_name TEXT,
     created_at TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_messages_conv_created ON messages (conv_id, created_at, id);
 """
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Requêtes constantes : réutilisées telles quelles, elles restent compilées dans le
+# cache de statements de chaque connexion (sqlite3) ou préparées côté serveur (psycopg).
+SQL_INSERT_CONVERSATION = "INSERT INTO conversations (id, created_at) VALUES (?, ?)"
+SQL_INSERT_MESSAGE = "INSERT INTO messages (id, conv_id, role, content, tool_name, created_at) VALUES (?, ?, ?, ?, ?, ?)"
 
-def init_db():
-    with get_conn() as conn:
-        conn.executescript(SCHEMA)
+# (id, conv_id, role, content, tool_name, created_at)
+MessageRow = Tuple[str, str, str, str, Optional[str], str]
+# Clé de pagination keyset : (created_at, id)
+CursorKey = Tuple[str, str]
+
+
+def list_messages_query(after: Optional[CursorKey] = None, before: Optional[CursorKey] = None,
+                        since: Optional[str] = None, until: Optional[str] = None,
+                        newest_first: bool = False) -> Tuple[str, List[Any]]:
+    """
+    Requête keyset sur l'index (conv_id, created_at, id) : chaque page est un
+    parcours de plage d'index, quelle que soit sa position dans la conversation.
+    Retourne (sql avec ?, paramètres après conv_id et avant limit).
+    """
+    where, params = ["conv_id = ?"], []
+    if after:
+        where.append("(created_at, id) > (?, ?)")
+        params.extend(after)
+    if before:
+        where.append("(created_at, id) < (?, ?)")
+        params.extend(before)
+    if since:
+        where.append("created_at > ?")
+        params.append(since)
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+    order = "DESC" if newest_first else "ASC"
+    sql = (f"SELECT id, role, content, tool_name, created_at FROM messages WHERE {' AND '.join(where)} "
+           f"ORDER BY created_at {order}, id {order} LIMIT ?")
+    return sql, params
+
+
+def _message_key(message: Message) -> CursorKey:
+    created_at = message.created_at.isoformat() if isinstance(message.created_at, datetime) else message.created_at
+    return created_at, message.id
+
+
+def encode_cursor(message: Message) -> str:
+    raw = json.dumps(list(_message_key(message)), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, msg_id = json.loads(raw)
+        return str(created_at), str(msg_id)
+    except Exception:
+        raise ValueError("cursor invalide")
+
+
+def page_etag(conv_id: str, messages: List[Message], *params: Any) -> str:
+    """ETag d'une page : change dès qu'un message y entre ou en sort."""
+    h = hashlib.sha1(json.dumps([conv_id, [m.id for m in messages], *params], default=str).encode("utf-8"))
+    return f'W/"{h.hexdigest()}"'
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def new_message_row(conv_id: str, role: str, content: str, tool_name: Optional[str] = None) -> MessageRow:
+    return (str(uuid.uuid4()), conv_id, role, content, tool_name, _now())
+
+
+class ConversationRepository(ABC):
+    """Stockage des conversations et messages (SQLite local ou Postgres)."""
+
+    @abstractmethod
+    def init_schema(self) -> None: ...
+
+    @abstractmethod
+    def create_conversation(self) -> Conversation: ...
+
+    @abstractmethod
+    def add_messages(self, rows: Iterable[MessageRow]) -> int:
+        """Insère un lot de messages dans une seule transaction."""
+
+    @abstractmethod
+    def list_messages(self, conv_id: str, limit: int = 50, after: Optional[CursorKey] = None,
+                      before: Optional[CursorKey] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, newest_first: bool = False) -> List[Message]:
+        """Page de messages, toujours renvoyée en ordre chronologique."""
+
+    def add_message(self, conv_id: str, role: str, content: str, tool_name: Optional[str] = None) -> Message:
+        row = new_message_row(conv_id, role, content, tool_name)
+        self.add_messages([row])
+        return Message(id=row[0], role=role, content=content, tool_name=tool_name, created_at=row[5])
+
+
+class SQLiteConversationRepository(ConversationRepository):
+    """Une connexion persistante par thread, journal WAL, synchronous=NORMAL."""
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def create_conversation(self) -> Conversation:
+        now = _now()
+        conv_id = str(uuid.uuid4())
+        conn = self._conn()
+        with conn:
+            conn.execute(SQL_INSERT_CONVERSATION, (conv_id, now))
+        return Conversation(id=conv_id, created_at=now)
+
+    def add_messages(self, rows: Iterable[MessageRow]) -> int:
+        rows = list(rows)
+        conn = self._conn()
+        with conn:
+            conn.executemany(SQL_INSERT_MESSAGE, rows)
+        return len(rows)
+
+    def list_messages(self, conv_id: str, limit: int = 50, after: Optional[CursorKey] = None,
+                      before: Optional[CursorKey] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, newest_first: bool = False) -> List[Message]:
+        sql, params = list_messages_query(after, before, since, until, newest_first)
+        rows = self._conn().execute(sql, (conv_id, *params, limit)).fetchall()
+        messages = [Message(**dict(row)) for row in rows]
+        return messages[::-1] if newest_first else messages
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PostgresConversationRepository(ConversationRepository):
+    """Même interface sur Postgres (DATABASE_URL de docker-compose), via un pool psycopg."""
+
+    def __init__(self, url: str, min_size: int = 1, max_size: int = 10):
+        from psycopg_pool import ConnectionPool  # dépendance optionnelle
+        self.pool = ConnectionPool(url.replace("postgresql+psycopg://", "postgresql://"),
+                                   min_size=min_size, max_size=max_size, open=True)
+
+    @staticmethod
+    def _pg(sql: str) -> str:
+        return sql.replace("?", "%s")
 
-init_db()
+    def init_schema(self) -> None:
+        with self.pool.connection() as conn:
+            for stmt in SCHEMA.split(";"):
+                if stmt.strip():
+                    conn.execute(stmt)
+
+    def create_conversation(self) -> Conversation:
+        now = _now()
+        conv_id = str(uuid.uuid4())
+        with self.pool.connection() as conn:
+            conn.execute(self._pg(SQL_INSERT_CONVERSATION), (conv_id, now), prepare=True)
+        return Conversation(id=conv_id, created_at=now)
+
+    def add_messages(self, rows: Iterable[MessageRow]) -> int:
+        rows = list(rows)
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(self._pg(SQL_INSERT_MESSAGE), rows)
+        return len(rows)
+
+    def list_messages(self, conv_id: str, limit: int = 50, after: Optional[CursorKey] = None,
+                      before: Optional[CursorKey] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, newest_first: bool = False) -> List[Message]:
+        from psycopg.rows import dict_row
+        sql, params = list_messages_query(after, before, since, until, newest_first)
+        with self.pool.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                rows = cur.execute(self._pg(sql), (conv_id, *params, limit), prepare=True).fetchall()
+        messages = [Message(**row) for row in rows]
+        return messages[::-1] if newest_first else messages
+
+
+_repository: Optional[ConversationRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> ConversationRepository:
+    """
+    Postgres si DATABASE_URL pointe vers Postgres, SQLite local sinon. Créé (et
+    son schéma appliqué) au premier usage : importer le module n'ouvre aucune base.
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                url = os.getenv("DATABASE_URL", "")
+                repo: ConversationRepository
+                if url.startswith("postgresql"):
+                    repo = PostgresConversationRepository(url)
+                else:
+                    repo = SQLiteConversationRepository()
+                repo.init_schema()
+                _repository = repo
+    return _repository
+
+
+def _row_message(row: MessageRow) -> Message:
+    msg_id, _, role, content, tool_name, created_at = row
+    return Message(id=msg_id, role=role, content=content, tool_name=tool_name, created_at=created_at)
+
+
+def _row_in_page(row: MessageRow, after: Optional[CursorKey], before: Optional[CursorKey],
+                 since: Optional[str], until: Optional[str]) -> bool:
+    key = (row[5], row[0])
+    return ((after is None or key > tuple(after)) and (before is None or key < tuple(before))
+            and (since is None or row[5] > since) and (until is None or row[5] < until))
+
+
+class WriteBehindQueue:
+    """
+    Écritures de messages différées : `enqueue` rend la main tout de suite, un
+    thread vide la file par lots (une transaction par lot) dès `max_batch`
+    messages ou toutes les `flush_interval_s` secondes. Les messages pas encore
+    écrits restent visibles via un overlay par conversation (read-your-writes).
+    Un arrêt brutal peut perdre au plus un intervalle d'écritures : `close()`
+    (shutdown de l'app, atexit) vide la file. Un lot qui échoue `max_retries`
+    fois de suite est réécrit ligne par ligne ; les lignes qui échouent encore
+    sont journalisées et mises de côté dans `dead_letters` au lieu de bloquer la file.
+    """
+
+    def __init__(self, repo: ConversationRepository, max_batch: int = 500, flush_interval_s: float = 0.05,
+                 max_retries: int = 5):
+        self.repo = repo
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self.max_retries = max_retries
+        self.dead_letters: List[MessageRow] = []
+        self._failures = 0  # échecs consécutifs du lot en tête de file
+        self._pending: List[MessageRow] = []
+        self._overlay: Dict[str, Dict[str, MessageRow]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, rows: Iterable[MessageRow]) -> int:
+        n = 0
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("file d'écriture fermée")
+            for row in rows:
+                self._pending.append(row)
+                self._overlay.setdefault(row[1], {})[row[0]] = row
+                n += 1
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+        return n
+
+    def pending(self, conv_id: str) -> List[MessageRow]:
+        with self._lock:
+            return list(self._overlay.get(conv_id, {}).values())
+
+    def flush(self) -> int:
+        """Écrit tout ce qui est en attente ; retourne le nombre de lignes écrites."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                if not batch:
+                    return written
+                try:
+                    self.repo.add_messages(batch)
+                    done = len(batch)
+                except Exception:
+                    self._failures += 1
+                    if self._failures < self.max_retries:
+                        with self._lock:
+                            self._pending[:0] = batch  # on réessaiera au prochain tour
+                        raise
+                    done = self._write_rows(batch)
+                self._failures = 0
+                with self._lock:
+                    # retirés de l'overlay seulement une fois committés (ou abandonnés)
+                    for row in batch:
+                        conv = self._overlay.get(row[1])
+                        if conv is not None:
+                            conv.pop(row[0], None)
+                            if not conv:
+                                del self._overlay[row[1]]
+                written += done
+
+    def _write_rows(self, batch: List[MessageRow]) -> int:
+        """Lot en échec répété : une transaction par ligne pour isoler les lignes fautives."""
+        written = 0
+        for row in batch:
+            try:
+                self.repo.add_messages([row])
+            except Exception as e:
+                self.dead_letters.append(row)
+                print(f"[db] message {row[0]} (conversation {row[1]}) abandonné après "
+                      f"{self.max_retries} essais: {e}")
+            else:
+                written += 1
+        return written
+
+    def _loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[db] échec d'écriture différée, nouvel essai: {e}")
+                time.sleep(self.flush_interval_s)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+_queue: Optional[WriteBehindQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """File d'écriture différée partagée ; None si FORGE_DB_WRITE_BEHIND=0."""
+    global _queue
+    if os.getenv("FORGE_DB_WRITE_BEHIND", "1") == "0":
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteBehindQueue(get_repository(),
+                                          max_batch=int(os.getenv("FORGE_DB_BATCH", "500")),
+                                          flush_interval_s=float(os.getenv("FORGE_DB_FLUSH_MS", "50")) / 1000,
+                                          max_retries=int(os.getenv("FORGE_DB_RETRIES", "5")))
+    return _queue
+
+
+def flush_writes() -> int:
+    return _queue.flush() if _queue is not None else 0
+
+
+def close_write_queue() -> None:
+    """Vide la file et arrête le thread d'écriture (arrêt de l'application)."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.close()
+
+atexit.register(close_write_queue)
+
+
+def init_db():
+    """Ouvre la base et applique le schéma (démarrage de l'application)."""
+    get_repository()
 
 def create_conversation() -> Conversation:
-    import uuid
-    now = datetime.utcnow().isoformat()
-    conv_id = str(uuid.uuid4())
-    with get_conn() as conn:
-        conn.execute(
-            "INSERT INTO conversations (id, created_at) VALUES (?, ?)",
-            (conv_id, now)
-        )
-    return Conversation(id=conv_id, created_at=now)
+    return get_repository().create_conversation()
+
+def _emit_created(rows: List[MessageRow]) -> None:
+    for msg_id, conv_id, role, content, _, _ in rows:
+        emit(AGENT_MESSAGE_CREATED, AgentMessageCreated(conversation_id=conv_id, message_id=msg_id,
+                                                        role=role, content=content))
 
 def add_message(conv_id: str, role: str, content: str, tool_name: Optional[str] = None) -> Message:
-    import uuid
-    now = datetime.utcnow().isoformat()
-    msg_id = str(uuid.uuid4())
-    with get_conn() as conn:
-        conn.execute(
-            "INSERT INTO messages (id, conv_id, role, content, tool_name, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (msg_id, conv_id, role, content, tool_name, now)
-        )
-    return Message(role=role, content=content, tool_name=tool_name, created_at=now)
-
-def list_messages(conv_id: str, limit: int = 50) -> List[Message]:
-    with get_conn() as conn:
-        rows = conn.execute(
-            "SELECT role, content, tool_name, created_at FROM messages WHERE conv_id = ? ORDER BY created_at ASC LIMIT ?",
-            (conv_id, limit)
-        ).fetchall()
-    return [Message(**dict(row)) for row in rows]
+    row = new_message_row(conv_id, role, content, tool_name)
+    add_messages([row])
+    return _row_message(row)
+
+def add_messages(rows: Iterable[MessageRow]) -> int:
+    rows = list(rows)
+    queue = get_write_queue()
+    n = get_repository().add_messages(rows) if queue is None else queue.enqueue(rows)
+    _emit_created(rows)
+    return n
+
+def list_messages(conv_id: str, limit: int = 50, **page) -> List[Message]:
+    # overlay lu AVANT la page SQL : une ligne ne quitte l'overlay qu'une fois
+    # committée, donc un flush entre les deux lectures la laisse visible dans
+    # l'une ou l'autre (voire les deux, dédoublonnées par id) — jamais dans aucune
+    queue = get_write_queue()
+    pending = queue.pending(conv_id) if queue is not None else []
+    messages = get_repository().list_messages(conv_id, limit, **page)
+    pending = [r for r in pending if _row_in_page(r, page.get("after"), page.get("before"),
+                                                  page.get("since"), page.get("until"))]
+    if not pending:
+        return messages
+    # fusion page SQL + messages en attente, dédoublonnés par id
+    merged = {m.id: m for m in messages}
+    for row in pending:
+        merged.setdefault(row[0], _row_message(row))
+    ordered = sorted(merged.values(), key=_message_key)
+    return ordered[-limit:] if page.get("newest_first") else ordered[:limit]
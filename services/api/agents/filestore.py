@@ -1,19 +1,129 @@
+import hashlib
+import json
 import os
-import uuid
+import re
+import tempfile
 from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
 from services.contracts.models import FileInfo
 
+CHUNK_SIZE = 1024 * 1024
+_FILE_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    En-tête Range (une seule plage) -> (début, fin incluse), None si absent ou
+    multi-plages (on sert alors le fichier entier). ValueError si non satisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[len("bytes="):].strip().partition("-")
+    try:
+        if not start_s:  # bytes=-N : N derniers octets
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = min(int(end_s), size - 1) if end_s else size - 1
+    except ValueError:
+        raise ValueError("range invalide")
+    if start >= size or start > end:
+        raise ValueError("range non satisfiable")
+    return start, end
+
+
 class LocalFileStore:
+    """
+    Stockage adressé par contenu : l'upload est lu par blocs, haché pendant
+    l'écriture dans un fichier temporaire puis renommé atomiquement en
+    `objects/<sha[:2]>/<sha>`. `<sha>.<ext>` (servi sous /uploads) est un lien
+    dur vers l'objet : un doublon ne coûte qu'un lien.
+    """
+
     def __init__(self, root: str = "work/uploads"):
         self.root = Path(root)
-        self.root.mkdir(parents=True, exist_ok=True)
+        self.objects = self.root / "objects"
+        self.tmp = self.root / "tmp"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.tmp.mkdir(parents=True, exist_ok=True)
 
-    def put(self, file: bytes, mime: str) -> FileInfo:
-        file_id = str(uuid.uuid4())
+    def object_path(self, file_id: str) -> Path:
+        if not _FILE_ID_RE.match(file_id):
+            raise ValueError(f"file_id invalide: {file_id}")
+        return self.objects / file_id[:2] / file_id
+
+    def put(self, file: Union[bytes, BinaryIO], mime: str, chunk_size: int = CHUNK_SIZE) -> FileInfo:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if isinstance(file, (bytes, bytearray)):
+                    digest.update(file)
+                    out.write(file)
+                    size = len(file)
+                else:
+                    while True:
+                        chunk = file.read(chunk_size)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        out.write(chunk)
+                        size += len(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            file_id = digest.hexdigest()
+            path = self.object_path(file_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                os.unlink(tmp_name)  # doublon : l'objet existe déjà
+            else:
+                os.replace(tmp_name, path)
+                meta = {"mime": mime, "size": size}
+                path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
         ext = mime.split('/')[-1]
         filename = f"{file_id}.{ext}"
-        path = self.root / filename
-        with open(path, "wb") as f:
-            f.write(file)
+        self._link(path, self.root / filename)
         url = f"/uploads/{filename}"
-        return FileInfo(file_id=file_id, url=url, mime=mime, size=len(file))
+        return FileInfo(file_id=file_id, url=url, mime=mime, size=size)
+
+    @staticmethod
+    def _link(target: Path, link: Path) -> None:
+        if link.exists():
+            return
+        try:
+            os.link(target, link)
+        except FileExistsError:
+            pass
+        except OSError:
+            link.symlink_to(target.resolve())
+
+    def stat(self, file_id: str) -> FileInfo:
+        path = self.object_path(file_id)
+        if not path.exists():
+            raise FileNotFoundError(file_id)
+        meta_path = path.with_suffix(".json")
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        mime = meta.get("mime", "application/octet-stream")
+        return FileInfo(file_id=file_id, url=f"/uploads/{file_id}.{mime.split('/')[-1]}",
+                        mime=mime, size=path.stat().st_size)
+
+    def iter_range(self, file_id: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Lit les octets [start, end] (inclus) par blocs."""
+        path = self.object_path(file_id)
+        remaining = (path.stat().st_size if end is None else end + 1) - start
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
@@ -1,9 +1,402 @@
+"""
+Mémoire vectorielle embarquée.
+
+- embeddings : fonction pluggable ; par défaut `HashingEmbedder` (hashing trick,
+  déterministe, hors-ligne)
+- vecteurs : matrice float32 memory-mappée (`vectors.f32`), une ligne par item
+- items : SQLite (`items.sqlite3`) pour la table id -> ligne, le texte et les métadonnées
+- recherche : cosinus brute-force par blocs ; au-delà de `index_threshold`
+  items, un index IVF (k-means sphérique) limite le parcours à `nprobe` listes
+- suppressions par tombstone, filtres d'égalité sur les métadonnées
+- lexical : index inversé BM25 (SQLite FTS5, sans accents) ; en mode hybride,
+  les candidats viennent des posting lists, sont re-classés par cosinus et les
+  deux classements sont fusionnés (reciprocal rank fusion)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 256
+BLOCK_ROWS = 65536
+INDEX_THRESHOLD = 50_000
+RRF_K = 60
+LEXICAL_CANDIDATES = 200
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Une fonction d'embedding prend des textes et renvoie une matrice (n, dim) normalisée
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents : "Café" et "cafe" se rejoignent."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+class HashingEmbedder:
+    """Embedding par hashing trick (mots + trigrammes de caractères), signé, normalisé L2."""
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterable[str]:
+        for tok in tokenize(text):
+            yield "w:" + tok
+            padded = f"#{tok}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3]
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class _IVFIndex:
+    """Index IVF : centroïdes k-means sphérique, listes de lignes par centroïde."""
+
+    def __init__(self, centroids: np.ndarray, assign: np.ndarray):
+        self.centroids = centroids
+        self.assign = assign  # cluster par ligne, -1 si non indexée
+        self.pending: List[int] = []  # lignes ajoutées depuis la construction
+        self._build_lists()
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, alive: np.ndarray, iters: int = 8, seed: int = 0) -> "_IVFIndex":
+        rows = np.flatnonzero(alive)
+        nlist = int(min(4096, max(16, 4 * np.sqrt(len(rows)))))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(rows, size=min(len(rows), 50 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    v = members.sum(axis=0)
+                    centroids[c] = v / (np.linalg.norm(v) or 1.0)
+        assign = np.full(len(vectors), -1, dtype=np.int32)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            assign[block] = np.argmax(vectors[block] @ centroids.T, axis=1)
+        return cls(centroids, assign)
+
+    def _build_lists(self) -> None:
+        indexed = np.flatnonzero(self.assign >= 0)
+        order = indexed[np.argsort(self.assign[indexed], kind="stable")]
+        counts = np.bincount(self.assign[indexed], minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.rows = order
+        self.pending = []
+
+    def add(self, row: int, vector: np.ndarray) -> None:
+        if row >= len(self.assign):
+            grown = np.full(max(row + 1, 2 * len(self.assign)), -1, dtype=np.int32)
+            grown[:len(self.assign)] = self.assign
+            self.assign = grown
+        self.assign[row] = int(np.argmax(self.centroids @ vector))
+        self.pending.append(row)
+        if len(self.pending) > max(1024, len(self.rows) // 10):
+            self._build_lists()
+
+    def candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        probe = np.argsort(-(self.centroids @ q))[:nprobe]
+        parts = [self.rows[self.offsets[c]:self.offsets[c + 1]] for c in probe]
+        if self.pending:
+            parts.append(np.asarray(self.pending, dtype=np.int64))
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
 class MemoryStore:
-    """Stub de mémoire vectorielle."""
-    def upsert(self, items: list[dict]) -> int:
-        # Stub: ne fait rien
+    """Mémoire vectorielle persistante (upsert / query / delete)."""
+
+    def __init__(self, root: Optional[Path] = None, dim: int = DEFAULT_DIM,
+                 embedder: Optional[Embedder] = None, index_threshold: int = INDEX_THRESHOLD,
+                 nprobe: int = 16):
+        self.root = Path(root or os.getenv("MEMORY_DIR", "work/memory"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.index_threshold = index_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.root / "items.sqlite3", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items (row INTEGER PRIMARY KEY, id TEXT UNIQUE, "
+            "text TEXT, metadata TEXT, deleted INTEGER DEFAULT 0)"
+        )
+        self._init_fts()
+        self._ids: Dict[str, int] = {}
+        self._row_ids: Dict[int, str] = {}
+        self._meta_index: Dict[Tuple[str, str], Set[int]] = {}
+        self._n = 0
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ivf: Optional[_IVFIndex] = None
+        self._load()
+
+    # --- stockage ---
+    def _vectors_path(self) -> Path:
+        return self.root / "vectors.f32"
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(1024, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        path = self._vectors_path()
+        with open(path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+        self._capacity = capacity
+
+    def _load(self) -> None:
+        path = self._vectors_path()
+        existing = path.stat().st_size // (self.dim * 4) if path.exists() else 0
+        self._ensure_capacity(max(existing, 1))
+        for row, item_id, metadata, deleted in self._db.execute(
+                "SELECT row, id, metadata, deleted FROM items ORDER BY row"):
+            self._n = max(self._n, row + 1)
+            if deleted:
+                continue
+            self._ids[item_id] = row
+            self._row_ids[row] = item_id
+            self._alive[row] = True
+            self._index_metadata(row, json.loads(metadata or "{}"))
+        self._maybe_build_index()
+
+    def _init_fts(self) -> None:
+        exists = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone()
+        with self._db:
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+                             "text, tokenize='unicode61 remove_diacritics 2')")
+            if not exists:  # store créé avant l'index lexical
+                self._db.execute("INSERT INTO items_fts (rowid, text) SELECT row, text FROM items WHERE deleted = 0")
+
+    def _index_metadata(self, row: int, metadata: Dict[str, Any], remove: bool = False) -> None:
+        for key, value in metadata.items():
+            k = (key, json.dumps(value, sort_keys=True))
+            if remove:
+                self._meta_index.get(k, set()).discard(row)
+            else:
+                self._meta_index.setdefault(k, set()).add(row)
+
+    def _maybe_build_index(self) -> None:
+        if self._ivf is None and len(self._ids) >= self.index_threshold:
+            self._ivf = _IVFIndex.train(self._vectors[:self._n], self._alive[:self._n])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- API ---
+    def upsert(self, items: List[Dict[str, Any]]) -> int:
+        """items : {"id"?, "text", "metadata"?}. Un id existant est remplacé sur place."""
+        if not items:
+            return 0
+        texts = [str(it.get("text", "")) for it in items]
+        vectors = self.embedder(texts).astype(np.float32)
+        with self._lock:
+            rows = []
+            for it, text in zip(items, texts):
+                item_id = str(it.get("id") or uuid.uuid4())
+                metadata = it.get("metadata") or {}
+                row = self._ids.get(item_id)
+                if row is None:
+                    row = self._n
+                    self._n += 1
+                    self._ensure_capacity(self._n)
+                else:
+                    self._index_metadata(row, self._metadata_of(row), remove=True)
+                self._ids[item_id] = row
+                self._row_ids[row] = item_id
+                self._alive[row] = True
+                self._index_metadata(row, metadata)
+                rows.append((row, item_id, text, json.dumps(metadata, ensure_ascii=False)))
+            for (row, *_), vec in zip(rows, vectors):
+                self._vectors[row] = vec
+                if self._ivf is not None:
+                    self._ivf.add(row, vec)
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO items (row, id, text, metadata, deleted) VALUES (?, ?, ?, ?, 0)", rows)
+                self._db.executemany("DELETE FROM items_fts WHERE rowid = ?", [(r[0],) for r in rows])
+                self._db.executemany("INSERT INTO items_fts (rowid, text) VALUES (?, ?)", [(r[0], r[2]) for r in rows])
+            self._vectors.flush()
+            self._maybe_build_index()
         return len(items)
 
-    def query(self, query: str, top_k: int = 5) -> list[dict]:
-        # Stub: retourne une liste vide
-        return []
+    def delete(self, ids: Iterable[str]) -> int:
+        deleted = 0
+        with self._lock:
+            for item_id in ids:
+                row = self._ids.pop(item_id, None)
+                if row is None:
+                    continue
+                self._index_metadata(row, self._metadata_of(row), remove=True)
+                self._row_ids.pop(row, None)
+                self._alive[row] = False
+                with self._db:
+                    self._db.execute("UPDATE items SET deleted = 1 WHERE row = ?", (row,))
+                    self._db.execute("DELETE FROM items_fts WHERE rowid = ?", (row,))
+                deleted += 1
+        return deleted
+
+    def query(self, query: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None,
+              mode: str = "hybrid") -> List[Dict[str, Any]]:
+        """mode : "hybrid" (BM25 + cosinus, RRF), "vector" ou "lexical"."""
+        q = self.embedder([query])[0].astype(np.float32)
+        with self._lock:
+            allowed = self._filter_rows(filters)
+            if mode == "vector":
+                rows, scores = self._search(q, top_k, allowed)
+                return self._results(rows, scores)
+            lex_rows = self._lexical(query, max(LEXICAL_CANDIDATES, 4 * top_k), allowed)
+            if mode == "lexical":
+                ranks = np.arange(1, min(top_k, len(lex_rows)) + 1, dtype=np.float32)
+                return self._results(lex_rows[:top_k], 1.0 / (RRF_K + ranks))
+            return self._hybrid(q, top_k, lex_rows, allowed)
+
+    def lexical_search(self, query: str, limit: int = LEXICAL_CANDIDATES) -> List[int]:
+        """Lignes classées par BM25 (meilleure d'abord)."""
+        with self._lock:
+            return self._lexical(query, limit, None).tolist()
+
+    def score_rows(self, query: str, rows: Sequence[int]) -> np.ndarray:
+        """Cosinus exact de la requête contre des lignes données (re-ranking)."""
+        q = self.embedder([query])[0].astype(np.float32)
+        rows = np.asarray(rows, dtype=np.int64)
+        return self._vectors[rows] @ q if len(rows) else np.empty(0, dtype=np.float32)
+
+    # --- interne ---
+    def _metadata_of(self, row: int) -> Dict[str, Any]:
+        found = self._db.execute("SELECT metadata FROM items WHERE row = ?", (row,)).fetchone()
+        return json.loads(found[0] or "{}") if found else {}
+
+    def _filter_rows(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        sets = [self._meta_index.get((k, json.dumps(v, sort_keys=True)), set()) for k, v in filters.items()]
+        rows = set.intersection(*sets) if sets else set()
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def _lexical(self, query: str, limit: int, allowed: Optional[np.ndarray]) -> np.ndarray:
+        tokens = sorted(set(tokenize(query)))
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+        match = " OR ".join(f'"{t}"' for t in tokens)
+        found = self._db.execute(
+            "SELECT rowid FROM items_fts WHERE items_fts MATCH ? ORDER BY bm25(items_fts) LIMIT ?",
+            (match, limit)).fetchall()
+        rows = np.fromiter((r[0] for r in found), dtype=np.int64, count=len(found))
+        if allowed is not None:
+            rows = rows[np.isin(rows, allowed)]
+        return rows
+
+    def _hybrid(self, q: np.ndarray, top_k: int, lex_rows: np.ndarray,
+                allowed: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+        """Candidats lexicaux re-classés par cosinus, fusion RRF des deux rangs."""
+        fused: Dict[int, float] = {}
+        for rank, row in enumerate(lex_rows.tolist()):
+            fused[row] = 1.0 / (RRF_K + rank + 1)
+        if len(lex_rows):
+            cos = self._vectors[lex_rows] @ q
+            for rank, i in enumerate(np.argsort(-cos, kind="stable").tolist()):
+                fused[int(lex_rows[i])] += 1.0 / (RRF_K + rank + 1)
+        if len(lex_rows) < top_k:
+            # peu ou pas de correspondance exacte : on complète par la recherche vectorielle
+            vec_rows, _ = self._search(q, top_k, allowed)
+            for rank, row in enumerate(vec_rows.tolist()):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused.items(), key=lambda kv: -kv[1])[:top_k]
+        return self._results(np.array([r for r, _ in best], dtype=np.int64),
+                             np.array([s for _, s in best], dtype=np.float32))
+
+    def _search(self, q: np.ndarray, top_k: int, allowed: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        if allowed is not None and len(allowed) <= BLOCK_ROWS:
+            candidates = allowed  # filtre sélectif : score exact des seules lignes retenues
+        elif self._ivf is not None:
+            candidates = self._ivf.candidates(q, self.nprobe)
+            if allowed is not None:
+                candidates = np.intersect1d(candidates, allowed, assume_unique=True)
+        else:
+            return self._brute_force(q, top_k, allowed)
+        candidates = candidates[self._alive[candidates]]
+        scores = self._vectors[candidates] @ q if len(candidates) else np.empty(0, dtype=np.float32)
+        return self._top_k(candidates, scores, top_k)
+
+    def _brute_force(self, q: np.ndarray, top_k: int, allowed: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        mask = self._alive[:self._n].copy()
+        if allowed is not None:
+            keep = np.zeros_like(mask)
+            keep[allowed] = True
+            mask &= keep
+        best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, self._n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self._n)
+            rows = start + np.flatnonzero(mask[start:stop])
+            if not len(rows):
+                continue
+            scores = self._vectors[start:stop][rows - start] @ q
+            best_rows, best_scores = self._top_k(np.concatenate([best_rows, rows]),
+                                                 np.concatenate([best_scores, scores]), top_k)
+        return best_rows, best_scores
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if len(scores) > k:
+            part = np.argpartition(-scores, k)[:k]
+            rows, scores = rows[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def _results(self, rows: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            found = self._db.execute("SELECT id, text, metadata FROM items WHERE row = ?", (row,)).fetchone()
+            if found:
+                results.append({"id": found[0], "text": found[1], "metadata": json.loads(found[2] or "{}"),
+                                "score": round(float(score), 6)})
+        return results
+
+
+_store: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    """Instance partagée par le process (index chargé une seule fois)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MemoryStore()
+    return _store
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, status
-from fastapi.responses import JSONResponse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Header, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from services.contracts.models import *
-from .db import create_conversation, add_message, list_messages
-from .filestore import LocalFileStore
-from .memory import MemoryStore
-from .tools_registry import REGISTRY
-import requests
+from services.contracts.bus import FILE_UPLOADED, TOOL_CALLED, emit
+from services.contracts.codec import JSON_MEDIA_TYPE, decode_chat_response, encode, encode_messages
+from services.contracts.events import FileUploaded, ToolCalled
+from services.contracts.http_client import CircuitOpenError, get_client
+from services.contracts.runs import get_run_repository
+from services.contracts.streaming import NDJSON, SSE, encode_ndjson, encode_sse, iter_ndjson
+from .db import create_conversation, add_message, list_messages, encode_cursor, decode_cursor, page_etag
+from .filestore import LocalFileStore, parse_range
+from .memory import get_memory_store
+from .tools_registry import REGISTRY, run_tool, validate_args
+from .tool_schema import ToolArgsError
+from .tool_cache import get_tool_cache
+import httpx
 import os
 
 router = APIRouter()
@@ -15,55 +27,218 @@ def create_agent():
     return create_conversation()
 
 @router.post("/v1/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    # Enregistre le message user
-    add_message(req.conversation_id, req.message.role, req.message.content, req.message.tool_name)
-    # Appelle le worker
+async def chat(req: ChatRequest):
+    # Enregistre le message user (hors boucle d'événements : écriture SQLite synchrone
+    # quand l'écriture différée est désactivée)
+    await run_in_threadpool(add_message, req.conversation_id, req.message.role, req.message.content,
+                            req.message.tool_name)
+    # Appelle le worker (client poolé partagé, circuit breaker : échec immédiat si le worker est down)
     worker_url = os.getenv("WORKER_URL", "http://worker:9000/agent/step")
     try:
-        resp = requests.post(worker_url, json={"conversation_id": req.conversation_id}, timeout=2)
+        resp = await get_client().post(worker_url, json={"conversation_id": req.conversation_id})
         if resp.status_code == 200:
-            data = resp.json()
-            return ChatResponse(messages=[Message(**m) for m in data.get("messages", [])])
-    except Exception:
-        # Worker non dispo : echo minimal
-        msg = Message(role="assistant", content=f"Echo: {req.message.content}")
-        add_message(req.conversation_id, msg.role, msg.content)
-        return ChatResponse(messages=[msg])
+            # validé et ré-encodé par le codec, sans repasser par des modèles Pydantic
+            chat = decode_chat_response(resp.content)
+            return Response(encode(chat), media_type=JSON_MEDIA_TYPE)
+    except (httpx.HTTPError, CircuitOpenError, ValueError):
+        pass
+    # Worker non dispo : echo minimal
+    msg = Message(role="assistant", content=f"Echo: {req.message.content}")
+    await run_in_threadpool(add_message, req.conversation_id, msg.role, msg.content)
+    return ChatResponse(messages=[msg])
+
+@router.post("/v1/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """
+    Relaie les messages de l'agent au fil de l'eau : SSE si le client accepte
+    text/event-stream, NDJSON sinon. Chaque message est enregistré dès réception,
+    dans le pool de threads pour ne pas bloquer les autres flux pendant l'écriture.
+    """
+    await run_in_threadpool(add_message, req.conversation_id, req.message.role, req.message.content,
+                            req.message.tool_name)
+    worker_url = os.getenv("WORKER_URL", "http://worker:9000/agent/step") + "/stream"
+    sse = SSE in request.headers.get("accept", "")
+    encode = encode_sse if sse else encode_ndjson
+
+    async def persist(data: dict) -> bytes:
+        msg = await run_in_threadpool(add_message, req.conversation_id, data["role"], data["content"],
+                                      data.get("tool_name"))
+        return encode("message", msg.model_dump(mode="json"))
+
+    async def events():
+        relayed = False
+        try:
+            async with get_client().stream("POST", worker_url, json={"conversation_id": req.conversation_id},
+                                           timeout=httpx.Timeout(60.0, connect=1.0)) as resp:
+                if resp.status_code == 200:
+                    async for event in iter_ndjson(resp.aiter_lines()):
+                        if event.get("event") == "message":
+                            relayed = True
+                            yield await persist(event["data"])
+                        elif event.get("event") == "error":
+                            yield encode("error", event.get("data"))
+        except (httpx.HTTPError, CircuitOpenError, ValueError):
+            if relayed:
+                yield encode("error", {"error": "worker interrompu"})
+        if not relayed:
+            # Worker non dispo : echo minimal
+            yield await persist({"role": "assistant", "content": f"Echo: {req.message.content}"})
+        yield encode("done")
+
+    return StreamingResponse(events(), media_type=SSE if sse else NDJSON,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/v1/conversations/{id}", response_model=list[Message])
-def get_conversation(id: str):
-    return list_messages(id)
+def get_conversation(
+    id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    direction: Literal["forward", "backward"] = "forward",
+    since: Optional[str] = None,
+    before: Optional[str] = None,
+):
+    """
+    Historique paginé (keyset sur created_at, id), toujours en ordre chronologique.
+    - forward : messages après `cursor` (sans cursor : depuis le début)
+    - backward : messages avant `cursor` (sans cursor : les plus récents)
+    Les curseurs de continuation sont renvoyés dans X-Next-Cursor / X-Prev-Cursor.
+    Un client qui poll avec son dernier X-Next-Cursor ne reçoit que les nouveaux
+    messages, et un 304 si rien n'a changé (If-None-Match).
+    """
+    try:
+        key = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    backward = direction == "backward"
+    messages = list_messages(
+        id, limit,
+        after=None if backward else key,
+        before=key if backward else None,
+        since=since, until=before,
+        newest_first=backward,
+    )
+    etag = page_etag(id, messages, cursor, direction, since, before, limit)
+    headers = {"ETag": etag}
+    if messages:
+        headers["X-Next-Cursor"] = encode_cursor(messages[-1])
+        headers["X-Prev-Cursor"] = encode_cursor(messages[0])
+    elif cursor:
+        headers["X-Next-Cursor"] = cursor
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(encode_messages(messages), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+@router.get("/v1/runs", response_model=list[RunInfo])
+def list_runs(limit: int = Query(100, ge=1, le=1000), decision: Optional[str] = None,
+              app: Optional[str] = None):
+    """Derniers runs du pipeline, filtrables par décision du judge et par app."""
+    return get_run_repository().recent_runs(limit, decision=decision, app_name=app)
+
+@router.get("/v1/runs/stats/apk-size", response_model=list[ApkSizePoint])
+def apk_size_trend(app: str, limit: int = Query(100, ge=1, le=1000)):
+    """Évolution de la taille de l'APK d'une app (ordre chronologique)."""
+    return get_run_repository().apk_size_trend(app, limit)
+
+@router.get("/v1/runs/stats/slow-stages", response_model=list[SlowStage])
+def slow_stages(days: float = Query(7, gt=0), limit: int = Query(20, ge=1, le=500)):
+    """Étapes les plus lentes sur les `days` derniers jours."""
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    return get_run_repository().slowest_stages(since, limit)
+
+@router.get("/v1/runs/{run_id}", response_model=RunInfo)
+def get_run(run_id: str):
+    run = get_run_repository().get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
 
 @router.post("/v1/files", response_model=FileInfo)
 def upload_file(file: UploadFile = File(...)):
     store = LocalFileStore()
-    content = file.file.read()
-    return store.put(content, file.content_type or "application/octet-stream")
+    info = store.put(file.file, file.content_type or "application/octet-stream")
+    emit(FILE_UPLOADED, FileUploaded(**info.model_dump()))
+    return info
+
+@router.get("/v1/files/{file_id}")
+def download_file(file_id: str, request: Request):
+    store = LocalFileStore()
+    try:
+        info = store.stat(file_id)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="fichier introuvable")
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{file_id}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    try:
+        byte_range = parse_range(request.headers.get("range"), info.size)
+    except ValueError:
+        return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                        headers={"Content-Range": f"bytes */{info.size}"})
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(store.iter_range(file_id), media_type=info.mime, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(store.iter_range(file_id, start, end), status_code=status.HTTP_206_PARTIAL_CONTENT,
+                             media_type=info.mime, headers=headers)
 
 @router.post("/v1/memory/upsert")
 def memory_upsert(req: MemoryUpsert):
-    store = MemoryStore()
-    count = store.upsert(req.items)
+    count = get_memory_store().upsert(req.items)
     return {"count": count}
 
 @router.post("/v1/memory/query")
 def memory_query(req: MemoryQuery):
-    store = MemoryStore()
-    results = store.query(req.query, req.top_k)
+    results = get_memory_store().query(req.query, req.top_k, req.filters, req.mode)
     return {"results": results}
 
+@router.post("/v1/memory/delete")
+def memory_delete(req: MemoryDelete):
+    return {"deleted": get_memory_store().delete(req.ids)}
+
 @router.get("/v1/tools")
 def list_tools():
     return list(REGISTRY.keys())
 
+@router.get("/v1/tools/cache/stats")
+def tool_cache_stats():
+    return get_tool_cache().metrics()
+
 @router.post("/v1/tools/{name}/invoke")
-def invoke_tool(name: str, args: dict):
+def invoke_tool(name: str, args: dict, x_conversation_id: str = Header("")):
     tool = REGISTRY.get(name)
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
     try:
-        result = tool.run(args)
+        args = validate_args(tool, args)
+    except ToolArgsError as e:
+        raise HTTPException(status_code=422, detail={"error": e.message, "path": e.path})
+    emit(TOOL_CALLED, ToolCalled(conversation_id=x_conversation_id, tool=name, args=args))
+    try:
+        result = run_tool(tool, args)
         return {"result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/v1/tools/invoke/batch")
+async def invoke_tools_batch(req: ToolBatchRequest, x_conversation_id: str = Header("")):
+    """Valide tous les appels puis exécute les valides en parallèle ; un résultat par appel, dans l'ordre."""
+    async def invoke_one(call: ToolCall) -> dict:
+        tool = REGISTRY.get(call.name)
+        if not tool:
+            return {"name": call.name, "status": 404, "error": "Tool not found"}
+        try:
+            args = validate_args(tool, call.args)
+        except ToolArgsError as e:
+            return {"name": call.name, "status": 422, "error": e.message, "path": e.path}
+        emit(TOOL_CALLED, ToolCalled(conversation_id=x_conversation_id, tool=call.name, args=args))
+        try:
+            result = await run_in_threadpool(run_tool, tool, args)
+        except Exception as e:
+            return {"name": call.name, "status": 500, "error": str(e)}
+        return {"name": call.name, "status": 200, "result": result}
+
+    return {"results": await asyncio.gather(*(invoke_one(call) for call in req.calls))}
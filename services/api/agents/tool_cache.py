@@ -0,0 +1,178 @@
+"""
+Cache des résultats de tools.
+
+Un tool est mis en cache s'il déclare `cacheable = True` (TTL : `cache_ttl`).
+La clé est le nom du tool + les arguments normalisés d'après son `schema`
+(valeurs par défaut appliquées, entiers écrits en flottant ramenés à l'entier,
+clés triées). Les propriétés hors schéma ne sont retirées que si le schéma
+déclare `additionalProperties: false` (défaut JSON Schema : acceptées, donc
+significatives). Les chaînes sont gardées telles quelles : le tool les reçoit
+sans retouche, "café " et "café" peuvent donner des résultats différents.
+Deux niveaux : LRU en mémoire, puis Redis si TOOL_CACHE_REDIS_URL / REDIS_URL
+est défini (partagé entre process). Compteurs hit/miss par tool.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _normalize_value(schema: Dict[str, Any], value: Any) -> Any:
+    if isinstance(value, dict):
+        return normalize_args(schema, value)
+    if isinstance(value, list):
+        return [_normalize_value(schema.get("items", {}), v) for v in value]
+    if isinstance(value, float) and value.is_integer() and schema.get("type") in ("integer", "number"):
+        return int(value)
+    return value
+
+
+def normalize_args(schema: Dict[str, Any], args: Dict[str, Any]) -> Dict[str, Any]:
+    props = schema.get("properties")
+    out = {}
+    for key, value in args.items():
+        # refusé par le contrat du tool : n'influence pas le résultat, ne doit pas fragmenter le cache
+        if props is not None and key not in props and schema.get("additionalProperties", True) is False:
+            continue
+        out[key] = _normalize_value((props or {}).get(key, {}), value)
+    for key, sub in (props or {}).items():
+        if key not in out and "default" in sub:
+            out[key] = sub["default"]
+    return dict(sorted(out.items()))
+
+
+def cache_key(name: str, schema: Dict[str, Any], args: Dict[str, Any]) -> str:
+    canonical = json.dumps(normalize_args(schema, args), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f"forge:tool:{name}:" + hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """LRU avec expiration par entrée."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ToolCache:
+    def __init__(self, maxsize: int = 1024, redis_client: Any = None):
+        self.lru = LRUCache(maxsize)
+        self.redis = redis_client
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, field: str) -> None:
+        with self._lock:
+            tool_stats = self.stats.setdefault(name, {"hits": 0, "redis_hits": 0, "misses": 0, "errors": 0})
+            tool_stats[field] += 1
+
+    def _redis_get(self, key: str) -> Tuple[bool, Any]:
+        if self.redis is None:
+            return False, None
+        try:
+            raw = self.redis.get(key)
+        except Exception:
+            return False, None  # Redis indisponible : le cache mémoire suffit
+        return (True, json.loads(raw)) if raw is not None else (False, None)
+
+    def _redis_set(self, key: str, value: Any, ttl: float) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+        except Exception:
+            pass
+
+    def run(self, tool: Any, args: Dict[str, Any]) -> Any:
+        """Exécute `tool.run(args)` en passant par le cache si le tool est cacheable."""
+        if not getattr(tool, "cacheable", False):
+            return tool.run(args)
+        ttl = float(getattr(tool, "cache_ttl", 60))
+        key = cache_key(tool.name, getattr(tool, "schema", {}) or {}, args)
+        found, value = self.lru.get(key)
+        if found:
+            self._count(tool.name, "hits")
+            return copy.deepcopy(value)
+        found, value = self._redis_get(key)
+        if found:
+            self._count(tool.name, "redis_hits")
+            self.lru.set(key, value, ttl)
+            return copy.deepcopy(value)
+        self._count(tool.name, "misses")
+        try:
+            value = tool.run(args)
+        except Exception:
+            self._count(tool.name, "errors")
+            raise
+        self.lru.set(key, value, ttl)
+        self._redis_set(key, value, ttl)
+        return copy.deepcopy(value)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            per_tool = {name: dict(s) for name, s in self.stats.items()}
+        hits = sum(s["hits"] + s["redis_hits"] for s in per_tool.values())
+        total = hits + sum(s["misses"] for s in per_tool.values())
+        return {
+            "entries": len(self.lru),
+            "redis": self.redis is not None,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "tools": per_tool,
+        }
+
+
+_cache: Optional[ToolCache] = None
+_cache_lock = threading.Lock()
+
+
+def _redis_from_env() -> Any:
+    url = os.getenv("TOOL_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis  # dépendance optionnelle
+    except ImportError:
+        return None
+    return redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+
+
+def get_tool_cache() -> ToolCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ToolCache(int(os.getenv("TOOL_CACHE_SIZE", "1024")), _redis_from_env())
+    return _cache
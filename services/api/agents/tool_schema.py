@@ -0,0 +1,174 @@
+"""
+Validation compilée des arguments de tools.
+
+Le schéma JSON d'un tool est compilé une fois, à l'enregistrement, en une
+fonction Python : fastjsonschema si installé, sinon notre propre générateur
+de code pour le sous-ensemble courant (type, properties, required,
+additionalProperties, enum, const, bornes, longueurs, pattern, items).
+Un schéma utilisant d'autres mots-clés retombe sur `jsonschema`.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fastjsonschema
+except ImportError:  # dépendance optionnelle
+    fastjsonschema = None
+
+Validator = Callable[[Any], Any]
+
+_TYPES = {
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "null": "{v} is None",
+}
+_SUPPORTED = {
+    "type", "properties", "required", "additionalProperties", "enum", "const",
+    "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "minLength", "maxLength",
+    "pattern", "items", "minItems", "maxItems",
+    # annotations sans effet sur la validation
+    "title", "description", "default", "examples", "$schema", "$id",
+}
+
+
+class ToolArgsError(ValueError):
+    def __init__(self, message: str, path: str = "args"):
+        super().__init__(f"{path}: {message}")
+        self.message = message
+        self.path = path
+
+
+def _supported(schema: Any) -> bool:
+    if not isinstance(schema, dict) or not set(schema) <= _SUPPORTED:
+        return False
+    children: List[Any] = list(schema.get("properties", {}).values())
+    for key in ("items", "additionalProperties"):
+        if isinstance(schema.get(key), dict):
+            children.append(schema[key])
+    return all(_supported(c) for c in children)
+
+
+class _CodeGen:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.consts: Dict[str, Any] = {}
+        self._n = 0
+
+    def _name(self, prefix: str) -> str:
+        self._n += 1
+        return f"{prefix}{self._n}"
+
+    def _const(self, value: Any) -> str:
+        name = self._name("_c")
+        self.consts[name] = value
+        return name
+
+    def _fail(self, ind: str, msg: str, path: str) -> None:
+        self.lines.append(f"{ind}    raise ToolArgsError({msg!r}, {path})")
+
+    def emit(self, schema: Dict[str, Any], v: str, path: str, ind: str) -> None:
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            cond = " or ".join(_TYPES[t].format(v=v) for t in types)
+            self.lines.append(f"{ind}if not ({cond}):")
+            self._fail(ind, f"doit être de type {'|'.join(types)}", path)
+        if "enum" in schema:
+            self.lines.append(f"{ind}if {v} not in {self._const(schema['enum'])}:")
+            self._fail(ind, f"doit valoir l'une de {schema['enum']}", path)
+        if "const" in schema:
+            self.lines.append(f"{ind}if {v} != {self._const(schema['const'])}:")
+            self._fail(ind, f"doit valoir {schema['const']!r}", path)
+        num = f"isinstance({v}, (int, float)) and not isinstance({v}, bool) and "
+        for key, op, label in (("minimum", "<", ">="), ("maximum", ">", "<="),
+                               ("exclusiveMinimum", "<=", ">"), ("exclusiveMaximum", ">=", "<")):
+            if key in schema:
+                self.lines.append(f"{ind}if {num}{v} {op} {schema[key]!r}:")
+                self._fail(ind, f"doit être {label} {schema[key]}", path)
+        for key, op, label in (("minLength", "<", "au moins"), ("maxLength", ">", "au plus")):
+            if key in schema:
+                self.lines.append(f"{ind}if isinstance({v}, str) and len({v}) {op} {schema[key]}:")
+                self._fail(ind, f"doit contenir {label} {schema[key]} caractères", path)
+        if "pattern" in schema:
+            self.lines.append(f"{ind}if isinstance({v}, str) and not {self._const(re.compile(schema['pattern']))}.search({v}):")
+            self._fail(ind, f"ne correspond pas à {schema['pattern']}", path)
+        for key, op, label in (("minItems", "<", "au moins"), ("maxItems", ">", "au plus")):
+            if key in schema:
+                self.lines.append(f"{ind}if isinstance({v}, list) and len({v}) {op} {schema[key]}:")
+                self._fail(ind, f"doit contenir {label} {schema[key]} éléments", path)
+        if isinstance(schema.get("items"), dict):
+            i, item = self._name("_i"), self._name("_x")
+            self.lines.append(f"{ind}if isinstance({v}, list):")
+            self.lines.append(f"{ind}    for {i}, {item} in enumerate({v}):")
+            self.emit(schema["items"], item, f"{path} + '[' + str({i}) + ']'", ind + "        ")
+        self._emit_object(schema, v, path, ind)
+
+    def _emit_object(self, schema: Dict[str, Any], v: str, path: str, ind: str) -> None:
+        props = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        if not (props or schema.get("required") or extra is not True):
+            return
+        self.lines.append(f"{ind}if isinstance({v}, dict):")
+        inner = ind + "    "
+        for key in schema.get("required", []):
+            self.lines.append(f"{inner}if {key!r} not in {v}:")
+            self._fail(inner, f"propriété requise manquante: {key}", path)
+        for key, sub in props.items():
+            child = self._name("_p")
+            self.lines.append(f"{inner}if {key!r} in {v}:")
+            self.lines.append(f"{inner}    {child} = {v}[{key!r}]")
+            self.emit(sub, child, f"{path} + {'.' + key!r}", inner + "    ")
+        if extra is not True:
+            k = self._name("_k")
+            self.lines.append(f"{inner}for {k} in {v}:")
+            self.lines.append(f"{inner}    if {k} not in {self._const(set(props))}:")
+            if extra is False:
+                self.lines.append(f"{inner}        raise ToolArgsError('propriété non autorisée: ' + str({k}), {path})")
+            else:
+                self.emit(extra, f"{v}[{k}]", f"{path} + '.' + str({k})", inner + "        ")
+
+
+def generate_validator(schema: Dict[str, Any]) -> Validator:
+    """Génère et compile le code de validation (sous-ensemble de JSON Schema)."""
+    gen = _CodeGen()
+    gen.lines.append("def validate(data):")
+    gen.emit(schema, "data", "'args'", "    ")
+    gen.lines.append("    return data")
+    namespace: Dict[str, Any] = {"ToolArgsError": ToolArgsError, **gen.consts}
+    exec(compile("\n".join(gen.lines), "<tool-schema>", "exec"), namespace)
+    return namespace["validate"]
+
+
+def _jsonschema_validator(schema: Dict[str, Any]) -> Validator:
+    import jsonschema
+    checker = jsonschema.validators.validator_for(schema)(schema)
+
+    def validate(data: Any) -> Any:
+        error = jsonschema.exceptions.best_match(checker.iter_errors(data))
+        if error is not None:
+            path = "args" + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in error.absolute_path)
+            raise ToolArgsError(error.message, path)
+        return data
+    return validate
+
+
+def compile_schema(schema: Optional[Dict[str, Any]]) -> Validator:
+    if not schema:
+        return lambda data: data
+    if fastjsonschema is not None:
+        compiled = fastjsonschema.compile(schema)
+
+        def validate(data: Any) -> Any:
+            try:
+                return compiled(data)
+            except fastjsonschema.JsonSchemaValueException as e:
+                raise ToolArgsError(e.message, e.name.replace("data", "args", 1))
+        return validate
+    if _supported(schema):
+        return generate_validator(schema)
+    return _jsonschema_validator(schema)
@@ -1,9 +1,14 @@
 from typing import Any, Dict, List
 from abc import ABC, abstractmethod
+from .tool_cache import get_tool_cache
+from .tool_schema import ToolArgsError, Validator, compile_schema
 
 class Tool(ABC):
     name: str
     schema: dict
+    # résultat réutilisable pour des arguments identiques pendant cache_ttl secondes
+    cacheable: bool = False
+    cache_ttl: float = 0
 
     @abstractmethod
     def run(self, args: dict) -> Any:
@@ -12,6 +17,8 @@ class Tool(ABC):
 class RestaurantSearchTool(Tool):
     name = "restaurant_search"
     schema = {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]}
+    cacheable = True
+    cache_ttl = 300
 
     def run(self, args: dict) -> List[Dict[str, Any]]:
         query = args.get("query", "")
@@ -21,6 +28,24 @@ class RestaurantSearchTool(Tool):
             {"name": "Bistro Central", "address": "2 avenue de la République", "rating": 4.2},
         ]
 
-REGISTRY = {
-    "restaurant_search": RestaurantSearchTool(),
-}
+REGISTRY: Dict[str, Tool] = {}
+# validateurs compilés une fois, à l'enregistrement
+VALIDATORS: Dict[str, Validator] = {}
+
+def register(tool: Tool) -> Tool:
+    VALIDATORS[tool.name] = compile_schema(tool.schema)
+    REGISTRY[tool.name] = tool
+    return tool
+
+register(RestaurantSearchTool())
+
+def validate_args(tool: Tool, args: dict) -> dict:
+    """Lève ToolArgsError si les arguments ne respectent pas le schéma du tool."""
+    validator = VALIDATORS.get(tool.name)
+    if validator is None:
+        validator = VALIDATORS[tool.name] = compile_schema(tool.schema)
+    return validator(args)
+
+def run_tool(tool: Tool, args: dict) -> Any:
+    """Valide puis exécute un tool du registre (via le cache de résultats si le tool est cacheable)."""
+    return get_tool_cache().run(tool, validate_args(tool, args))
@@ -1,5 +1,6 @@
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
@@ -10,7 +11,8 @@ from .schemas import SpecValidateRequest, SpecValidateResponse
 
 app = FastAPI(title="Forge AGI API", version="1.0.0")
 
-# Charger le schéma JSON
+# Charger le schéma JSON (une fois, à la première validation et non à l'import)
+@lru_cache(maxsize=1)
 def load_schema() -> Dict[str, Any]:
     schema_path = Path(__file__).parent.parent.parent.parent / "specs" / "schema" / "mobile-app-0.1.0.json"
     try:
@@ -21,9 +23,6 @@ def load_schema() -> Dict[str, Any]:
     except json.JSONDecodeError as e:
         raise RuntimeError(f"Invalid JSON in schema file: {e}")
 
-# Charger le schéma au démarrage
-SCHEMA = load_schema()
-
 
 @app.get("/v1/health")
 async def health_check():
@@ -44,7 +43,7 @@ async def validate_spec(request: SpecValidateRequest):
     
     try:
         # Valider le spec contre le schéma JSON
-        validate(instance=request.spec, schema=SCHEMA)
+        validate(instance=request.spec, schema=load_schema())
         return SpecValidateResponse(valid=True)
         
     except ValidationError as e:
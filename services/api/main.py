@@ -5,9 +5,22 @@ from typing import Dict, Any
 import yaml
 import json
 import os
-from services.api.agents import router as agents_router
+from services.api.agents.router import router as agents_router
+from services.api.agents.db import close_write_queue, init_db
+from contextlib import asynccontextmanager
+from services.contracts.http_client import aclose_client
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rien n'est ouvert à l'import : base et client HTTP vivent avec le serveur
+    init_db()
+    try:
+        yield
+    finally:
+        await aclose_client()
+        close_write_queue()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/v1/health")
 def health():
@@ -0,0 +1,122 @@
+import asyncio
+
+import fakeredis
+
+from services.contracts.bus import (AGENT_MESSAGE_CREATED, RUN_FINISHED, TOOL_CALLED, EventBus,
+                                    MemoryBackend, RedisStreamsBackend, decode_event, encode_event)
+from services.contracts.events import AgentMessageCreated, RunFinished
+
+
+def test_msgpack_roundtrip_rebuilds_contracts():
+    event = decode_event(encode_event(AGENT_MESSAGE_CREATED, AgentMessageCreated("c", "m", "user", "salut")))
+    assert event.topic == AGENT_MESSAGE_CREATED
+    assert event.data == AgentMessageCreated("c", "m", "user", "salut")
+    tool = decode_event(encode_event(TOOL_CALLED, {"conversation_id": "c", "tool": "t", "args": {"q": 1}}))
+    assert tool.data["args"] == {"q": 1}
+
+
+async def _collect(bus, topic, group, n, fail_first=0, consumers=1):
+    got, failures, stop = [], {"left": fail_first}, asyncio.Event()
+
+    async def handler(event):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("boom")
+        got.append(event.data)
+        if len(got) >= n:
+            stop.set()
+
+    tasks = [asyncio.create_task(bus.consume(topic, group, f"c{i}", handler, poll_s=0.05, stop=stop))
+             for i in range(consumers)]
+    return got, stop, tasks
+
+
+def _run_bus(bus, emit_count, **kwargs):
+    async def go():
+        got, stop, tasks = await _collect(bus, RUN_FINISHED, "indexer", emit_count, **kwargs)
+        await asyncio.sleep(0.05)  # groupe créé avant publication
+        for i in range(emit_count):
+            bus.emit(RUN_FINISHED, RunFinished(run_id=f"r{i}", status="accept"))
+        await asyncio.wait_for(stop.wait(), 10)
+        await asyncio.gather(*tasks)
+        return got
+    return asyncio.run(go())
+
+
+def test_memory_backend_redelivers_failed_events():
+    got = _run_bus(EventBus(MemoryBackend()), 5, fail_first=2)
+    assert sorted(e["run_id"] for e in got) == [f"r{i}" for i in range(5)]
+
+
+def test_redis_streams_consumer_group_at_least_once():
+    client = fakeredis.FakeRedis()
+    backend = RedisStreamsBackend(client, claim_idle_ms=0)
+    got = _run_bus(EventBus(backend), 20, fail_first=1, consumers=2)
+
+    assert {e["run_id"] for e in got} == {f"r{i}" for i in range(20)}
+    assert client.xlen("forge:events:run.finished") == 20
+    assert client.xpending("forge:events:run.finished", "indexer")["pending"] == 0
+
+
+def test_redis_poison_event_goes_to_dead_letter_stream():
+    client = fakeredis.FakeRedis()
+    backend = RedisStreamsBackend(client, claim_idle_ms=0, max_deliveries=3)
+    bus = EventBus(backend)
+    key = "forge:events:run.finished"
+
+    async def go():
+        got, stop = [], asyncio.Event()
+
+        async def handler(event):
+            if event.data["run_id"] == "poison":
+                raise RuntimeError("boom")
+            got.append(event.data["run_id"])
+
+        task = asyncio.create_task(bus.consume(RUN_FINISHED, "indexer", "c0", handler, poll_s=0.05, stop=stop))
+        await asyncio.sleep(0.05)
+        for run_id in ("ok1", "poison", "ok2"):
+            bus.emit(RUN_FINISHED, RunFinished(run_id=run_id, status="accept"))
+        for _ in range(200):
+            if client.exists(key + ":dead") and len(got) == 2:
+                break
+            await asyncio.sleep(0.05)
+        stop.set()
+        await task
+        return got
+
+    assert asyncio.run(go()) == ["ok1", "ok2"]
+    assert client.xpending(key, "indexer")["pending"] == 0
+    [(_, fields)] = client.xrange(key + ":dead")
+    assert decode_event(fields[b"e"]).data["run_id"] == "poison"
+    assert fields[b"group"] == b"indexer" and int(fields[b"deliveries"]) == 3
+
+
+def test_redis_dead_letters_events_never_acked_by_crashed_consumers():
+    client = fakeredis.FakeRedis()
+    backend = RedisStreamsBackend(client, claim_idle_ms=0, max_deliveries=2)
+
+    async def go():
+        await backend.ensure_group(RUN_FINISHED, "indexer")
+        backend.publish_batch([(RUN_FINISHED, encode_event(RUN_FINISHED, RunFinished(run_id="r", status="accept")))])
+        # chaque consommateur meurt avant d'acquitter : seule la relivraison compte
+        return [len(await backend.fetch(RUN_FINISHED, "indexer", f"c{i}", 10, 0.01)) for i in range(3)]
+
+    assert asyncio.run(go()) == [1, 1, 0]
+    assert client.xlen("forge:events:run.finished:dead") == 1
+    assert client.xpending("forge:events:run.finished", "indexer")["pending"] == 0
+
+
+def test_emit_batches_and_counts():
+    published = []
+
+    class Recorder:
+        def publish_batch(self, items):
+            published.append(len(items))
+
+    bus = EventBus(Recorder(), batch_size=100, flush_interval_s=0.05)
+    for i in range(250):
+        bus.emit(RUN_FINISHED, RunFinished(run_id=str(i), status="accept"))
+    bus.flush()
+    assert sum(published) == 250 and len(published) < 250
+    bus.emit("inconnu", {})
+    assert bus.dropped == 1
@@ -0,0 +1,61 @@
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.api.agents import router as agents_router
+from services.api.main import app
+from services.contracts.http_client import ServiceClient
+from services.contracts.streaming import encode_ndjson
+
+client = TestClient(app)
+
+fake_worker = FastAPI()
+
+
+@fake_worker.post("/agent/step/stream")
+async def _stream():
+    async def events():
+        yield encode_ndjson("message", {"role": "tool", "content": "Recherche", "tool_name": "restaurant_search"})
+        yield encode_ndjson("message", {"role": "assistant", "content": "Café de Paris"})
+        yield encode_ndjson("done")
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _new_conversation():
+    return client.post("/v1/agents").json()["id"]
+
+
+def test_stream_relays_and_persists_each_message(monkeypatch):
+    monkeypatch.setenv("WORKER_URL", "http://worker/agent/step")
+    worker = ServiceClient(transport=httpx.ASGITransport(app=fake_worker))
+    monkeypatch.setattr(agents_router, "get_client", lambda: worker)
+    conv_id = _new_conversation()
+
+    res = client.post("/v1/chat/stream", json={"conversation_id": conv_id,
+                                               "message": {"role": "user", "content": "un café ?"}})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in res.text.splitlines()]
+    assert [e["event"] for e in events] == ["message", "message", "done"]
+    assert events[1]["data"]["content"] == "Café de Paris"
+    assert events[1]["data"]["id"]  # id attribué à l'enregistrement
+
+    history = client.get(f"/v1/conversations/{conv_id}").json()
+    assert [m["role"] for m in history] == ["user", "tool", "assistant"]
+
+
+def test_stream_sse_falls_back_to_echo_when_worker_is_down(monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    down = ServiceClient(transport=httpx.MockTransport(refuse))
+    monkeypatch.setattr(agents_router, "get_client", lambda: down)
+    conv_id = _new_conversation()
+
+    res = client.post("/v1/chat/stream", headers={"Accept": "text/event-stream"},
+                      json={"conversation_id": conv_id, "message": {"role": "user", "content": "Bonjour"}})
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert "event: message" in res.text and "Echo: Bonjour" in res.text
+    assert res.text.rstrip().endswith("event: done\ndata: null")
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from services.contracts import codec
+from services.contracts.models import ChatResponse, Message
+
+MESSAGES = [
+    Message(id="m1", role="user", content="un café ?", created_at=datetime(2026, 1, 1, 12, 0, 0, 123456)),
+    Message(role="tool", content="Recherche", tool_name="restaurant_search"),
+]
+
+
+def test_json_matches_pydantic():
+    expected = json.loads(ChatResponse(messages=MESSAGES).model_dump_json())
+    assert json.loads(codec.encode(ChatResponse(messages=MESSAGES))) == expected
+    assert json.loads(codec.encode_messages(MESSAGES)) == expected["messages"]
+
+
+def test_decode_chat_response_roundtrip_and_validation():
+    raw = ChatResponse(messages=MESSAGES).model_dump_json().encode()
+    decoded = codec.decode_chat_response(raw)
+    assert json.loads(codec.encode(decoded)) == json.loads(raw)
+    with pytest.raises(ValueError):
+        codec.decode_chat_response(b'{"messages": [{"role": "robot", "content": "x"}]}')
+
+
+@pytest.mark.skipif(codec.msgspec is None, reason="msgspec absent")
+def test_struct_mirrors_pydantic_fields():
+    assert codec.MessageStruct.__struct_fields__ == tuple(Message.model_fields)
+
+
+def test_msgpack_roundtrip():
+    payload = {"id": "e1", "d": {"args": {"q": [1, 2]}, "raw": b"\x00\x01"}}
+    assert codec.unpack(codec.pack(payload)) == payload
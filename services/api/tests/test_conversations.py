@@ -0,0 +1,71 @@
+import pytest
+from fastapi.testclient import TestClient
+from services.api.main import app
+from services.api.agents import db
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def conv_id():
+    conv = db.create_conversation()
+    rows = [(f"{conv.id}-{i:03d}", conv.id, "user", f"msg {i}", None, f"2026-01-01T00:00:{i:02d}") for i in range(12)]
+    db.add_messages(rows)
+    return conv.id
+
+
+def _contents(resp):
+    return [m["content"] for m in resp.json()]
+
+
+def test_forward_pages_cover_whole_history(conv_id):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get(f"/v1/conversations/{conv_id}", params=params)
+        assert resp.status_code == 200
+        if not resp.json():
+            break
+        seen += _contents(resp)
+        cursor = resp.headers["X-Next-Cursor"]
+
+    assert seen == [f"msg {i}" for i in range(12)]
+
+
+def test_backward_without_cursor_returns_latest_in_order(conv_id):
+    resp = client.get(f"/v1/conversations/{conv_id}", params={"limit": 3, "direction": "backward"})
+    assert _contents(resp) == ["msg 9", "msg 10", "msg 11"]
+
+    older = client.get(f"/v1/conversations/{conv_id}",
+                       params={"limit": 3, "direction": "backward", "cursor": resp.headers["X-Prev-Cursor"]})
+    assert _contents(older) == ["msg 6", "msg 7", "msg 8"]
+
+
+def test_since_and_before_filters(conv_id):
+    resp = client.get(f"/v1/conversations/{conv_id}",
+                      params={"since": "2026-01-01T00:00:03", "before": "2026-01-01T00:00:06"})
+    assert _contents(resp) == ["msg 4", "msg 5"]
+
+
+def test_polling_returns_only_deltas_and_304_when_unchanged(conv_id):
+    first = client.get(f"/v1/conversations/{conv_id}", params={"direction": "backward", "limit": 1})
+    cursor = first.headers["X-Next-Cursor"]
+
+    empty = client.get(f"/v1/conversations/{conv_id}", params={"cursor": cursor})
+    assert empty.json() == []
+    again = client.get(f"/v1/conversations/{conv_id}", params={"cursor": cursor},
+                       headers={"If-None-Match": empty.headers["ETag"]})
+    assert again.status_code == 304
+
+    db.add_message(conv_id, "assistant", "new")
+    delta = client.get(f"/v1/conversations/{conv_id}", params={"cursor": cursor},
+                       headers={"If-None-Match": empty.headers["ETag"]})
+    assert delta.status_code == 200
+    assert _contents(delta) == ["new"]
+
+
+def test_invalid_cursor_is_rejected(conv_id):
+    resp = client.get(f"/v1/conversations/{conv_id}", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from services.api.agents import db
+from services.api.agents.db import SQLiteConversationRepository, WriteBehindQueue, new_message_row
+
+
+@pytest.fixture
+def repo(tmp_path):
+    r = SQLiteConversationRepository(tmp_path / "conv.sqlite3")
+    r.init_schema()
+    yield r
+    r.close()
+
+
+def test_wal_and_synchronous_normal(repo):
+    conn = repo._conn()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_list_messages_uses_composite_index(repo):
+    plan = repo._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT role, content, tool_name, created_at FROM messages "
+        "WHERE conv_id = ? ORDER BY created_at ASC, id ASC LIMIT ?", ("c", 50)
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_messages_conv_created" in details
+    assert "TEMP B-TREE" not in details  # pas de tri supplémentaire
+
+
+def test_batched_insert_and_ordering(repo):
+    conv = repo.create_conversation()
+    rows = [new_message_row(conv.id, "user", f"m{i}") for i in range(10)]
+    assert repo.add_messages(rows) == 10
+    repo.add_message(conv.id, "assistant", "last")
+
+    messages = repo.list_messages(conv.id, limit=50)
+    assert [m.content for m in messages] == [f"m{i}" for i in range(10)] + ["last"]
+
+
+def test_one_connection_per_thread(repo):
+    conns = {}
+
+    def grab(name):
+        conns[name] = repo._conn()
+
+    threads = [threading.Thread(target=grab, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert repo._conn() is repo._conn()
+    assert conns[0] is not conns[1]
+
+
+def test_write_behind_batches_and_reads_own_writes(repo, monkeypatch):
+    queue = WriteBehindQueue(repo, max_batch=1000, flush_interval_s=60)
+    monkeypatch.setattr(db, "_queue", queue)
+    monkeypatch.setattr(db, "get_repository", lambda: repo)
+    conv = repo.create_conversation()
+
+    for i in range(5):
+        db.add_message(conv.id, "user", f"m{i}")
+    assert repo.list_messages(conv.id) == []  # rien d'écrit encore
+    assert [m.content for m in db.list_messages(conv.id)] == [f"m{i}" for i in range(5)]
+    assert [m.content for m in db.list_messages(conv.id, 2, newest_first=True)] == ["m3", "m4"]
+
+    assert queue.flush() == 5
+    assert queue.pending(conv.id) == []
+    assert [m.content for m in db.list_messages(conv.id)] == [f"m{i}" for i in range(5)]
+    queue.close()
+
+
+def test_read_your_writes_across_concurrent_flush(repo, monkeypatch):
+    queue = WriteBehindQueue(repo, max_batch=1000, flush_interval_s=60)
+    conv = repo.create_conversation()
+
+    class FlushAfterRead:
+        """La page SQL est lue, puis le flush committe avant toute autre lecture."""
+        def list_messages(self, *args, **kwargs):
+            messages = repo.list_messages(*args, **kwargs)
+            queue.flush()
+            return messages
+
+    monkeypatch.setattr(db, "_queue", queue)
+    monkeypatch.setattr(db, "get_repository", lambda: FlushAfterRead())
+    db.add_message(conv.id, "user", "m0")
+    assert [m.content for m in db.list_messages(conv.id)] == ["m0"]
+    assert [m.content for m in db.list_messages(conv.id)] == ["m0"]  # committé, pas de doublon
+    queue.close()
+
+
+def test_write_behind_flushes_on_size_and_close(repo):
+    queue = WriteBehindQueue(repo, max_batch=100, flush_interval_s=60)
+    conv = repo.create_conversation()
+    queue.enqueue(new_message_row(conv.id, "user", f"m{i}") for i in range(100))
+    deadline = time.monotonic() + 5
+    while queue.pending(conv.id) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(repo.list_messages(conv.id, limit=500)) == 100
+
+    queue.enqueue([new_message_row(conv.id, "user", "dernier")])
+    queue.close()
+    assert len(repo.list_messages(conv.id, limit=500)) == 101
+    with pytest.raises(RuntimeError):
+        queue.enqueue([new_message_row(conv.id, "user", "trop tard")])
+
+
+def test_failing_batch_falls_back_to_row_by_row(repo):
+    conv = repo.create_conversation()
+    poison = new_message_row(conv.id, "user", "poison")
+
+    class RejectsPoison:
+        def add_messages(self, rows):
+            rows = list(rows)
+            if poison in rows:
+                raise ValueError("ligne invalide")
+            return repo.add_messages(rows)
+
+    queue = WriteBehindQueue(RejectsPoison(), max_batch=100, flush_interval_s=60, max_retries=2)
+    queue.enqueue([new_message_row(conv.id, "user", "m0"), poison, new_message_row(conv.id, "user", "m1")])
+    with pytest.raises(ValueError):
+        queue.flush()  # premier échec : le lot reste en file
+    assert len(queue.pending(conv.id)) == 3
+    assert queue.flush() == 2
+    assert [m.content for m in repo.list_messages(conv.id)] == ["m0", "m1"]
+    assert queue.dead_letters == [poison]
+    assert queue.pending(conv.id) == []
+    queue.close()
+
+
+def test_write_behind_throughput(repo):
+    queue = WriteBehindQueue(repo, max_batch=2000, flush_interval_s=0.01)
+    conv = repo.create_conversation()
+    start = time.perf_counter()
+    for i in range(20000):
+        queue.enqueue([new_message_row(conv.id, "user", f"m{i}")])
+    queue.close()
+    elapsed = time.perf_counter() - start
+    assert len(repo.list_messages(conv.id, limit=100000)) == 20000
+    assert 20000 / elapsed > 5000
+
+
+def test_import_opens_no_database():
+    import subprocess
+    import sys
+    out = subprocess.run([sys.executable, "-c", "import services.api.agents.db as db; print(db._repository)"],
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "None"
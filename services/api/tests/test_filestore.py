@@ -0,0 +1,55 @@
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.api.agents.filestore import LocalFileStore, parse_range
+from services.api.main import app
+
+client = TestClient(app)
+DATA = bytes(range(256)) * 40
+
+
+def test_put_streams_in_chunks_and_dedups(tmp_path):
+    store = LocalFileStore(str(tmp_path))
+    first = store.put(io.BytesIO(DATA), "image/png", chunk_size=1000)
+    second = store.put(DATA, "image/png")
+
+    assert first.file_id == hashlib.sha256(DATA).hexdigest()
+    assert first == second
+    obj = store.object_path(first.file_id)
+    assert obj.read_bytes() == DATA
+    assert (tmp_path / f"{first.file_id}.png").stat().st_ino == obj.stat().st_ino
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+def test_upload_and_range_download(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    res = client.post("/v1/files", files={"file": ("a.bin", DATA, "application/octet-stream")})
+    assert res.status_code == 200
+    file_id = res.json()["file_id"]
+
+    full = client.get(f"/v1/files/{file_id}")
+    assert full.status_code == 200 and full.content == DATA
+    assert full.headers["accept-ranges"] == "bytes"
+
+    part = client.get(f"/v1/files/{file_id}", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == DATA[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+
+    assert client.get(f"/v1/files/{file_id}", headers={"Range": f"bytes={len(DATA)}-"}).status_code == 416
+    assert client.get(f"/v1/files/{file_id}", headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+    assert client.get("/v1/files/not-a-digest").status_code == 404
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.contracts.http_client import CircuitBreaker, CircuitOpenError, ServiceClient
+
+
+def _client(handler, **kwargs):
+    return ServiceClient(transport=httpx.MockTransport(handler), backoff_s=0.001, **kwargs)
+
+
+def test_retries_idempotent_requests_on_503():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) < 3 else 200, json={"ok": True})
+
+    async def go():
+        client = _client(handler, retries=2)
+        resp = await client.get("http://api/v1/tools")
+        await client.aclose()
+        return resp
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200
+    assert len(calls) == 3
+
+
+def test_post_is_not_replayed_after_response():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def go():
+        client = _client(handler, retries=3)
+        resp = await client.post("http://worker/agent/step", json={})
+        await client.aclose()
+        return resp
+
+    assert asyncio.run(go()).status_code == 503
+    assert len(calls) == 1
+
+
+def test_connect_errors_open_the_circuit():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("refused", request=request)
+
+    async def go():
+        client = _client(handler, retries=0, failure_threshold=2, reset_timeout_s=60)
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.post("http://worker/agent/step")
+        with pytest.raises(CircuitOpenError):
+            await client.post("http://worker/agent/step")
+        await client.aclose()
+
+    asyncio.run(go())
+    assert len(calls) == 2
+
+
+def test_breaker_half_open_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
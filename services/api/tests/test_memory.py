@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+import pytest
+
+from services.api.agents.memory import HashingEmbedder, MemoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MemoryStore(tmp_path / "mem", dim=128)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    emb = HashingEmbedder(64)
+    a, b = emb(["Café au lait", "cafe au lait"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert np.allclose(emb(["x y z"]), emb(["x y z"]))
+
+
+def test_upsert_query_delete(store):
+    store.upsert([
+        {"id": "a", "text": "flutter build apk gradle", "metadata": {"kind": "build"}},
+        {"id": "b", "text": "recette de cuisine tarte aux pommes", "metadata": {"kind": "note"}},
+        {"id": "c", "text": "gradle cache flutter", "metadata": {"kind": "note"}},
+    ])
+    top = store.query("flutter gradle", top_k=2)
+    assert {r["id"] for r in top} == {"a", "c"}
+    assert top[0]["score"] >= top[1]["score"]
+
+    filtered = store.query("flutter gradle", top_k=5, filters={"kind": "note"})
+    assert [r["id"] for r in filtered][0] == "c"
+    assert all(r["metadata"]["kind"] == "note" for r in filtered)
+
+    assert store.delete(["c", "missing"]) == 1
+    assert "c" not in {r["id"] for r in store.query("flutter gradle", top_k=5)}
+    assert len(store) == 2
+
+
+def test_upsert_replaces_existing_id(store):
+    store.upsert([{"id": "a", "text": "pommes", "metadata": {"v": 1}}])
+    store.upsert([{"id": "a", "text": "poires", "metadata": {"v": 2}}])
+    assert len(store) == 1
+    res = store.query("poires", top_k=1, filters={"v": 2})
+    assert res[0]["id"] == "a" and res[0]["text"] == "poires"
+    assert store.query("poires", filters={"v": 1}) == []
+
+
+def test_persistence_across_instances(tmp_path):
+    root = tmp_path / "mem"
+    s1 = MemoryStore(root, dim=64)
+    s1.upsert([{"id": f"i{i}", "text": f"document numero {i}"} for i in range(3000)])
+    s1.delete(["i5"])
+
+    s2 = MemoryStore(root, dim=64)
+    assert len(s2) == 2999
+    assert s2.query("document numero 42", top_k=1)[0]["id"] == "i42"
+    assert "i5" not in {r["id"] for r in s2.query("document numero 5", top_k=10)}
+
+
+class _RandomEmbedder:
+    """Vecteurs aléatoires groupés : simule un corpus réel sans coût d'embedding."""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def __call__(self, texts):
+        out = np.stack([np.random.default_rng(abs(hash(t)) % 2**32).standard_normal(self.dim) for t in texts])
+        return (out / np.linalg.norm(out, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_index_above_threshold(tmp_path):
+    dim = 32
+    store = MemoryStore(tmp_path / "mem", dim=dim, embedder=_RandomEmbedder(dim), index_threshold=5000, nprobe=8)
+    store.upsert([{"id": str(i), "text": f"t{i}"} for i in range(6000)])
+    assert store._ivf is not None
+
+    store.upsert([{"id": "late", "text": "tardif"}])  # ajouté après la construction
+    assert store.query("tardif", top_k=1)[0]["id"] == "late"
+    hits = sum(store.query(f"t{i}", top_k=1)[0]["id"] == str(i) for i in range(0, 6000, 300))
+    assert hits >= 18  # requête = vecteur stocké : l'IVF retrouve quasiment toujours l'exact
+
+    start = time.perf_counter()
+    store.query("t123", top_k=10)
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hybrid_prefers_exact_keyword_hits(store):
+    store.upsert([
+        {"id": "cafe", "text": "Café Lumière, près de la gare Saint-Lazare"},
+        {"id": "resto", "text": "restaurant près du parc"},
+        {"id": "gare", "text": "horaires des trains gare de Lyon"},
+    ])
+    assert store.query("cafe pres de la gare", top_k=1)[0]["id"] == "cafe"
+    assert [r["id"] for r in store.query("lumiere", top_k=3, mode="lexical")] == ["cafe"]
+    # aucune correspondance exacte : la recherche vectorielle complète
+    assert len(store.query("zzz inconnu", top_k=2)) == 2
+
+
+def test_lexical_index_follows_updates_and_deletes(tmp_path):
+    root = tmp_path / "mem"
+    store = MemoryStore(root, dim=64)
+    store.upsert([{"id": "a", "text": "pommes"}, {"id": "b", "text": "poires"}])
+    store.upsert([{"id": "a", "text": "cerises"}])
+    store.delete(["b"])
+
+    reopened = MemoryStore(root, dim=64)
+    assert reopened.query("pommes", mode="lexical") == []
+    assert reopened.query("poires", mode="lexical") == []
+    assert reopened.query("cerises", mode="lexical")[0]["id"] == "a"
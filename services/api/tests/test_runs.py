@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.contracts import runs
+from services.api.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    repo = runs.SQLiteRunRepository(tmp_path / "runs.sqlite3")
+    repo.init_schema()
+    monkeypatch.setattr(runs, "_repository", repo)
+    return repo
+
+
+def _run(repo, run_id, app_name, decision, apk_size, created_at):
+    repo._execute([(runs.SQL_START_RUN, (run_id, created_at))])
+    repo.start_stage(run_id, "build_apk")
+    repo.finish_stage(run_id, "build_apk", apk_size / 1000, "ok")
+    repo.finish_run({"id": run_id, "status": decision, "decision": decision, "app_name": app_name,
+                     "apk_size_bytes": apk_size, "duration_s": 1.5},
+                    [{"id": f"{run_id}:artifacts/judge_report.json", "run_id": run_id,
+                      "path": "artifacts/judge_report.json", "type": "judge", "size_bytes": 10,
+                      "kpis": {"decision": decision}}])
+
+
+def test_queries_use_indexes(repo):
+    plans = {}
+    conn = repo._conn()
+    for name, sql in {
+        "recent": runs.recent_runs_query("accept")[0],
+        "apk": runs.SQL_APK_TREND,
+        "slow": runs.SQL_SLOWEST_STAGES,
+    }.items():
+        plans[name] = " ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, ("x", 1)))
+    assert "idx_runs_decision_created" in plans["recent"]
+    assert "idx_runs_app_created" in plans["apk"]
+    assert "idx_stages_started" in plans["slow"]
+
+
+def test_runs_api(repo):
+    base = datetime.utcnow() - timedelta(days=1)
+    for i in range(5):
+        _run(repo, f"r{i}", "Resa" if i % 2 == 0 else "Shop", "accept" if i < 3 else "revise",
+             1000 + i * 100, (base + timedelta(minutes=i)).isoformat())
+
+    res = client.get("/v1/runs", params={"limit": 2})
+    assert [r["id"] for r in res.json()] == ["r4", "r3"]
+    assert [r["id"] for r in client.get("/v1/runs", params={"decision": "accept"}).json()] == ["r2", "r1", "r0"]
+
+    trend = client.get("/v1/runs/stats/apk-size", params={"app": "Resa"}).json()
+    assert [(p["id"], p["apk_size_bytes"]) for p in trend] == [("r0", 1000), ("r2", 1200), ("r4", 1400)]
+
+    slow = client.get("/v1/runs/stats/slow-stages", params={"limit": 2}).json()
+    assert [(s["run_id"], s["stage"]) for s in slow] == [("r4", "build_apk"), ("r3", "build_apk")]
+
+    run = client.get("/v1/runs/r1").json()
+    assert run["decision"] == "accept" and run["duration_s"] == 1.5
+    assert run["stages"][0]["stage"] == "build_apk"
+    assert run["artifacts"][0]["kpis"] == {"decision": "accept"}
+    assert client.get("/v1/runs/absent").status_code == 404
+
+
+def test_finish_run_replaces_artifacts(repo):
+    repo.start_run("x")
+    art = {"id": "x:a", "run_id": "x", "path": "a", "type": "other"}
+    repo.finish_run({"id": "x", "status": "accept"}, [art])
+    repo.finish_run({"id": "x", "status": "accept"}, [art])
+    assert len(repo.get_run("x")["artifacts"]) == 1
@@ -0,0 +1,74 @@
+import fakeredis
+
+from services.api.agents.tool_cache import LRUCache, ToolCache, cache_key
+
+
+class CountingTool:
+    name = "search"
+    schema = {"type": "object", "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "default": 5}}}
+    cacheable = True
+    cache_ttl = 60
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, args):
+        self.calls += 1
+        return [{"q": args.get("query"), "n": self.calls}]
+
+
+def test_key_normalization():
+    schema = CountingTool.schema
+    base = cache_key("search", schema, {"query": "café"})
+    assert cache_key("search", schema, {"limit": 5.0, "query": "café"}) == base
+    assert cache_key("search", schema, {"query": "thé"}) != base
+    # le tool reçoit la chaîne telle quelle : pas de fusion des espaces
+    assert cache_key("search", schema, {"query": "  café "}) != base
+
+
+def test_extra_properties_dropped_only_when_schema_forbids_them():
+    schema = CountingTool.schema
+    assert cache_key("search", schema, {"query": "café", "debug": True}) != cache_key("search", schema, {"query": "café"})
+    closed = {**schema, "additionalProperties": False}
+    assert cache_key("search", closed, {"query": "café", "debug": True}) == cache_key("search", closed, {"query": "café"})
+
+
+def test_lru_hits_and_metrics():
+    cache, tool = ToolCache(maxsize=10), CountingTool()
+    first = cache.run(tool, {"query": "café"})
+    first[0]["q"] = "modifié"  # le résultat renvoyé est une copie
+    assert cache.run(tool, {"query": "café", "limit": 5}) == [{"q": "café", "n": 1}]
+    assert tool.calls == 1
+    m = cache.metrics()
+    assert m["tools"]["search"]["hits"] == 1 and m["tools"]["search"]["misses"] == 1
+    assert m["hit_ratio"] == 0.5
+
+
+def test_non_cacheable_tools_always_run():
+    cache, tool = ToolCache(), CountingTool()
+    tool.cacheable = False
+    cache.run(tool, {"query": "x"})
+    cache.run(tool, {"query": "x"})
+    assert tool.calls == 2
+
+
+def test_redis_tier_shared_between_instances():
+    server = fakeredis.FakeServer()
+    tool = CountingTool()
+    ToolCache(redis_client=fakeredis.FakeRedis(server=server)).run(tool, {"query": "café"})
+    other = ToolCache(redis_client=fakeredis.FakeRedis(server=server))
+    assert other.run(tool, {"query": "café"}) == [{"q": "café", "n": 1}]
+    assert tool.calls == 1
+    assert other.metrics()["tools"]["search"]["redis_hits"] == 1
+
+
+def test_lru_eviction_and_expiry():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+    lru.get("a")
+    lru.set("c", 3, 60)
+    assert lru.get("b") == (False, None)
+    assert lru.get("a") == (True, 1)
+    lru.set("d", 4, -1)
+    assert lru.get("d") == (False, None)
@@ -0,0 +1,79 @@
+import jsonschema
+import pytest
+from fastapi.testclient import TestClient
+
+from services.api.agents.tool_schema import ToolArgsError, compile_schema, generate_validator
+from services.api.main import app
+
+client = TestClient(app)
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 1, "maxLength": 50},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 20},
+        "sort": {"enum": ["rating", "distance"]},
+        "tags": {"type": "array", "items": {"type": "string", "pattern": "^[a-z]+$"}, "maxItems": 3},
+        "geo": {"type": "object", "properties": {"lat": {"type": "number"}}, "required": ["lat"],
+                "additionalProperties": False},
+    },
+    "required": ["query"],
+}
+
+CASES = [
+    ({"query": "café"}, True),
+    ({"query": "café", "limit": 5, "sort": "rating", "tags": ["vegan"], "geo": {"lat": 48.8}}, True),
+    ({}, False),
+    ({"query": ""}, False),
+    ({"query": 3}, False),
+    ({"query": "x", "limit": True}, False),
+    ({"query": "x", "limit": 0}, False),
+    ({"query": "x", "limit": 2.5}, False),
+    ({"query": "x", "sort": "price"}, False),
+    ({"query": "x", "tags": ["a", "B"]}, False),
+    ({"query": "x", "tags": ["a", "b", "c", "d"]}, False),
+    ({"query": "x", "geo": {}}, False),
+    ({"query": "x", "geo": {"lat": 1, "lon": 2}}, False),
+    ("pas un objet", False),
+]
+
+
+@pytest.mark.parametrize("args,valid", CASES)
+def test_generated_validator_matches_jsonschema(args, valid):
+    assert jsonschema.Draft7Validator(SCHEMA).is_valid(args) is valid
+    validate = generate_validator(SCHEMA)
+    if valid:
+        assert validate(args) is args
+    else:
+        with pytest.raises(ToolArgsError):
+            validate(args)
+
+
+def test_error_path_points_to_field():
+    with pytest.raises(ToolArgsError) as exc:
+        generate_validator(SCHEMA)({"query": "x", "tags": ["ok", "KO"]})
+    assert exc.value.path == "args.tags[1]"
+
+
+def test_unsupported_keywords_fall_back_to_jsonschema():
+    validate = compile_schema({"type": "object", "properties": {"a": {"anyOf": [{"type": "string"}, {"type": "integer"}]}}})
+    validate({"a": 1})
+    with pytest.raises(ToolArgsError):
+        validate({"a": []})
+
+
+def test_invoke_rejects_invalid_args_with_422():
+    res = client.post("/v1/tools/restaurant_search/invoke", json={"query": 12})
+    assert res.status_code == 422
+    assert res.json()["detail"]["path"] == "args.query"
+
+
+def test_batch_invoke():
+    res = client.post("/v1/tools/invoke/batch", json={"calls": [
+        {"name": "restaurant_search", "args": {"query": "café"}},
+        {"name": "restaurant_search", "args": {}},
+        {"name": "inconnu", "args": {}},
+    ]})
+    assert res.status_code == 200
+    assert [r["status"] for r in res.json()["results"]] == [200, 422, 404]
+    assert res.json()["results"][0]["result"]
@@ -0,0 +1,339 @@
+"""
+Bus d'événements pour les contrats de `events.py`.
+
+Publication : `emit(topic, event)` ne bloque jamais l'appelant (requête HTTP,
+étape de pipeline) ; les événements sont encodés en msgpack et envoyés par
+lots depuis un thread dédié.
+
+Consommation : `await bus.consume(topic, group, consumer, handler)`. Chaque
+groupe reçoit tous les événements du topic, les consommateurs d'un même groupe
+se les partagent. Livraison au-moins-une-fois : un événement n'est acquitté
+qu'après succès du handler, sinon il est relivré.
+
+Backends :
+- `MemoryBackend` : asyncio, dans le process (défaut, tests)
+- `RedisStreamsBackend` : un stream par topic, consumer groups (XREADGROUP /
+  XACK), les messages non acquittés sont repris par XAUTOCLAIM
+Au-delà de `max_deliveries` livraisons sans acquittement, un message part en
+lettre morte (liste `dead_letters` en mémoire, stream `<topic>:dead` sous Redis)
+et est acquitté : un événement empoisonné ne bloque pas le groupe indéfiniment.
+FORGE_EVENT_BUS=memory|redis|off (redis utilise REDIS_URL).
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .codec import pack, unpack
+from .events import AgentMessageCreated, FileUploaded, RunFinished, ToolCalled
+
+AGENT_MESSAGE_CREATED = "agent.message.created"
+TOOL_CALLED = "tool.called"
+FILE_UPLOADED = "file.uploaded"
+RUN_FINISHED = "run.finished"
+
+TOPICS: Dict[str, Any] = {
+    AGENT_MESSAGE_CREATED: AgentMessageCreated,
+    TOOL_CALLED: ToolCalled,
+    FILE_UPLOADED: FileUploaded,
+    RUN_FINISHED: RunFinished,
+}
+
+
+class Event(NamedTuple):
+    id: str
+    topic: str
+    ts: float
+    data: Any  # instance du contrat (dataclass) ou dict (TypedDict)
+
+
+Handler = Callable[[Event], Awaitable[None]]
+
+
+def encode_event(topic: str, event: Any) -> bytes:
+    if topic not in TOPICS:
+        raise ValueError(f"topic inconnu: {topic}")
+    data = dataclasses.asdict(event) if dataclasses.is_dataclass(event) else dict(event)
+    return pack({"id": uuid.uuid4().hex, "t": topic, "ts": time.time(), "d": data})
+
+
+def decode_event(raw: bytes) -> Event:
+    env = unpack(raw)
+    contract = TOPICS.get(env["t"])
+    data = env["d"]
+    if contract is not None and dataclasses.is_dataclass(contract):
+        data = contract(**data)
+    return Event(env["id"], env["t"], env["ts"], data)
+
+
+class MemoryBackend:
+    """Backend en mémoire : une file asyncio par (topic, groupe). Non durable."""
+
+    def __init__(self, max_deliveries: int = 5):
+        self.max_deliveries = max_deliveries
+        self._groups: Dict[str, Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._attempts: Dict[str, int] = {}
+        self.dead_letters: List[Tuple[str, str, bytes]] = []
+        self._lock = threading.Lock()
+
+    async def ensure_group(self, topic: str, group: str) -> None:
+        with self._lock:
+            self._groups.setdefault(topic, {}).setdefault(group, (asyncio.get_running_loop(), asyncio.Queue()))
+
+    def publish_batch(self, items: List[Tuple[str, bytes]]) -> None:
+        with self._lock:
+            targets = {topic: list(groups.values()) for topic, groups in self._groups.items()}
+        for topic, raw in items:
+            for loop, q in targets.get(topic, []):
+                try:
+                    loop.call_soon_threadsafe(q.put_nowait, (uuid.uuid4().hex, raw))
+                except RuntimeError:
+                    pass  # boucle du consommateur fermée
+
+    async def fetch(self, topic: str, group: str, consumer: str, count: int,
+                    timeout_s: float) -> List[Tuple[str, bytes]]:
+        _, q = self._groups[topic][group]
+        try:
+            first = await asyncio.wait_for(q.get(), timeout_s)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < count and not q.empty():
+            batch.append(q.get_nowait())
+        return batch
+
+    async def ack(self, topic: str, group: str, ids: List[str]) -> None:
+        for msg_id in ids:
+            self._attempts.pop(msg_id, None)
+
+    async def nack(self, topic: str, group: str, msg_id: str, raw: bytes) -> None:
+        attempts = self._attempts.get(msg_id, 1)
+        if attempts >= self.max_deliveries:
+            self._attempts.pop(msg_id, None)
+            self.dead_letters.append((topic, group, raw))
+            return
+        self._attempts[msg_id] = attempts + 1
+        _, q = self._groups[topic][group]
+        q.put_nowait((msg_id, raw))
+
+
+class RedisStreamsBackend:
+    """
+    Streams Redis `forge:events:<topic>` (client redis-py synchrone, appels bloquants en thread).
+    Lettres mortes : stream `forge:events:<topic>:dead` (champs e, group, id, deliveries).
+    """
+
+    def __init__(self, client: Any, maxlen: int = 100_000, claim_idle_ms: int = 30_000,
+                 prefix: str = "forge:events:", max_deliveries: int = 5):
+        self.client = client
+        self.maxlen = maxlen
+        self.claim_idle_ms = claim_idle_ms
+        self.prefix = prefix
+        self.max_deliveries = max_deliveries
+
+    def _key(self, topic: str) -> str:
+        return self.prefix + topic
+
+    def dead_key(self, topic: str) -> str:
+        return self._key(topic) + ":dead"
+
+    def _deliveries(self, key: str, group: str, ids: List[str]) -> Dict[str, int]:
+        """Compteur de livraisons (XPENDING) de chaque message encore en attente."""
+        pipe = self.client.pipeline(transaction=False)
+        for msg_id in ids:
+            pipe.xpending_range(key, group, min=msg_id, max=msg_id, count=1)
+        return {_str(p["message_id"]): int(p["times_delivered"]) for rows in pipe.execute() for p in rows}
+
+    def _dead_letter(self, topic: str, group: str, entries: List[Tuple[str, bytes, int]]) -> None:
+        pipe = self.client.pipeline()
+        for msg_id, raw, deliveries in entries:
+            pipe.xadd(self.dead_key(topic), {"e": raw, "group": group, "id": msg_id, "deliveries": deliveries},
+                      maxlen=self.maxlen, approximate=True)
+            pipe.xack(self._key(topic), group, msg_id)
+        pipe.execute()
+        print(f"[bus] {len(entries)} événement(s) {topic} en lettre morte pour {group}")
+
+    async def ensure_group(self, topic: str, group: str) -> None:
+        def create():
+            try:
+                self.client.xgroup_create(self._key(topic), group, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        await asyncio.to_thread(create)
+
+    def publish_batch(self, items: List[Tuple[str, bytes]]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for topic, raw in items:
+            pipe.xadd(self._key(topic), {"e": raw}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    async def fetch(self, topic: str, group: str, consumer: str, count: int,
+                    timeout_s: float) -> List[Tuple[str, bytes]]:
+        key = self._key(topic)
+
+        def read():
+            # d'abord les messages livrés à un consommateur mort et jamais acquittés
+            claimed = self.client.xautoclaim(key, group, consumer, min_idle_time=self.claim_idle_ms,
+                                             start_id="0-0", count=count)
+            entries = [e for e in claimed[1] if e and e[1]]
+            if entries:
+                # relivré trop de fois (handler qui tue son consommateur...) : lettre morte
+                counts = self._deliveries(key, group, [_str(msg_id) for msg_id, _ in entries])
+                dead = [(_str(msg_id), fields.get(b"e", fields.get("e")), counts[_str(msg_id)])
+                        for msg_id, fields in entries if counts.get(_str(msg_id), 0) > self.max_deliveries]
+                if dead:
+                    self._dead_letter(topic, group, dead)
+                    gone = {msg_id for msg_id, _, _ in dead}
+                    entries = [e for e in entries if _str(e[0]) not in gone]
+            if not entries:
+                resp = self.client.xreadgroup(group, consumer, {key: ">"}, count=count,
+                                              block=max(1, int(timeout_s * 1000)))
+                entries = resp[0][1] if resp else []
+            return [(_str(msg_id), fields.get(b"e", fields.get("e"))) for msg_id, fields in entries]
+        return await asyncio.to_thread(read)
+
+    async def ack(self, topic: str, group: str, ids: List[str]) -> None:
+        if ids:
+            await asyncio.to_thread(self.client.xack, self._key(topic), group, *ids)
+
+    async def nack(self, topic: str, group: str, msg_id: str, raw: bytes) -> None:
+        # non acquitté : reste dans la PEL, repris par XAUTOCLAIM après claim_idle_ms,
+        # sauf s'il a épuisé ses livraisons
+        def check():
+            deliveries = self._deliveries(self._key(topic), group, [msg_id]).get(msg_id, 0)
+            if deliveries >= self.max_deliveries:
+                self._dead_letter(topic, group, [(msg_id, raw, deliveries)])
+        await asyncio.to_thread(check)
+
+
+def _str(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class EventBus:
+    def __init__(self, backend: Any, batch_size: int = 256, flush_interval_s: float = 0.02):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: "queue.Queue[Tuple[str, bytes]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    # --- publication ---
+    def emit(self, topic: str, event: Any) -> None:
+        """Encode et met en file ; ne bloque pas, ne lève pas (un événement perdu ne casse pas la requête)."""
+        try:
+            self._queue.put_nowait((topic, encode_event(topic, event)))
+        except Exception as e:
+            self.dropped += 1
+            print(f"[bus] événement ignoré ({topic}): {e}")
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="event-bus", daemon=True)
+                    self._thread.start()
+
+    def _drain(self, first: Tuple[str, bytes]) -> List[Tuple[str, bytes]]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch: List[Tuple[str, bytes]]) -> None:
+        try:
+            self.backend.publish_batch(batch)
+            self.published += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"[bus] échec de publication de {len(batch)} événements: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if self._queue.qsize() < self.batch_size:
+                time.sleep(self.flush_interval_s)  # laisse le lot se remplir
+            self._send(self._drain(first))
+
+    def flush(self) -> None:
+        """Attend que tous les événements émis soient publiés."""
+        self._queue.join()
+
+    # --- consommation ---
+    async def consume(self, topic: str, group: str, consumer: str, handler: Handler,
+                      batch_size: int = 100, poll_s: float = 0.5,
+                      stop: Optional[asyncio.Event] = None) -> None:
+        await self.backend.ensure_group(topic, group)
+        while stop is None or not stop.is_set():
+            entries = await self.backend.fetch(topic, group, consumer, batch_size, poll_s)
+            done = []
+            for msg_id, raw in entries:
+                try:
+                    await handler(decode_event(raw))
+                except Exception as e:
+                    print(f"[bus] handler {group}/{consumer} en échec sur {topic}: {e}")
+                    await self.backend.nack(topic, group, msg_id, raw)
+                else:
+                    done.append(msg_id)
+            await self.backend.ack(topic, group, done)
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def _backend_from_env() -> Any:
+    kind = os.getenv("FORGE_EVENT_BUS", "memory")
+    if kind == "off":
+        return None
+    if kind == "redis":
+        import redis
+        return RedisStreamsBackend(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                                                    socket_timeout=5, socket_connect_timeout=1))
+    return MemoryBackend()
+
+
+def _reset_after_fork() -> None:
+    # Process fils (pool de processus, prefork Celery) : le thread de publication
+    # du parent n'existe plus et la file ou ses verrous ont pu être copiés pris.
+    # Le fils repart d'un bus neuf, créé à sa première émission.
+    global _bus, _bus_lock
+    _bus = None
+    _bus_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_bus() -> Optional[EventBus]:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                backend = _backend_from_env()
+                if backend is None:
+                    return None
+                _bus = EventBus(backend)
+    return _bus
+
+
+def emit(topic: str, event: Any) -> None:
+    bus = get_bus()
+    if bus is not None:
+        bus.emit(topic, event)
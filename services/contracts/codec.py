@@ -0,0 +1,92 @@
+"""
+Codec rapide pour les contrats sur les chemins chauds.
+
+- JSON : msgspec si installé (Structs `MessageStruct` / `ChatResponseStruct`,
+  validation et encodage en une passe), sinon `TypeAdapter` Pydantic
+  précompilés. Dans les deux cas on évite `jsonable_encoder` de FastAPI.
+- msgpack (bus d'événements) : msgspec.msgpack si installé, sinon msgpack.
+
+`scripts/bench_codec.py` compare les débits.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from .models import ChatResponse, Message
+
+try:
+    import msgspec
+except ImportError:  # dépendance optionnelle
+    msgspec = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+MESSAGES_ADAPTER = TypeAdapter(List[Message])
+CHAT_RESPONSE_ADAPTER = TypeAdapter(ChatResponse)
+
+
+def _enc_hook(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", exclude_none=False)
+    raise NotImplementedError(f"type non encodable: {type(obj)!r}")
+
+
+if msgspec is not None:
+    class MessageStruct(msgspec.Struct, kw_only=True):
+        """Miroir de `models.Message` (mêmes champs, même ordre de sérialisation)."""
+        id: Optional[str] = None
+        role: Literal["user", "assistant", "tool"]
+        content: str
+        tool_name: Optional[str] = None
+        created_at: Optional[datetime] = None
+
+    class ChatResponseStruct(msgspec.Struct):
+        messages: List[MessageStruct]
+
+    _json_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+    _chat_decoder = msgspec.json.Decoder(ChatResponseStruct)
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+
+    def encode(obj: Any) -> bytes:
+        """JSON (dict, list, Struct, modèle Pydantic) -> bytes."""
+        return _json_encoder.encode(obj)
+
+    def decode_chat_response(raw: bytes) -> Any:
+        """Valide une réponse de chat du worker ; lève ValueError si invalide."""
+        try:
+            return _chat_decoder.decode(raw)
+        except msgspec.ValidationError as e:
+            raise ValueError(str(e)) from e
+
+    def pack(obj: Any) -> bytes:
+        return _msgpack_encoder.encode(obj)
+
+    def unpack(raw: bytes) -> Any:
+        return _msgpack_decoder.decode(raw)
+else:
+    import json
+
+    import msgpack
+
+    def encode(obj: Any) -> bytes:
+        if isinstance(obj, BaseModel):
+            return obj.model_dump_json().encode("utf-8")
+        return json.dumps(obj, default=_enc_hook, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode_chat_response(raw: bytes) -> Any:
+        return CHAT_RESPONSE_ADAPTER.validate_json(raw)
+
+    def pack(obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def unpack(raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+
+def encode_messages(messages: List[Message]) -> bytes:
+    """Liste de `Message` Pydantic (issue de la base) -> JSON, sérialisée par pydantic-core."""
+    return MESSAGES_ADAPTER.dump_json(messages)
@@ -0,0 +1,173 @@
+"""
+Client HTTP asynchrone partagé API <-> worker.
+
+- un `httpx.AsyncClient` par boucle asyncio : connexions keep-alive réutilisées
+- HTTP/2 si FORGE_HTTP2=1 et le paquet `h2` est installé
+- retries avec backoff exponentiel + jitter (erreurs de connexion, 502/503/504)
+- circuit breaker par hôte : après N échecs consécutifs on échoue tout de suite
+  (`CircuitOpenError`) pendant `reset_timeout_s`, puis une requête d'essai
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(Exception):
+    """Circuit ouvert : l'hôte est considéré indisponible."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # une seule requête d'essai : on réarme le délai pour les suivantes
+                self.opened_at = time.monotonic()
+            return state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("FORGE_HTTP2", "0") != "1":
+        return False
+    try:
+        import h2  # noqa: F401  dépendance optionnelle
+    except ImportError:
+        return False
+    return True
+
+
+class ServiceClient:
+    """Requêtes avec retries et circuit breaker au-dessus d'un AsyncClient poolé."""
+
+    def __init__(self, timeout: float = 5.0, connect_timeout: float = 1.0, retries: int = 2,
+                 backoff_s: float = 0.05, max_connections: int = 100, max_keepalive: int = 20,
+                 failure_threshold: int = 5, reset_timeout_s: float = 10.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=30.0),
+            http2=_http2_enabled(),
+            transport=transport,
+        )
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = httpx.URL(url).netloc.decode("ascii")
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout_s)
+        return self.breakers[host]
+
+    async def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs: Any) -> httpx.Response:
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(url)
+        retries = self.retries if retries is None else retries
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                # requête jamais partie : on peut toujours rejouer ; sinon seulement si idempotente
+                retryable = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)) or idempotent
+                if attempt >= retries or not retryable:
+                    breaker.record_failure()
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= retries or not idempotent:
+                    if resp.status_code in RETRY_STATUSES:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    return resp
+                await resp.aclose()
+            await asyncio.sleep(random.uniform(0, self.backoff_s * (2 ** attempt)))
+            attempt += 1
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Réponse en streaming : circuit breaker, mais pas de retry (le flux a pu commencer)."""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(url)
+        try:
+            async with self.client.stream(method, url, **kwargs) as resp:
+                if resp.status_code in RETRY_STATUSES:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                yield resp
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# Un client par boucle : un AsyncClient ne peut pas servir deux boucles asyncio
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ServiceClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> ServiceClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = ServiceClient()
+    return client
+
+
+async def aclose_client() -> None:
+    """À appeler à l'arrêt de l'application (lifespan / shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -14,6 +14,7 @@ class Conversation(BaseModel):
 
 class Message(BaseModel):
     """Message d'une conversation."""
+    id: Optional[str] = None
     role: Literal['user', 'assistant', 'tool']
     content: str
     tool_name: Optional[str] = None
@@ -36,10 +37,78 @@ class FileInfo(BaseModel):
     size: int
 
 class MemoryUpsert(BaseModel):
-    """Upsert de mémoire (stub)."""
+    """Upsert de mémoire : items {"id"?, "text", "metadata"?}."""
     items: List[Dict[str, Any]]
 
 class MemoryQuery(BaseModel):
-    """Query mémoire (stub)."""
+    """Query mémoire (hybride BM25 + cosinus par défaut, filtres d'égalité sur les métadonnées)."""
     query: str
     top_k: int = 5
+    filters: Optional[Dict[str, Any]] = None
+    mode: Literal["hybrid", "vector", "lexical"] = "hybrid"
+
+class ToolCall(BaseModel):
+    """Appel de tool : nom + arguments (validés contre le schéma du tool)."""
+    name: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+class ToolBatchRequest(BaseModel):
+    """Lot d'appels de tools indépendants, exécutés en parallèle."""
+    calls: List[ToolCall]
+
+class MemoryDelete(BaseModel):
+    """Suppression d'items mémoire par id."""
+    ids: List[str]
+
+class StageInfo(BaseModel):
+    """Exécution d'une étape du pipeline."""
+    stage: str
+    started_at: str
+    finished_at: Optional[str] = None
+    duration_s: Optional[float] = None
+    status: str
+
+class ArtifactInfo(BaseModel):
+    """Artefact d'un run (apk, coverage, critic, verifier, judge, spec, source, logs, other)."""
+    id: str
+    run_id: str
+    path: str
+    type: str
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    kpis: Optional[Any] = None
+    created_at: str
+
+class RunInfo(BaseModel):
+    """Run du pipeline tel qu'indexé (stages/artifacts seulement sur GET /v1/runs/{id})."""
+    id: str
+    created_at: str
+    finished_at: Optional[str] = None
+    status: str
+    decision: Optional[str] = None
+    app_name: Optional[str] = None
+    bundle_id: Optional[str] = None
+    spec_sha256: Optional[str] = None
+    git_sha: Optional[str] = None
+    flutter_version: Optional[str] = None
+    apk_size_bytes: Optional[int] = None
+    apk_sha256: Optional[str] = None
+    coverage: Optional[float] = None
+    lint_errors: Optional[int] = None
+    duration_s: Optional[float] = None
+    stages: Optional[List[StageInfo]] = None
+    artifacts: Optional[List[ArtifactInfo]] = None
+
+class ApkSizePoint(BaseModel):
+    """Taille de l'APK d'un run."""
+    id: str
+    created_at: str
+    apk_size_bytes: int
+
+class SlowStage(BaseModel):
+    """Étape classée par durée."""
+    run_id: str
+    stage: str
+    started_at: str
+    duration_s: float
+    status: str
@@ -0,0 +1,270 @@
+"""
+Index des runs du pipeline : tables `runs`, `stages`, `artifacts`
+(champs recommandés par observability/README.md).
+
+Écrit par le pipeline (worker) au fil des étapes, lu par l'API (/v1/runs...).
+Les requêtes courantes sont des parcours d'index, sans lecture de WORK_DIR :
+- derniers runs, éventuellement par décision       -> runs(created_at), runs(decision, created_at)
+- taille de l'APK dans le temps pour une app         -> runs(app_name, created_at)
+- étapes les plus lentes sur une période             -> stages(started_at)
+
+Postgres si DATABASE_URL pointe vers Postgres, sinon SQLite
+(RUNS_DB_PATH, défaut WORK_DIR/.runs/runs.sqlite3, partagé API/worker en local).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    decision TEXT,
+    app_name TEXT,
+    bundle_id TEXT,
+    spec_sha256 TEXT,
+    git_sha TEXT,
+    flutter_version TEXT,
+    apk_size_bytes INTEGER,
+    apk_sha256 TEXT,
+    coverage REAL,
+    lint_errors INTEGER,
+    duration_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_decision_created ON runs (decision, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_app_created ON runs (app_name, created_at);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    duration_s REAL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_stages_started ON stages (started_at);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size_bytes INTEGER,
+    sha256 TEXT,
+    kpis TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts (run_id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_type_created ON artifacts (type, created_at);
+"""
+
+RUN_COLUMNS = ("id", "created_at", "finished_at", "status", "decision", "app_name", "bundle_id",
+               "spec_sha256", "git_sha", "flutter_version", "apk_size_bytes", "apk_sha256",
+               "coverage", "lint_errors", "duration_s")
+ARTIFACT_COLUMNS = ("id", "run_id", "path", "type", "size_bytes", "sha256", "kpis", "created_at")
+
+SQL_START_RUN = ("INSERT INTO runs (id, created_at, status) VALUES (?, ?, 'running') "
+                 "ON CONFLICT (id) DO UPDATE SET status = 'running', finished_at = NULL")
+SQL_START_STAGE = ("INSERT INTO stages (run_id, stage, started_at, status) VALUES (?, ?, ?, 'running') "
+                   "ON CONFLICT (run_id, stage) DO UPDATE SET started_at = excluded.started_at, "
+                   "finished_at = NULL, duration_s = NULL, status = 'running'")
+SQL_FINISH_STAGE = ("UPDATE stages SET finished_at = ?, duration_s = ?, status = ? "
+                    "WHERE run_id = ? AND stage = ?")
+SQL_FAIL_RUN = "UPDATE runs SET status = 'failed', finished_at = ? WHERE id = ?"
+SQL_FINISH_RUN = ("UPDATE runs SET " + ", ".join(f"{c} = ?" for c in RUN_COLUMNS[2:]) + " WHERE id = ?")
+SQL_DELETE_ARTIFACTS = "DELETE FROM artifacts WHERE run_id = ?"
+SQL_INSERT_ARTIFACT = (f"INSERT INTO artifacts ({', '.join(ARTIFACT_COLUMNS)}) "
+                       f"VALUES ({', '.join('?' for _ in ARTIFACT_COLUMNS)})")
+
+SQL_GET_RUN = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE id = ?"
+SQL_RUN_STAGES = ("SELECT stage, started_at, finished_at, duration_s, status FROM stages "
+                  "WHERE run_id = ? ORDER BY started_at")
+SQL_RUN_ARTIFACTS = f"SELECT {', '.join(ARTIFACT_COLUMNS)} FROM artifacts WHERE run_id = ? ORDER BY path"
+SQL_APK_TREND = ("SELECT id, created_at, apk_size_bytes FROM runs "
+                 "WHERE app_name = ? AND apk_size_bytes IS NOT NULL ORDER BY created_at DESC LIMIT ?")
+SQL_SLOWEST_STAGES = ("SELECT run_id, stage, started_at, duration_s, status FROM stages "
+                      "WHERE started_at >= ? AND duration_s IS NOT NULL ORDER BY duration_s DESC LIMIT ?")
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def recent_runs_query(decision: Optional[str] = None, app_name: Optional[str] = None) -> tuple:
+    """Derniers runs (ordre antéchronologique), filtrés par décision et/ou app."""
+    where, params = [], []
+    if decision:
+        where.append("decision = ?")
+        params.append(decision)
+    if app_name:
+        where.append("app_name = ?")
+        params.append(app_name)
+    clause = f"WHERE {' AND '.join(where)} " if where else ""
+    sql = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs {clause}ORDER BY created_at DESC LIMIT ?"
+    return sql, params
+
+
+class RunRepository(ABC):
+    """Même SQL pour les deux moteurs ; seules l'exécution et la syntaxe des paramètres changent."""
+
+    @abstractmethod
+    def init_schema(self) -> None: ...
+
+    @abstractmethod
+    def _execute(self, statements: Sequence[tuple]) -> None:
+        """Exécute [(sql, params | [params...]), ...] dans une seule transaction."""
+
+    @abstractmethod
+    def _query(self, sql: str, params: Iterable[Any]) -> List[Dict[str, Any]]: ...
+
+    # --- écriture (pipeline) ---
+    def start_run(self, run_id: str) -> None:
+        self._execute([(SQL_START_RUN, (run_id, _now()))])
+
+    def start_stage(self, run_id: str, stage: str) -> None:
+        self._execute([(SQL_START_STAGE, (run_id, stage, _now()))])
+
+    def finish_stage(self, run_id: str, stage: str, duration_s: float, status: str = "ok") -> None:
+        self._execute([(SQL_FINISH_STAGE, (_now(), duration_s, status, run_id, stage))])
+
+    def fail_run(self, run_id: str) -> None:
+        """Run interrompu par une étape qui a levé : ne reste pas `running`."""
+        self._execute([(SQL_FAIL_RUN, (_now(), run_id))])
+
+    def finish_run(self, run: Dict[str, Any], artifacts: List[Dict[str, Any]]) -> None:
+        """Résumé du run et liste complète de ses artefacts (remplace la précédente)."""
+        run = {**run, "finished_at": run.get("finished_at") or _now()}
+        created_at = run["finished_at"]
+        rows = [tuple(json.dumps(a.get("kpis")) if c == "kpis" else a.get(c, created_at if c == "created_at" else None)
+                      for c in ARTIFACT_COLUMNS) for a in artifacts]
+        self._execute([
+            (SQL_FINISH_RUN, tuple(run.get(c) for c in RUN_COLUMNS[2:]) + (run["id"],)),
+            (SQL_DELETE_ARTIFACTS, (run["id"],)),
+            (SQL_INSERT_ARTIFACT, rows),
+        ])
+
+    # --- lecture (API) ---
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(SQL_GET_RUN, (run_id,))
+        if not rows:
+            return None
+        run = rows[0]
+        run["stages"] = self._query(SQL_RUN_STAGES, (run_id,))
+        run["artifacts"] = [{**a, "kpis": json.loads(a["kpis"]) if a["kpis"] else None}
+                            for a in self._query(SQL_RUN_ARTIFACTS, (run_id,))]
+        return run
+
+    def recent_runs(self, limit: int = 100, decision: Optional[str] = None,
+                    app_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql, params = recent_runs_query(decision, app_name)
+        return self._query(sql, (*params, limit))
+
+    def apk_size_trend(self, app_name: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Tailles d'APK d'une app, en ordre chronologique (les `limit` plus récentes)."""
+        return self._query(SQL_APK_TREND, (app_name, limit))[::-1]
+
+    def slowest_stages(self, since: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return self._query(SQL_SLOWEST_STAGES, (since, limit))
+
+
+class SQLiteRunRepository(RunRepository):
+    """Une connexion par thread, journal WAL (écritures du worker, lectures de l'API)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def _execute(self, statements: Sequence[tuple]) -> None:
+        conn = self._conn()
+        with conn:
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+
+    def _query(self, sql: str, params: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._conn().execute(sql, tuple(params)).fetchall()]
+
+
+class PostgresRunRepository(RunRepository):
+    def __init__(self, url: str, min_size: int = 1, max_size: int = 5):
+        from psycopg_pool import ConnectionPool  # dépendance optionnelle
+        self.pool = ConnectionPool(url.replace("postgresql+psycopg://", "postgresql://"),
+                                   min_size=min_size, max_size=max_size, open=True)
+
+    @staticmethod
+    def _pg(sql: str) -> str:
+        return sql.replace("?", "%s")
+
+    def init_schema(self) -> None:
+        with self.pool.connection() as conn:
+            for stmt in SCHEMA.split(";"):
+                if stmt.strip():
+                    conn.execute(stmt)
+
+    def _execute(self, statements: Sequence[tuple]) -> None:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        if params:
+                            cur.executemany(self._pg(sql), params)
+                    else:
+                        cur.execute(self._pg(sql), params, prepare=True)
+
+    def _query(self, sql: str, params: Iterable[Any]) -> List[Dict[str, Any]]:
+        from psycopg.rows import dict_row
+        with self.pool.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                return cur.execute(self._pg(sql), tuple(params), prepare=True).fetchall()
+
+
+_repository: Optional[RunRepository] = None
+_repository_lock = threading.Lock()
+
+
+def default_sqlite_path() -> Path:
+    return Path(os.getenv("RUNS_DB_PATH") or Path(os.getenv("WORK_DIR", "./work")) / ".runs" / "runs.sqlite3")
+
+
+def get_run_repository() -> RunRepository:
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                url = os.getenv("DATABASE_URL", "")
+                repo: RunRepository
+                if url.startswith("postgresql"):
+                    repo = PostgresRunRepository(url)
+                else:
+                    repo = SQLiteRunRepository(default_sqlite_path())
+                repo.init_schema()
+                _repository = repo
+    return _repository
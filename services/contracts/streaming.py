@@ -0,0 +1,29 @@
+"""
+Encodage des flux de chat (worker -> API -> client).
+
+Un événement est `{"event": <nom>, "data": <objet>}` :
+- NDJSON : une ligne JSON par événement (`application/x-ndjson`)
+- SSE    : `event: <nom>` / `data: <json>` (`text/event-stream`)
+Événements : "message" (un Message), "error", "done".
+"""
+import json
+from typing import Any, AsyncIterator, Dict
+
+from .codec import encode
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+
+def encode_ndjson(event: str, data: Any = None) -> bytes:
+    return encode({"event": event, "data": data}) + b"\n"
+
+
+def encode_sse(event: str, data: Any = None) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + encode(data) + b"\n\n"
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, Any]]:
+    async for line in lines:
+        if line.strip():
+            yield json.loads(line)
@@ -1,77 +1,8 @@
-﻿from celery import Celery
-import yaml
-import json
-import os
-import subprocess
-import tempfile
-import shutil
-
-# Configuration Celery
-app = Celery('forge_agi_worker')
-app.conf.update(
-    broker_url='redis://localhost:6379/0',
-    result_backend='redis://localhost:6379/0',
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
-    timezone='UTC',
-    enable_utc=True,
-)
-
-@app.task
-def generate_app_task(spec_content: str, project_name: str = None):
-    """GÃ©nÃ¨re une application Flutter Ã  partir d'une spÃ©cification YAML"""
-    try:
-        # Parser la spÃ©cification
-        spec_data = yaml.safe_load(spec_content)
-        
-        if not project_name:
-            project_name = spec_data.get('app', {}).get('name', 'generated_app').lower()
-        
-        # CrÃ©er un rÃ©pertoire temporaire pour le projet
-        with tempfile.TemporaryDirectory() as temp_dir:
-            project_path = os.path.join(temp_dir, project_name)
-            
-            # CrÃ©er le projet Flutter
-            subprocess.run([
-                'flutter', 'create', '--org', 'com.example', project_name
-            ], cwd=temp_dir, check=True)
-            
-            # GÃ©nÃ©rer le code basÃ© sur la spÃ©cification
-            generate_code_from_spec(spec_data, project_path)
-            
-            # Build de l'APK
-            subprocess.run([
-                'flutter', 'build', 'apk', '--release'
-            ], cwd=project_path, check=True)
-            
-            # TODO: Copier l'APK vers un stockage permanent
-            apk_path = os.path.join(project_path, 'build/app/outputs/flutter-apk/app-release.apk')
-            
-            return {
-                "success": True,
-                "project_name": project_name,
-                "apk_path": apk_path,
-                "message": "Application gÃ©nÃ©rÃ©e avec succÃ¨s"
-            }
-    
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "message": "Erreur lors de la gÃ©nÃ©ration"
-        }
-
-def generate_code_from_spec(spec_data: dict, project_path: str):
-    """GÃ©nÃ¨re le code Flutter basÃ© sur la spÃ©cification"""
-    # TODO: ImplÃ©menter la gÃ©nÃ©ration de code
-    # - GÃ©nÃ©rer les modÃ¨les de donnÃ©es
-    # - GÃ©nÃ©rer les Ã©crans
-    # - GÃ©nÃ©rer la navigation
-    # - Configurer les dÃ©pendances
-    
-    print(f"GÃ©nÃ©ration du code pour le projet: {project_path}")
-    print(f"SpÃ©cification: {spec_data}")
+"""
+Point d'entrée historique `celery -A services.worker.main` : il n'y a qu'une
+application Celery, définie dans worker/main.py (tâches du pipeline par file).
+"""
+from .worker.main import app, run_pipeline_task, submit_pipeline  # noqa: F401
 
 if __name__ == '__main__':
     app.start()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_run_index(monkeypatch):
+    """Pas d'index des runs par défaut : sinon work/.runs/runs.sqlite3 est écrit dans le dépôt."""
+    monkeypatch.setenv("FORGE_RUN_INDEX", "0")
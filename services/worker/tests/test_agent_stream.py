@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.contracts.http_client import ServiceClient
+from worker import agent_loop
+from worker.tool_exec import ToolExecutor
+from worker.http import app
+
+client = TestClient(app)
+
+
+def _api(last_message):
+    def handler(request):
+        return httpx.Response(200, json=[{"role": "user", "content": last_message}])
+    return ServiceClient(transport=httpx.MockTransport(handler))
+
+
+def test_stream_yields_tool_call_then_answer(monkeypatch):
+    monkeypatch.setattr(agent_loop, "get_client", lambda: _api("un café près d'ici ?"))
+    res = client.post("/agent/step/stream", json={"conversation_id": "c1"})
+
+    events = [json.loads(line) for line in res.text.splitlines()]
+    assert [e["event"] for e in events] == ["message", "message", "done"]
+    assert events[0]["data"]["tool_name"] == "restaurant_search"
+    assert "Café de Paris" in events[1]["data"]["content"]
+
+
+def test_step_route_awaits_json_body(monkeypatch):
+    monkeypatch.setattr(agent_loop, "get_client", lambda: _api("bonjour"))
+    res = client.post("/agent/step", json={"conversation_id": "c1"})
+    assert res.status_code == 200
+    assert res.json()["messages"][0]["role"] == "assistant"
+    assert client.post("/agent/step", content=b"pas du json").status_code == 400
+
+
+class _Tool:
+    def __init__(self, name, fail=False):
+        self.name, self.fail = name, fail
+
+    def run(self, args):
+        if self.fail:
+            raise ValueError("arguments refusés")
+        return f"{self.name}: {args['query']}"
+
+
+def test_independent_tool_calls_run_together(monkeypatch):
+    executor = ToolExecutor(registry={"menu": _Tool("menu"), "horaires": _Tool("horaires", fail=True)})
+    monkeypatch.setattr(agent_loop, "get_client", lambda: _api("menu et horaires ?"))
+    monkeypatch.setattr(agent_loop, "get_executor", lambda: executor)
+    monkeypatch.setattr(agent_loop, "plan_tool_calls",
+                        lambda content: [("menu", {"query": content}), ("horaires", {"query": content}),
+                                         ("absent", {})])
+    res = client.post("/agent/step", json={"conversation_id": "c1"})
+
+    messages = res.json()["messages"]
+    # un message par appel lancé (tool inconnu ignoré), une réponse par appel réussi
+    assert [m["tool_name"] for m in messages if m["role"] == "tool"] == ["menu", "horaires"]
+    assert [m["content"] for m in messages if m["role"] == "assistant"] == ["menu: menu et horaires ?"]
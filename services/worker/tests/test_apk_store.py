@@ -0,0 +1,156 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker import apk_store, codegen, logstore
+from worker.apk_store import ApkStore, materialize, source_tree_key
+
+TOOLCHAIN = {"flutter": "3.22.2", "brick": "0.1.0", "build_mode": "debug"}
+
+
+def _make_app(root: Path, main: str = "void main() {}") -> Path:
+    (root / "lib").mkdir(parents=True)
+    (root / "lib" / "main.dart").write_text(main, encoding="utf-8")
+    (root / "pubspec.yaml").write_text("name: demo\n", encoding="utf-8")
+    return root
+
+
+def test_key_ignores_run_dir_and_build_outputs(tmp_path):
+    a = _make_app(tmp_path / "run-a" / "app")
+    b = _make_app(tmp_path / "run-b" / "app")
+    (b / "build").mkdir()
+    (b / "build" / "out.bin").write_bytes(b"x" * 10)
+    (b / "android").mkdir()
+    (b / "android" / "local.properties").write_text("sdk.dir=/opt/android")
+
+    assert source_tree_key(a, TOOLCHAIN) == source_tree_key(b, TOOLCHAIN)
+
+
+def test_key_changes_with_sources_and_toolchain(tmp_path):
+    a = _make_app(tmp_path / "a")
+    b = _make_app(tmp_path / "b", main="void main() { print(1); }")
+
+    assert source_tree_key(a, TOOLCHAIN) != source_tree_key(b, TOOLCHAIN)
+    assert source_tree_key(a, TOOLCHAIN) != source_tree_key(a, {**TOOLCHAIN, "flutter": "3.24.0"})
+
+
+def test_key_ignores_files_rewritten_by_pub_get(tmp_path):
+    a = _make_app(tmp_path / "a")
+    key = source_tree_key(a, TOOLCHAIN)
+    (a / ".flutter-plugins-dependencies").write_text('{"date_created":"2024-01-01 10:00:00"}')
+    (a / ".flutter-plugins").write_text("sqflite=/root/.pub-cache/sqflite/\n")
+    (a / ".packages").write_text("x:lib/\n")
+    (a / ".metadata").write_text("revision: abc\n")
+    assert source_tree_key(a, TOOLCHAIN) == key
+    (a / ".flutter-plugins-dependencies").write_text('{"date_created":"2024-01-02 11:00:00"}')
+    assert source_tree_key(a, TOOLCHAIN) == key
+
+
+def test_toolchain_uses_probed_flutter_version(monkeypatch):
+    monkeypatch.setenv("FLUTTER_VERSION", "3.22.2")
+    monkeypatch.setattr(apk_store, "flutter_version", lambda: "3.24.5+abcdef1234")
+    assert apk_store.toolchain_versions()["flutter"] == "3.24.5+abcdef1234"
+
+
+def test_get_or_build_reuses_stored_apk(tmp_path):
+    store = ApkStore(tmp_path / "store")
+    apk = tmp_path / "app-debug.apk"
+    apk.write_bytes(b"APK")
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"success": True, "apk_path": str(apk)}
+
+    first = store.get_or_build("ab" * 32, build)
+    second = store.get_or_build("ab" * 32, build)
+
+    assert len(calls) == 1
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert Path(second["apk_path"]).read_bytes() == b"APK"
+
+
+def test_get_or_build_coalesces_concurrent_builds(tmp_path):
+    store = ApkStore(tmp_path / "store")
+    apk = tmp_path / "app-debug.apk"
+    apk.write_bytes(b"APK")
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"success": True, "apk_path": str(apk)}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_or_build("cd" * 32, build))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r["success"] for r in results)
+
+
+def test_failed_build_is_not_stored(tmp_path):
+    store = ApkStore(tmp_path / "store")
+    res = store.get_or_build("ef" * 32, lambda: {"success": False, "error": "rc=1", "apk_path": None})
+
+    assert res["success"] is False
+    assert store.get("ef" * 32) is None
+
+
+def test_materialized_artifact_is_a_private_copy(tmp_path):
+    store = ApkStore(tmp_path / "store")
+    apk = tmp_path / "app-release.apk"
+    apk.write_bytes(b"APK-1")
+    res = store.get_or_build("12" * 32, lambda: {"success": True, "apk_path": str(apk), "apk_name": apk.name})
+    cached = store.get_or_build("12" * 32, lambda: pytest.fail("rebuild"))
+    assert cached["apk_name"] == "app-release.apk"
+
+    dest = materialize(Path(res["apk_path"]), tmp_path / "run" / "artifacts", cached["apk_name"])
+    assert not os.path.samefile(dest, res["apk_path"])
+    with open(dest, "wb") as f:  # un run qui réécrit son artefact...
+        f.write(b"corrompu")
+    assert Path(res["apk_path"]).read_bytes() == b"APK-1"  # ...ne touche pas au store
+
+
+def test_docker_build_returns_the_debug_apk_it_just_built(tmp_path, monkeypatch):
+    monkeypatch.setattr(logstore, "WORK_DIR", tmp_path / "work")
+    app = _make_app(tmp_path / "app")
+    outputs = app / "build" / "app" / "outputs" / "flutter-apk"
+    outputs.mkdir(parents=True)
+    (outputs / "app-release.apk").write_bytes(b"vieux release")
+    (outputs / "app-debug.apk").write_bytes(b"vieux debug")
+
+    class Done:
+        ok = True
+
+        def to_dict(self):
+            return {"returncode": 0}
+
+    def fake_build(cmd, **kwargs):
+        assert not (outputs / "app-debug.apk").exists()  # pas de reste d'un build précédent
+        (outputs / "app-debug.apk").write_bytes(b"nouveau debug")
+        return Done()
+
+    monkeypatch.setattr(codegen, "run_supervised", fake_build)
+    res = codegen._docker_build_apk("run-1", app)
+    assert res["apk_name"] == "app-debug.apk"
+    assert Path(res["apk_path"]).read_bytes() == b"nouveau debug"
+
+
+def test_app_mount_uses_host_path_of_work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(codegen, "WORK_DIR", tmp_path / "work")
+    app = tmp_path / "work" / "run-1" / "app"
+    assert codegen._build_cache_args(app)[1] == f"{app.resolve().as_posix()}:{codegen.STABLE_APP_DIR}"
+    # worker en conteneur : le démon Docker de l'hôte ne connaît que le chemin hôte
+    monkeypatch.setattr(codegen, "HOST_WORK_DIR", "/srv/forge/work/")
+    assert codegen._build_cache_args(app)[1] == f"/srv/forge/work/run-1/app:{codegen.STABLE_APP_DIR}"
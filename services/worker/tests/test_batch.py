@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import sys
+
+import click
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker import batch, journal, pipeline, supervisor
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "WORK_DIR", tmp_path / "work")
+    monkeypatch.setattr(supervisor, "WORK_DIR", tmp_path / "work")
+    monkeypatch.setenv("FORGE_RUN_INDEX", "0")
+    monkeypatch.setenv("WORK_DIR", str(tmp_path / "work"))  # process du pool (spawn)
+    return tmp_path / "work"
+
+
+@pytest.fixture
+def specs(tmp_path):
+    d = tmp_path / "specs"
+    d.mkdir()
+    for name in ("a.yaml", "b.yml", "c.json", "notes.txt"):
+        (d / name).write_text("{}", encoding="utf-8")
+    return d
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    calls = []
+
+    def make(name):
+        def fn(state):
+            calls.append((state["run_id"], name))
+            if name == "validate_spec" and "bad" in state["spec_path"]:
+                state["error"] = "Validation de la spécification échouée"
+            state["steps"][name] = {"decision": "accept"} if name == "judge" else {"ok": name}
+            return state
+        return fn
+
+    for name in pipeline.STAGE_ORDER:
+        monkeypatch.setitem(pipeline.STAGES, name, make(name))
+    return calls
+
+
+def test_expand_specs_dir_and_glob(specs):
+    assert batch.expand_specs([str(specs)]) == [str(specs / n) for n in ("a.yaml", "b.yml", "c.json")]
+    assert batch.expand_specs([str(specs / "*.y*ml"), str(specs / "a.yaml")]) == \
+        [str(specs / "a.yaml"), str(specs / "b.yml")]
+    with pytest.raises(click.BadParameter):
+        batch.expand_specs([str(specs / "*.toml")])
+
+
+def test_read_ndjson_paths_and_inline_specs(tmp_path):
+    stream = io.StringIO('{"spec_path": "x.yaml", "run_id": "r1"}\n\n'
+                         '{"spec": {"app": {"name": "A"}}}\n'
+                         '{"app": {"name": "B"}}\n')
+    items = batch.read_ndjson(stream, tmp_path / "spool")
+    assert (items[0].spec_path, items[0].run_id) == ("x.yaml", "r1")
+    assert [i.label for i in items[1:]] == ["stdin:3", "stdin:4"]
+    assert json.loads(open(items[1].spec_path).read()) == {"app": {"name": "A"}}
+    assert json.loads(open(items[2].spec_path).read()) == {"app": {"name": "B"}}
+    with pytest.raises(click.BadParameter):
+        batch.read_ndjson(io.StringIO("[1]\n"), tmp_path / "spool")
+
+
+def test_run_batch_in_process(fake_stages, capsys):
+    items = [batch.BatchItem("ok.yaml", "r-ok"), batch.BatchItem("bad.yaml", "r-bad")]
+    results = batch.run_batch(items, jobs=1)
+    assert [(r["run_id"], r["status"]) for r in results] == [("r-ok", "accept"), ("r-bad", "invalid_spec")]
+    assert set(results[0]["timings"]) == set(pipeline.STAGE_ORDER)
+    assert all(r["duration_s"] >= 0 for r in results)
+    # sortie du pipeline masquée par défaut
+    assert "VALIDATE_SPEC" not in capsys.readouterr().out
+
+
+def test_run_batch_reports_stage_crash(fake_stages, monkeypatch):
+    def boom(state):
+        raise RuntimeError("disque plein")
+    monkeypatch.setitem(pipeline.STAGES, "critic", boom)
+    [result] = batch.run_batch([batch.BatchItem("ok.yaml", "r1")])
+    assert result["status"] == "error" and "disque plein" in result["error"]
+
+
+def test_run_batch_process_pool(tmp_path, monkeypatch):
+    # vrais runs, interrompus à la validation : chaque process du pool garde son validateur.
+    # Les process spawn réimportent `worker` : la racine du worker passe devant services/
+    # (sinon `worker` désigne le paquet services/worker), comme avec PYTHONPATH=/worker.
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(__file__), '..'))
+    items = []
+    for i in range(4):
+        path = tmp_path / f"bad{i}.yaml"
+        path.write_text("app: {name: Incomplet}\n", encoding="utf-8")
+        items.append(batch.BatchItem(str(path), f"run-{i}"))
+    results = batch.run_batch(items, jobs=2)
+    assert [r["run_id"] for r in results] == [f"run-{i}" for i in range(4)]
+    assert {r["status"] for r in results} == {"invalid_spec"}
+    assert os.getpid() not in {r["pid"] for r in results}
+
+
+def test_schema_validator_cached(tmp_path):
+    schema = tmp_path / "schema.json"
+    schema.write_text('{"type": "object", "required": ["app"]}', encoding="utf-8")
+    first = pipeline.schema_validator(str(schema))
+    assert pipeline.schema_validator(str(schema)) is first
+    schema.write_text('{"type": "object", "required": ["app", "meta"]}', encoding="utf-8")
+    assert pipeline.schema_validator(str(schema)) is not first
+
+
+def test_summary_table_lists_every_spec():
+    results = [
+        {"spec": "a.yaml", "run_id": "r" * 36, "status": "accept", "duration_s": 1.5,
+         "timings": {"critic": 0.2, "build_apk": 1.1}, "error": None},
+        {"spec": "b.yaml", "run_id": "s" * 36, "status": "invalid_spec", "duration_s": 0.1,
+         "timings": {}, "error": "Validation de la spécification échouée"},
+    ]
+    table = batch.summary_table(results, wall_s=1.6)
+    assert table.row_count == 2
+    assert "1/2" in table.title
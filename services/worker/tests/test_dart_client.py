@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker.api_contracts import generate_dart_client_stub, infer_endpoints_from_spec, render_openapi
+
+
+def _openapi(entities):
+    return render_openapi(infer_endpoints_from_spec({"data": {"entities": entities}}), entities)
+
+
+USER = {"name": "User", "fields": [{"name": "email", "type": "string"}]}
+ORDER = {"name": "Order", "fields": [{"name": "total", "type": "float"}]}
+
+
+def test_list_endpoints_are_paginated():
+    openapi = _openapi([USER])
+    params = {p["name"] for p in openapi["paths"]["/users"]["get"]["parameters"]}
+    assert params == {"page", "limit", "cursor"}
+    assert not openapi["paths"]["/users"]["post"]["parameters"]
+    assert "next_cursor" in openapi["components"]["schemas"]["UserList"]["properties"]
+
+
+def test_one_file_per_model_and_barrel(tmp_path):
+    result = generate_dart_client_stub(_openapi([USER, ORDER]), tmp_path)
+    lib = tmp_path / "dart_client" / "lib"
+    assert sorted(p.name for p in (lib / "src" / "models").iterdir()) == \
+        ["health_response.dart", "order.dart", "user.dart"]
+    barrel = (lib / "forge_client.dart").read_text(encoding="utf-8")
+    assert "export 'src/models/user.dart';" in barrel and "export 'src/etag_cache.dart';" in barrel
+    client = (lib / "src" / "forge_client.dart").read_text(encoding="utf-8")
+    assert "Future<ResultPage<User>> listUsers(" in client and "Stream<User> streamUsers(" in client
+    assert "If-None-Match" in client and "getManyOrders(" in client
+    assert result["entities_supported"] == ["User", "Order"]
+
+
+def test_regeneration_rewrites_only_changed_files(tmp_path):
+    generate_dart_client_stub(_openapi([USER, ORDER]), tmp_path)
+    assert generate_dart_client_stub(_openapi([USER, ORDER]), tmp_path)["files_written"] == []
+
+    user = {"name": "User", "fields": [{"name": "email", "type": "string"}, {"name": "age", "type": "int"}]}
+    result = generate_dart_client_stub(_openapi([user]), tmp_path)
+    assert set(result["files_written"]) == {
+        "README.md", "lib/forge_client.dart", "lib/src/forge_client.dart", "lib/src/models/user.dart"}
+    assert result["files_removed"] == ["lib/src/models/order.dart"]
+    assert not (tmp_path / "dart_client" / "lib" / "src" / "models" / "order.dart").exists()
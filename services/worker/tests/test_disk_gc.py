@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker.disk_gc import WorkGC
+
+
+def _make_run(work, run_id, build_bytes=1000, artifact_bytes=100, age_s=7200):
+    run = work / run_id
+    (run / "app" / "build").mkdir(parents=True)
+    (run / "app" / "build" / "out.bin").write_bytes(b"b" * build_bytes)
+    (run / "app" / "lib").mkdir()
+    (run / "app" / "lib" / "main.dart").write_bytes(b"s" * 50)
+    (run / "artifacts").mkdir()
+    (run / "artifacts" / "app-debug.apk").write_bytes(b"a" * artifact_bytes)
+    journal = run / "journal.jsonl"
+    journal.write_text("{}\n")
+    past = time.time() - age_s
+    os.utime(journal, (past, past))
+    os.utime(run, (past, past))
+    return run
+
+
+@pytest.fixture
+def work(tmp_path):
+    (tmp_path / ".apk_store" / "ab").mkdir(parents=True)
+    (tmp_path / "uploads" / "tmp").mkdir(parents=True)
+    return tmp_path
+
+
+def test_index_skips_dot_dirs_and_shared_stores(work):
+    _make_run(work, "r1")
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=10)
+    stats = gc.tick()
+    assert stats["runs"] == 1
+    [row] = gc.runs()
+    assert row["run_id"] == "r1"
+    assert row["intermediate_bytes"] == 1000
+    assert row["bytes"] == 1000 + 50 + 100 + 3
+
+
+def test_byte_quota_trims_intermediates_lru_first(work):
+    _make_run(work, "old", age_s=9000)
+    _make_run(work, "mid", age_s=8000)
+    _make_run(work, "new", age_s=7200)
+    gc = WorkGC(work, max_bytes=2500, max_runs=10)
+    stats = gc.tick()
+    assert stats["trimmed"] == ["old"]
+    assert not (work / "old" / "app" / "build").exists()
+    assert (work / "old" / "app" / "lib" / "main.dart").exists()
+    assert (work / "mid" / "app" / "build").exists()
+
+
+def test_artifacts_kept_until_last_resort(work):
+    _make_run(work, "a", age_s=9000)
+    _make_run(work, "b", age_s=8000)
+    gc = WorkGC(work, max_bytes=250, max_runs=10)
+    stats = gc.tick()
+    assert stats["stripped"] == ["a", "b"]
+    assert stats["deleted"] == []
+    assert sorted(p.name for p in (work / "a").iterdir()) == ["artifacts", "journal.jsonl"]
+    assert (work / "a" / "artifacts" / "app-debug.apk").exists()
+
+    gc.max_bytes = 110
+    assert gc.tick()["deleted"] == ["a"]
+    assert not (work / "a").exists() and (work / "b").exists()
+
+
+def test_count_quota_strips_oldest_runs(work):
+    for i in range(4):
+        _make_run(work, f"r{i}", age_s=9000 - i * 100)
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=2)
+    assert gc.tick()["stripped"] == ["r0", "r1"]
+    assert (work / "r2" / "app").exists()
+
+
+def test_stripped_runs_beyond_quota_are_deleted_oldest_first(work):
+    for i in range(5):
+        _make_run(work, f"r{i}", age_s=9000 - i * 100)
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=2, max_stripped_runs=1)
+    stats = gc.tick()
+    assert stats["stripped"] == ["r0", "r1", "r2"]
+    assert stats["deleted"] == ["r0", "r1"]
+    assert not (work / "r1").exists()
+    assert (work / "r2" / "artifacts").exists() and not (work / "r2" / "app").exists()
+    assert [r["run_id"] for r in gc.runs()] == ["r2", "r3", "r4"]
+
+
+def test_recent_runs_are_never_evicted(work):
+    _make_run(work, "busy", age_s=10)
+    gc = WorkGC(work, max_bytes=0, max_runs=0, min_idle_s=3600)
+    stats = gc.tick()
+    assert stats["trimmed"] == stats["stripped"] == stats["deleted"] == []
+    assert (work / "busy" / "app" / "build").exists()
+
+
+def test_scan_is_incremental(work):
+    for i in range(5):
+        _make_run(work, f"r{i}")
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=10, scan_batch=2)
+    assert gc.tick()["scanned"] == 2
+    assert gc.tick()["scanned"] == 2
+    assert gc.tick()["scanned"] == 1
+    assert gc.tick()["scanned"] == 0  # rien n'a bougé
+
+    (work / "r3" / "journal.jsonl").write_text("{}\n{}\n")
+    assert gc.tick()["scanned"] == 1
+
+
+def test_touch_moves_run_to_mru(work):
+    _make_run(work, "a", age_s=9000)
+    _make_run(work, "b", age_s=8000)
+    gc = WorkGC(work, max_bytes=2300, max_runs=10, min_idle_s=60)
+    gc.discover()
+    gc.touch("a", time.time() - 120)
+    assert gc.tick()["trimmed"] == ["b"]
+
+
+def test_uploads_cleanup(work):
+    uploads = work / "uploads"
+    stale = uploads / "tmp" / "tmpabc"
+    stale.write_bytes(b"x")
+    os.utime(stale, (time.time() - 7200,) * 2)
+    fresh = uploads / "tmp" / "tmpdef"
+    fresh.write_bytes(b"x")
+
+    sha = "00" + "f" * 62
+    obj = uploads / "objects" / "00" / sha
+    obj.parent.mkdir(parents=True)
+    obj.write_bytes(b"data")
+    obj.with_suffix(".json").write_text("{}")
+    os.link(obj, uploads / f"{sha}.png")
+    os.utime(obj, (time.time() - 10 ** 6,) * 2)
+
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=10, uploads_ttl_s=86400)
+    assert gc.clean_uploads() == 2
+    assert not stale.exists() and fresh.exists()
+    assert not obj.exists() and not (uploads / f"{sha}.png").exists()
+    assert not obj.with_suffix(".json").exists()
+
+
+def test_strip_keeps_compressed_logs(work):
+    run = _make_run(work, "a")
+    (run / "logs" / "build_apk").mkdir(parents=True)
+    (run / "logs" / "build_apk" / "000000.log.gz").write_bytes(b"z" * 10)
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=10)
+    gc.tick()
+    gc.strip_to_artifacts("a")
+    assert sorted(p.name for p in run.iterdir()) == ["artifacts", "journal.jsonl", "logs"]
+
+
+def test_cache_budget_evicts_lru_entries(work):
+    old, recent = time.time() - 9000, time.time() - 7200
+    for key, ts in (("ab" * 32, old), ("ab" + "cd" * 31, recent)):
+        apk = work / ".apk_store" / "ab" / f"{key}.apk"
+        apk.write_bytes(b"a" * 100)
+        apk.with_suffix(".json").write_text("{}")
+        os.utime(apk, (ts, ts))
+    building = work / ".apk_store" / "ab" / ("ab" + "ef" * 31)
+    building.with_suffix(".apk").write_bytes(b"a" * 100)
+    building.with_suffix(".lock").write_text("")
+    os.utime(building.with_suffix(".apk"), (old - 100, old - 100))
+    scaffold = work / ".scaffold_cache" / "com.forge-app-3.22"
+    (scaffold / "android").mkdir(parents=True)
+    (scaffold / "android" / "build.gradle").write_bytes(b"g" * 100)
+    os.utime(scaffold, (old + 10, old + 10))
+
+    gc = WorkGC(work, max_bytes=10 ** 9, max_runs=10, cache_max_bytes=150, min_idle_s=3600)
+    evicted = gc.tick()["cache_evicted"]
+    # le plus ancien APK puis le squelette ; l'APK en cours de build et le plus récent restent
+    assert evicted == [f"{'ab' * 32}.apk", "com.forge-app-3.22"]
+    assert building.with_suffix(".apk").exists()
+    assert (work / ".apk_store" / "ab" / f"{'ab' + 'cd' * 31}.apk").exists()
+    assert gc.runs() == []  # les caches ne sont pas des runs
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker import journal, pipeline, supervisor
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "WORK_DIR", tmp_path)
+    monkeypatch.setattr(supervisor, "WORK_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def spec(tmp_path):
+    path = tmp_path / "spec.yaml"
+    path.write_text("app: {name: Demo}\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def stages(work_dir, monkeypatch):
+    """Étapes factices : chacune écrit ses sorties déclarées et trace son exécution."""
+    calls = []
+    crash_on = set()
+
+    def make(name):
+        def fn(state):
+            calls.append(name)
+            if name in crash_on:
+                raise Crash(name)
+            run_dir = work_dir / state["run_id"]
+            for rel in pipeline.STAGE_OUTPUTS.get(name, ()):
+                out = run_dir / rel
+                if "." in out.name:
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    out.write_text(f"{name}:{rel}", encoding="utf-8")
+                else:
+                    (out / "lib").mkdir(parents=True, exist_ok=True)
+                    (out / "lib" / "main.dart").write_text(name, encoding="utf-8")
+            if name == "validate_spec":
+                state["spec_data"] = {"app": {"name": "Demo"}}
+            state["steps"][name] = {"decision": "accept"} if name == "judge" else {"ok": name}
+            return state
+        return fn
+
+    for name in pipeline.STAGE_ORDER:
+        monkeypatch.setitem(pipeline.STAGES, name, make(name))
+    return calls, crash_on
+
+
+def test_crash_then_resume_at_first_incomplete_stage(work_dir, spec, stages):
+    calls, crash_on = stages
+    crash_on.add("build_apk")
+    with pytest.raises(Crash):
+        pipeline.run_pipeline("r1", str(spec))
+    crash_on.clear()
+    calls.clear()
+
+    out = pipeline.run_pipeline("r1", str(spec))
+    assert calls == ["build_apk", "static_checks_stub", "tests_stub", "package", "judge"]
+    assert out["success"] is True
+    assert out["steps"]["codegen_stub"] == {"ok": "codegen_stub"}  # rejoué depuis le journal
+
+    events = [json.loads(line) for line in (work_dir / "r1" / "journal.jsonl").read_text().splitlines()]
+    assert events[0]["event"] == "run"
+    assert any(e["event"] == "fail" and e["stage"] == "build_apk" for e in events)
+
+
+def test_completed_run_is_not_recomputed(spec, stages):
+    calls, _ = stages
+    first = pipeline.run_pipeline("r2", str(spec))
+    calls.clear()
+    assert pipeline.run_pipeline("r2", str(spec)) == first
+    assert calls == []
+
+
+def test_pub_get_rewrites_do_not_invalidate_codegen(work_dir, spec, stages):
+    calls, _ = stages
+    pipeline.run_pipeline("r2b", str(spec))
+    app = work_dir / "r2b" / "app"
+    # ce que « flutter pub get » réécrit dans app/ pendant build_apk
+    (app / ".flutter-plugins-dependencies").write_text('{"date_created": "now"}', encoding="utf-8")
+    (app / ".metadata").write_text("revision: abc\n", encoding="utf-8")
+    calls.clear()
+    pipeline.run_pipeline("r2b", str(spec))
+    assert calls == []
+
+
+def test_tampered_output_reruns_stage_and_downstream(work_dir, spec, stages):
+    calls, _ = stages
+    pipeline.run_pipeline("r3", str(spec))
+    calls.clear()
+    (work_dir / "r3" / "artifacts" / "openapi.yaml").write_text("modifié", encoding="utf-8")
+    pipeline.run_pipeline("r3", str(spec))
+    assert calls == ["api_contracts", "offline_repo", "codegen_stub", "build_apk", "static_checks_stub", "tests_stub",
+                     "package", "judge"]
+
+
+def test_changed_spec_restarts_from_scratch(spec, stages):
+    calls, _ = stages
+    pipeline.run_pipeline("r4", str(spec))
+    calls.clear()
+    spec.write_text("app: {name: Autre}\n", encoding="utf-8")
+    pipeline.run_pipeline("r4", str(spec))
+    assert calls == list(pipeline.STAGE_ORDER)
+
+
+def test_no_resume_recomputes(spec, stages):
+    calls, _ = stages
+    pipeline.run_pipeline("r5", str(spec))
+    calls.clear()
+    pipeline.run_pipeline("r5", str(spec), resume=False)
+    assert calls == list(pipeline.STAGE_ORDER)
+
+
+def test_torn_last_line_is_ignored(work_dir, spec, stages):
+    calls, crash_on = stages
+    crash_on.add("package")
+    with pytest.raises(Crash):
+        pipeline.run_pipeline("r6", str(spec))
+    with open(work_dir / "r6" / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"event": "finish", "stage": "pack')
+    crash_on.clear()
+    calls.clear()
+    pipeline.run_pipeline("r6", str(spec))
+    assert calls == ["package", "judge"]
+
+
+def test_resume_clears_stale_cancel_marker(work_dir, spec, stages):
+    _, crash_on = stages
+    crash_on.add("build_apk")
+    with pytest.raises(Crash):
+        pipeline.run_pipeline("r7", str(spec))
+    supervisor.cancel_run("r7")
+    assert supervisor.is_cancel_requested("r7")
+    crash_on.clear()
+    pipeline.run_pipeline("r7", str(spec))
+    assert not supervisor.is_cancel_requested("r7")
+
+
+def test_pipeline_feeds_run_index(tmp_path, spec, stages, monkeypatch):
+    from services.contracts import runs
+    repo = runs.SQLiteRunRepository(tmp_path / "runs.sqlite3")
+    repo.init_schema()
+    monkeypatch.setattr(runs, "_repository", repo)
+    monkeypatch.setenv("FORGE_RUN_INDEX", "1")
+    monkeypatch.setenv("WORK_DIR", str(tmp_path))
+    calls, crash_on = stages
+    crash_on.add("package")
+    with pytest.raises(Crash):
+        pipeline.run_pipeline("r8", str(spec))
+    assert repo.get_run("r8")["status"] == "failed"
+    assert {s["stage"]: s["status"] for s in repo.get_run("r8")["stages"]}["package"] == "failed"
+    crash_on.clear()
+    pipeline.run_pipeline("r8", str(spec))
+
+    run = repo.get_run("r8")
+    assert run["status"] == run["decision"] == "accept"
+    assert run["app_name"] == "Demo"
+    assert run["spec_sha256"] == pipeline.spec_digest(str(spec))
+    assert {s["stage"]: s["status"] for s in run["stages"]}["package"] == "ok"
+    assert len(run["stages"]) == len(pipeline.STAGE_ORDER)
+    arts = {a["path"]: a for a in run["artifacts"]}
+    assert arts["artifacts/app-debug.apk"]["type"] == "apk"
+    assert arts["artifacts/judge_report.json"]["kpis"] == {"decision": "accept"}
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker.logstore import LogReader, LogWriter
+
+
+def _fill(writer, n):
+    for i in range(n):
+        writer.write(f"line {i}")
+
+
+def test_rotation_compresses_segments_and_indexes_lines(tmp_path):
+    log_dir = tmp_path / "build_apk"
+    with LogWriter(log_dir, segment_bytes=2000, codec="gzip", checkpoint_lines=10) as w:
+        _fill(w, 1000)
+        ref = w.ref()
+
+    files = sorted(p.name for p in log_dir.iterdir())
+    assert all(f.endswith(".gz") or f == "index.json" for f in files)
+    assert ref["lines"] == 1000
+    assert ref["segments"] > 1
+
+    reader = LogReader(log_dir)
+    assert reader.read_lines(0, 3) == ["line 0", "line 1", "line 2"]
+    assert reader.read_lines(495, 10) == [f"line {i}" for i in range(495, 505)]
+    assert reader.stats()["closed"] is True
+
+
+def test_byte_range_spans_segments(tmp_path):
+    with LogWriter(tmp_path / "log", segment_bytes=100, codec="gzip") as w:
+        _fill(w, 50)
+    expected = "".join(f"line {i}\n" for i in range(50)).encode()
+
+    reader = LogReader(tmp_path / "log")
+    assert reader.read_bytes(0, len(expected)) == expected
+    assert reader.read_bytes(95, 30) == expected[95:125]
+
+
+def test_tail_reads_active_segment_while_writing(tmp_path):
+    w = LogWriter(tmp_path / "log", segment_bytes=10_000, codec="gzip")
+    _fill(w, 20)
+
+    start, lines = LogReader(tmp_path / "log").tail(5)
+    assert start == 15
+    assert lines == [f"line {i}" for i in range(15, 20)]
+    w.close()
+
+
+def test_follow_streams_until_close(tmp_path):
+    w = LogWriter(tmp_path / "log", segment_bytes=200, codec="gzip")
+    w.write("first")
+    reader = LogReader(tmp_path / "log")
+
+    def produce():
+        for i in range(30):
+            w.write(f"more {i}")
+            time.sleep(0.005)
+        w.close()
+
+    t = threading.Thread(target=produce)
+    t.start()
+    got = list(reader.follow(start=0, poll_s=0.01, timeout_s=10))
+    t.join()
+
+    assert got[0] == "first"
+    assert got[1:] == [f"more {i}" for i in range(30)]
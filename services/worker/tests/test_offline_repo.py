@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker import pipeline
+from worker.api_contracts import infer_endpoints_from_spec, render_openapi
+from worker.db_schema import infer_entities_from_spec, render_sql
+from worker.offline_repo import (field_columns, install_offline_layer, render_offline_layer, sql_statements,
+                                 write_offline_layer)
+
+SPEC = {"data": {"entities": [
+    {"name": "User", "fields": [{"name": "Full Name", "type": "string"}, {"name": "active", "type": "bool"}]},
+    {"name": "Tag", "fields": []},
+]}}
+
+
+def _layer():
+    entities = infer_entities_from_spec(SPEC)
+    openapi = render_openapi(infer_endpoints_from_spec(SPEC), SPEC["data"]["entities"])
+    return render_offline_layer(entities, render_sql(entities), openapi)
+
+
+def test_sql_statements_strip_comments():
+    sql = "-- entête\nCREATE TABLE a (\n    x TEXT NOT NULL\n);\n\n-- note\nALTER TABLE a ADD COLUMN y_id INTEGER;\n"
+    assert sql_statements(sql) == ["CREATE TABLE a (\n    x TEXT NOT NULL\n)", "ALTER TABLE a ADD COLUMN y_id INTEGER"]
+
+
+def test_layer_built_from_db_schema_and_list_endpoints():
+    files = _layer()
+    assert sorted(files) == ["lib/data/local_db.dart", "lib/data/offline_repository.dart", "lib/data/outbox.dart",
+                             "lib/data/repositories.dart", "lib/data/schema.dart"]
+    assert "CREATE TABLE user (" in files["lib/data/schema.dart"]
+    assert "const cachedTables = <String>[\n  'user',\n]" in files["lib/data/schema.dart"]
+    repos = files["lib/data/repositories.dart"]
+    assert "table: 'user', fields: const {'Full Name': 'full_name', 'active': 'active'}" in repos
+    assert "boolFields: const {'active'}, path: '/users'" in repos
+    assert "final OfflineRepository user;" in repos and "tag" not in repos
+    # rendu déterministe : une régénération ne réécrit rien
+    assert _layer()["lib/data/schema.dart"] == files["lib/data/schema.dart"]
+
+
+def test_camel_case_fields_round_trip_between_api_and_sqlite():
+    # resa.yaml : partySize côté API, partysize NOT NULL côté SQLite
+    spec = {"data": {"entities": [{"name": "Booking", "fields": [
+        {"name": "userId", "type": "string"}, {"name": "partySize", "type": "int"}]}]}}
+    [entity] = infer_entities_from_spec(spec)
+    mapping = field_columns(entity)
+    api_props = render_openapi(infer_endpoints_from_spec(spec), spec["data"]["entities"])[
+        "components"]["schemas"]["Booking"]["properties"]
+    [create] = sql_statements(render_sql([entity]))
+    assert set(mapping) == set(api_props)
+    assert all(f"    {column} " in create for column in mapping.values())
+    # API -> ligne -> API : aucune clé perdue
+    item = {"id": "b1", "userId": "u1", "partySize": 4}
+    row = {mapping[k]: v for k, v in item.items() if k in mapping}
+    assert row == {"userid": "u1", "partysize": 4}
+    assert {k: row[c] for k, c in mapping.items()} == {"userId": "u1", "partySize": 4}
+    repos = render_offline_layer([entity], render_sql([entity]), {})["lib/data/repositories.dart"]
+    assert "fields: const {'userId': 'userid', 'partySize': 'partysize'}" in repos
+
+
+def test_sync_is_a_full_refresh_not_a_stored_cursor():
+    files = _layer()
+    # next_cursor pagine un parcours ; il n'est pas gardé d'une sync à l'autre
+    assert "cursor TEXT" not in files["lib/data/local_db.dart"]
+    repo = files["lib/data/offline_repository.dart"]
+    assert "'_seen': mark" in repo
+    assert "_dirty = 0 AND (_seen IS NULL OR _seen != ?)" in repo
+
+
+def test_written_to_artifacts_then_installed_in_app(tmp_path):
+    run_path, app_dir = tmp_path / "run", tmp_path / "run" / "app"
+    (app_dir / "lib" / "data").mkdir(parents=True)
+    (app_dir / "lib" / "data" / "stale.dart").write_text("", encoding="utf-8")
+    assert install_offline_layer(run_path, app_dir) is None
+
+    result = write_offline_layer(run_path, _layer())
+    assert len(result["files_written"]) == 5
+    assert write_offline_layer(run_path, _layer())["files_written"] == []
+    installed = install_offline_layer(run_path, app_dir)
+    assert installed == sorted(result["files_created"])
+    assert not (app_dir / "lib" / "data" / "stale.dart").exists()
+
+
+def test_offline_stage_runs_before_codegen():
+    order = pipeline.STAGE_ORDER
+    assert order.index("api_contracts") < order.index("offline_repo") < order.index("codegen_stub")
+    assert "offline_repo" in pipeline.SPEC_STAGES and "offline_repo" in pipeline.STEP_KEYS
+    assert pipeline.STAGE_OUTPUTS["offline_repo"] == ("artifacts/offline_repo",)
@@ -0,0 +1,43 @@
+import os
+import re
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+WORKER_ROOT = os.path.join(os.path.dirname(__file__), '..')
+REPO_ROOT = os.path.join(WORKER_ROOT, '..', '..')
+# comme en déploiement (worker:racine du dépôt) : le paquet services est importable
+PYTHONPATH = os.pathsep.join([WORKER_ROOT, REPO_ROOT])
+HEAVY = ("rich", "click", "jsonschema", "yaml", "worker.codegen", "asyncio", "pydantic", "msgspec")
+# ~120 ms avec les imports en tête de module, ~15 ms différés : le seuil laisse
+# de la marge aux machines lentes mais casse si un import lourd revient
+IMPORT_BUDGET_US = 60_000
+
+
+def _importtime(module: str):
+    env = dict(os.environ, PYTHONPATH=PYTHONPATH)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys, {module}; print(*sys.modules, sep=chr(10))"],
+        cwd=WORKER_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if m and not m.group(2):
+            cumulative[m.group(3)] = int(m.group(1))
+    return set(proc.stdout.split()), cumulative
+
+
+def test_pipeline_import_is_cold_start_cheap():
+    modules, cumulative = _importtime("worker.pipeline")
+    assert not [m for m in HEAVY if m in modules]
+    assert cumulative["worker.pipeline"] < IMPORT_BUDGET_US, cumulative["worker.pipeline"]
+
+
+def test_cli_still_available():
+    from worker import pipeline
+    assert pipeline.cli.name == "cli"
+    out = subprocess.run([sys.executable, "-m", "worker.pipeline", "--help"], cwd=WORKER_ROOT,
+                         env=dict(os.environ, PYTHONPATH=PYTHONPATH), capture_output=True, text=True)
+    assert out.returncode == 0 and "--spec" in out.stdout
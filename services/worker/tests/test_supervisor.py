@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from worker import supervisor
+from worker.supervisor import cancel_run, run_supervised
+
+PY = sys.executable
+
+
+@pytest.fixture(autouse=True)
+def _work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(supervisor, "WORK_DIR", tmp_path / "work")
+
+
+def test_streams_both_pipes_to_log_and_subscribers(tmp_path):
+    lines = []
+    log = tmp_path / "out.log"
+    res = run_supervised(
+        [PY, "-c", "import sys; print('out'); print('err', file=sys.stderr)"],
+        log_file=log,
+        subscribers=[lambda stream, line: lines.append((stream, line.strip()))],
+        echo=False,
+    )
+
+    assert res.ok
+    assert ("stdout", "out") in lines
+    assert ("stderr", "err") in lines
+    content = log.read_text(encoding="utf-8")
+    assert "out" in content and "err" in content and "[exit] rc=0" in content
+
+
+def test_nonzero_exit_code_and_rusage():
+    res = run_supervised([PY, "-c", "import sys; sys.exit(3)"], echo=False)
+
+    assert res.returncode == 3
+    assert not res.ok
+    if hasattr(os, "wait4"):
+        assert "max_rss_kb" in res.rusage
+
+
+def test_idle_timeout_kills_silent_process_group():
+    # le process parent lance un petit-enfant silencieux : tout le groupe doit partir
+    script = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); time.sleep(60)"
+    start = time.monotonic()
+    res = run_supervised([PY, "-c", script], idle_timeout_s=0.5, wall_timeout_s=30, echo=False)
+
+    assert res.timed_out == "idle"
+    assert time.monotonic() - start < 15
+
+
+def test_wall_timeout_even_when_process_keeps_talking():
+    script = "import time\nwhile True:\n    print('tick', flush=True)\n    time.sleep(0.05)"
+    res = run_supervised([PY, "-c", script], wall_timeout_s=0.5, idle_timeout_s=30, echo=False)
+
+    assert res.timed_out == "wall"
+
+
+def test_cancel_from_another_thread():
+    result = {}
+
+    def target():
+        result["res"] = run_supervised([PY, "-c", "import time; time.sleep(60)"], run_id="run-1", echo=False)
+
+    t = threading.Thread(target=target)
+    t.start()
+    time.sleep(0.5)
+    cancel_run("run-1")
+    t.join(timeout=15)
+
+    assert result["res"].cancelled
+
+
+def test_served_app_exposes_cancel_and_log_routes():
+    # uvicorn sert worker.app:app : les routes de worker/http.py doivent y être
+    from worker.app import app
+    paths = {route.path for route in app.routes}
+    assert {"/health", "/runs/{run_id}/cancel", "/runs/{run_id}/logs/{name}",
+            "/runs/{run_id}/logs/{name}/follow"} <= paths
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("FORGE_CELERY_EAGER", "1")
+
+from worker import journal, main, pipeline, supervisor
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "WORK_DIR", tmp_path)
+    monkeypatch.setattr(supervisor, "WORK_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    """Remplace les étapes par des fonctions qui tracent leur exécution."""
+    calls = []
+
+    def make(name):
+        def fn(state):
+            calls.append(name)
+            if name == "validate_spec" and state["spec_path"].endswith("bad.yaml"):
+                state["error"] = "Validation de la spécification échouée"
+            state["steps"][name] = {"decision": "accept"} if name == "judge" else {"ok": name}
+            return state
+        return fn
+
+    for name in pipeline.STAGE_ORDER:
+        monkeypatch.setitem(pipeline.STAGES, name, make(name))
+    return calls
+
+
+def test_eager_mode_enabled():
+    assert main.EAGER and main.app.conf.task_always_eager
+
+
+def test_build_routed_to_build_queue():
+    router = main.app.amqp.router
+    assert router.route({}, "pipeline.build")["queue"].name == "build"
+    for name in ("pipeline.spec", "pipeline.checks", "pipeline.finalize", "run_pipeline"):
+        assert router.route({}, name)["queue"].name == "spec"
+
+
+def test_per_queue_prefetch():
+    assert "--prefetch-multiplier=1" in main.worker_argv("build")
+    assert main.worker_argv("spec")[main.worker_argv("spec").index("-Q") + 1] == "spec"
+
+
+def test_pipeline_runs_all_stages_through_chord(fake_stages):
+    res = main.submit_pipeline("run-chord", "spec.yaml")
+    assert res.id == "run-chord:finalize"
+    out = res.get()
+    assert out["success"] is True
+    assert set(out["steps"]) == set(pipeline.STEP_KEYS)
+    assert sorted(fake_stages) == sorted(pipeline.STAGE_ORDER)
+    assert fake_stages[:len(pipeline.SPEC_STAGES)] == list(pipeline.SPEC_STAGES)
+    assert fake_stages[-2:] == list(pipeline.FINALIZE_STAGES)
+
+
+def test_resubmitted_run_is_idempotent(fake_stages):
+    first = main.submit_pipeline("run-idem", "spec.yaml").get()
+    count = len(fake_stages)
+    second = main.submit_pipeline("run-idem", "spec.yaml").get()
+    assert len(fake_stages) == count
+    assert second == first
+
+
+def test_resubmit_without_resume_recomputes(fake_stages):
+    main.submit_pipeline("run-fresh", "spec.yaml").get()
+    fake_stages.clear()
+    main.submit_pipeline("run-fresh", "spec.yaml", resume=False).get()
+    assert sorted(fake_stages) == sorted(pipeline.STAGE_ORDER)
+
+
+def test_changed_spec_is_not_served_from_stored_results(fake_stages, tmp_path):
+    spec = tmp_path / "spec.yaml"
+    spec.write_text("app: {name: A}\n", encoding="utf-8")
+    main.submit_pipeline("run-spec", str(spec)).get()
+    spec.write_text("app: {name: B}\n", encoding="utf-8")
+    fake_stages.clear()
+    main.submit_pipeline("run-spec", str(spec)).get()
+    assert sorted(fake_stages) == sorted(pipeline.STAGE_ORDER)
+
+
+def test_invalid_spec_stops_after_validation(fake_stages):
+    out = main.submit_pipeline("run-bad", "bad.yaml").get()
+    assert out["error"] == "Validation de la spécification échouée"
+    assert fake_stages == ["validate_spec"]
+
+
+def test_run_pipeline_inprocess_matches_celery(fake_stages):
+    out = pipeline.run_pipeline("run-local", "spec.yaml")
+    assert fake_stages == list(pipeline.STAGE_ORDER)
+    assert list(out["steps"]) == list(pipeline.STEP_KEYS)
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.contracts.http_client import ServiceClient
+from worker.tool_exec import ToolError, ToolExecutor
+from worker.tool_iface import Tool
+
+
+class SlowEcho(Tool):
+    name = "echo"
+    schema = {"type": "object"}
+
+    def run(self, args: dict):
+        time.sleep(0.2)
+        return args
+
+
+def test_inprocess_registry_skips_http():
+    def handler(request):
+        raise AssertionError("aucun appel HTTP attendu")
+
+    async def go():
+        ex = ToolExecutor(registry={"echo": SlowEcho()}, client=ServiceClient(transport=httpx.MockTransport(handler)))
+        assert await ex.list_tools() == ["echo"]
+        start = time.perf_counter()
+        results = await ex.invoke_many([("echo", {"i": i}) for i in range(5)])
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(go())
+    assert results == [{"i": i} for i in range(5)]
+    assert elapsed < 0.8  # 5 appels de 0.2s en parallèle
+
+
+def test_http_fallback_caches_tool_list():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/v1/tools":
+            return httpx.Response(200, json=["restaurant_search"])
+        if request.url.path == "/v1/tools/restaurant_search/invoke":
+            return httpx.Response(200, json={"result": ["Café de Paris"]})
+        return httpx.Response(404)
+
+    async def go():
+        ex = ToolExecutor("http://api", registry={}, ttl_s=60,
+                          client=ServiceClient(transport=httpx.MockTransport(handler)))
+        for _ in range(3):
+            assert await ex.list_tools() == ["restaurant_search"]
+        result = await ex.invoke("restaurant_search", {"query": "café"})
+        missing = await ex.invoke_many([("nope", {})])
+        return result, missing
+
+    result, missing = asyncio.run(go())
+    assert result == ["Café de Paris"]
+    assert isinstance(missing[0], ToolError)
+    assert calls.count("/v1/tools") == 1
@@ -1,28 +1,58 @@
-import requests
+import os
+from typing import AsyncIterator, List
+import httpx
+from services.contracts.http_client import CircuitOpenError, get_client
 from services.contracts.models import Message
+from .tool_exec import ToolCall, get_executor
 
-def agent_step(conversation_id: str) -> list[dict]:
-    api_url = "http://api:8080/v1/conversations/" + conversation_id
+API_URL = os.getenv("API_BASE_URL", "http://api:8080")
+
+TOOL_LABELS = {"restaurant_search": "Recherche de restaurants"}
+
+def plan_tool_calls(content: str) -> List[ToolCall]:
+    """Tools à appeler pour ce message ; indépendants les uns des autres."""
+    calls: List[ToolCall] = []
+    if any(word in content.lower() for word in ["café", "restaurant"]):
+        calls.append(("restaurant_search", {"query": content}))
+    return calls
+
+async def agent_stream(conversation_id: str) -> AsyncIterator[dict]:
+    """Produit les messages de l'agent un par un, dès qu'ils sont prêts."""
+    client = get_client()
+    # page la plus récente : le dernier message est celui à traiter
+    api_url = API_URL + "/v1/conversations/" + conversation_id + "?direction=backward&limit=20"
     try:
-        resp = requests.get(api_url, timeout=2)
+        resp = await client.get(api_url)
         if resp.status_code != 200:
-            return []
+            return
         messages = resp.json()
-    except Exception:
-        return []
+    except (httpx.HTTPError, CircuitOpenError, ValueError):
+        return
     if not messages:
-        return []
-    last_msg = messages[-1]
-    content = last_msg.get("content", "")
-    if any(word in content.lower() for word in ["café", "restaurant"]):
-        # Tool call
-        tool_call = Message(role="tool", content="Recherche de restaurants", tool_name="restaurant_search")
-        # Appel du tool (stub: GET tools, pas d'invoke direct)
-        tools = requests.get("http://api:8080/v1/tools").json()
-        if "restaurant_search" in tools:
-            tool_result = requests.post("http://api:8080/v1/tools/restaurant_search/invoke", json={"query": content}).json()
-            assistant_msg = Message(role="assistant", content=str(tool_result["result"]))
-            return [tool_call.model_dump(), assistant_msg.model_dump()]
+        return
+    content = messages[-1].get("content", "")
+    calls = plan_tool_calls(content)
+    if calls:
+        # Appels de tools : en process si le registre est disponible, sinon via l'API
+        executor = get_executor()
+        try:
+            available = set(await executor.list_tools())
+        except (httpx.HTTPError, CircuitOpenError):
+            available = set()
+        calls = [(name, args) for name, args in calls if name in available]
+        if calls:
+            # le client voit les appels de tools avant que les résultats n'arrivent
+            for name, _ in calls:
+                yield Message(role="tool", content=TOOL_LABELS.get(name, name), tool_name=name).model_dump()
+            # appels indépendants : exécutés en parallèle, un échec n'annule pas les autres
+            results = await executor.invoke_many(calls, conversation_id)
+            answers = [r for r in results if not isinstance(r, Exception)]
+            for result in answers:
+                yield Message(role="assistant", content=str(result)).model_dump()
+            if answers:
+                return
     # Sinon, réponse simple
-    assistant_msg = Message(role="assistant", content="Je peux chercher des cafés si tu veux.")
-    return [assistant_msg.model_dump()]
+    yield Message(role="assistant", content="Je peux chercher des cafés si tu veux.").model_dump()
+
+async def agent_step(conversation_id: str) -> list[dict]:
+    return [m async for m in agent_stream(conversation_id)]
@@ -1,8 +1,20 @@
+import copy
 import json
+import re
 import yaml
 from pathlib import Path
 from typing import Dict, Any, List
 
+LIST_QUERY_PARAMS = [
+    {"name": "page", "in": "query", "required": False,
+     "schema": {"type": "integer", "minimum": 1, "default": 1}, "description": "Numéro de page"},
+    {"name": "limit", "in": "query", "required": False,
+     "schema": {"type": "integer", "minimum": 1, "maximum": 200, "default": 50},
+     "description": "Éléments par page"},
+    {"name": "cursor", "in": "query", "required": False,
+     "schema": {"type": "string"}, "description": "Curseur opaque renvoyé dans next_cursor"},
+]
+
 
 def infer_endpoints_from_spec(spec: dict) -> List[Dict[str, Any]]:
     """
@@ -159,7 +171,8 @@ def render_openapi(endpoints: List[Dict[str, Any]], entities: List[Dict[str, Any
                 },
                 "total": {"type": "integer"},
                 "page": {"type": "integer"},
-                "limit": {"type": "integer"}
+                "limit": {"type": "integer"},
+                "next_cursor": {"type": ["string", "null"]}
             },
             "required": ["data", "total"]
         }
@@ -183,6 +196,9 @@ def render_openapi(endpoints: List[Dict[str, Any]], entities: List[Dict[str, Any
                 "schema": {"type": "string"},
                 "description": "Identifiant unique"
             })
+        elif endpoint.get("entity") and method == "get":
+            # Liste paginée : par page/limit, ou par curseur (next_cursor de la page précédente)
+            path_params.extend(copy.deepcopy(LIST_QUERY_PARAMS))  # pas d'alias YAML
         
         # Réponses par défaut
         responses = {
@@ -322,22 +338,10 @@ def write_artifacts(run_path: Path, openapi: dict) -> Dict[str, Any]:
     }
 
 
-def generate_dart_client_stub(openapi: dict, out_dir: Path) -> Dict[str, Any]:
-    """
-    Génère le client Dart stub à partir de la spécification OpenAPI.
-    
-    Args:
-        openapi: Spécification OpenAPI
-        out_dir: Dossier de sortie (artifacts/dart_client)
-        
-    Returns:
-        Dictionnaire avec le résumé des fichiers créés
-    """
-    dart_client_dir = out_dir / "dart_client"
-    dart_client_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 1. pubspec.yaml
-    pubspec_content = """name: forge_client
+DART_HEADER = "// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.\n"
+SYSTEM_SCHEMAS = ("Error", "HealthResponse")
+
+DART_PUBSPEC = """name: forge_client
 description: Client Dart généré automatiquement par Forge AGI
 version: 1.0.0
 publish_to: none
@@ -354,164 +358,182 @@ dev_dependencies:
   json_serializable: ^6.8.0
   test: ^1.24.0
 """
-    
-    pubspec_path = dart_client_dir / "pubspec.yaml"
-    with open(pubspec_path, 'w', encoding='utf-8') as f:
-        f.write(pubspec_content)
-    
-    # 2. lib/forge_client.dart
-    lib_dir = dart_client_dir / "lib"
-    lib_dir.mkdir(exist_ok=True)
-    
-    # Générer les modèles Dart
-    models = []
-    for schema_name, schema in openapi.get("components", {}).get("schemas", {}).items():
-        if schema_name in ["Error", "HealthResponse"]:
-            continue  # Modèles système
-            
-        if "properties" in schema:
-            model_class = f"""class {schema_name} {{
-  {schema_name}({{
-"""
-            
-            # Propriétés
-            for prop_name, prop_schema in schema.get("properties", {}).items():
-                dart_type = "String"
-                if prop_schema.get("type") == "integer":
-                    dart_type = "int"
-                elif prop_schema.get("type") == "number":
-                    dart_type = "double"
-                elif prop_schema.get("type") == "boolean":
-                    dart_type = "bool"
-                
-                model_class += f"    required this.{prop_name},\n"
-            
-            model_class += "  });\n\n"
-            
-            # Déclaration des propriétés
-            for prop_name, prop_schema in schema.get("properties", {}).items():
-                dart_type = "String"
-                if prop_schema.get("type") == "integer":
-                    dart_type = "int"
-                elif prop_schema.get("type") == "number":
-                    dart_type = "double"
-                elif prop_schema.get("type") == "boolean":
-                    dart_type = "bool"
-                
-                model_class += f"  final {dart_type} {prop_name};\n"
-            
-            # Factory fromJson
-            model_class += f"""
-  factory {schema_name}.fromJson(Map<String, dynamic> json) {{
-    return {schema_name}(
-"""
-            
-            for prop_name, prop_schema in schema.get("properties", {}).items():
-                dart_type = "String"
-                if prop_schema.get("type") == "integer":
-                    dart_type = "int"
-                elif prop_schema.get("type") == "number":
-                    dart_type = "double"
-                elif prop_schema.get("type") == "boolean":
-                    dart_type = "bool"
-                
-                if dart_type == "int":
-                    model_class += f"      {prop_name}: json['{prop_name}'] as int,\n"
-                elif dart_type == "double":
-                    model_class += f"      {prop_name}: (json['{prop_name}'] as num).toDouble(),\n"
-                elif dart_type == "bool":
-                    model_class += f"      {prop_name}: json['{prop_name}'] as bool,\n"
-                else:
-                    model_class += f"      {prop_name}: json['{prop_name}'] as String,\n"
-            
-            model_class += "    );\n  }\n\n"
-            
-            # toJson
-            model_class += """  Map<String, dynamic> toJson() {
-    return {
+
+DART_PAGE = DART_HEADER + """
+/// Une page d'une liste paginée (`data`, `total`, `page`, `limit`, `next_cursor`).
+class ResultPage<T> {
+  const ResultPage({
+    required this.items,
+    required this.total,
+    this.page,
+    this.limit,
+    this.nextCursor,
+  });
+
+  final List<T> items;
+  final int total;
+  final int? page;
+  final int? limit;
+  final String? nextCursor;
+
+  bool get hasMore =>
+      nextCursor != null || (page != null && limit != null && page! * limit! < total);
+
+  factory ResultPage.fromJson(
+    Map<String, dynamic> json,
+    T Function(Map<String, dynamic>) fromJson,
+  ) {
+    return ResultPage(
+      items: (json['data'] as List)
+          .map((item) => fromJson(item as Map<String, dynamic>))
+          .toList(),
+      total: json['total'] as int,
+      page: json['page'] as int?,
+      limit: json['limit'] as int?,
+      nextCursor: json['next_cursor'] as String?,
+    );
+  }
+}
 """
-            
-            for prop_name in schema.get("properties", {}).keys():
-                model_class += f"      '{prop_name}': {prop_name},\n"
-            
-            model_class += """    };
+
+DART_ETAG_CACHE = DART_HEADER + """
+/// Réponse GET mémorisée avec son ETag.
+class CachedResponse {
+  const CachedResponse(this.etag, this.body);
+
+  final String etag;
+  final String body;
+}
+
+/// Cache LRU des réponses GET : le client renvoie `If-None-Match` et réutilise
+/// le corps mémorisé sur un 304, sans le retélécharger.
+class EtagCache {
+  EtagCache({this.maxEntries = 256});
+
+  final int maxEntries;
+  final Map<String, CachedResponse> _entries = {};
+
+  CachedResponse? lookup(String url) {
+    final entry = _entries.remove(url);
+    if (entry != null) {
+      _entries[url] = entry; // plus récemment utilisé en dernier
+    }
+    return entry;
   }
-}"""
-            
-            models.append(model_class)
-    
-    # Générer le client HTTP
-    client_content = """import 'dart:convert';
-import 'package:http/http.dart' as http;
 
-// Modèles de données
-"""
-    
-    # Ajouter les modèles
-    for model in models:
-        client_content += model + "\n\n"
-    
-    # Client HTTP
-    client_content += """class ForgeClient {
-  final String baseUrl;
-  final http.Client _httpClient;
+  void store(String url, String etag, String body) {
+    _entries.remove(url);
+    _entries[url] = CachedResponse(etag, body);
+    while (_entries.length > maxEntries) {
+      _entries.remove(_entries.keys.first);
+    }
+  }
 
-  ForgeClient({
-    this.baseUrl = 'http://localhost:8000',
-    http.Client? httpClient,
-  }) : _httpClient = httpClient ?? http.Client();
+  /// Oublie les réponses dont l'URL commence par [prefix] (après une écriture).
+  void invalidate(String prefix) {
+    _entries.removeWhere((url, _) => url.startsWith(prefix));
+  }
 
-  // Endpoints système
-  Future<HealthResponse> health() async {
-    final response = await _httpClient.get(
-      Uri.parse('$baseUrl/health'),
-    );
+  void clear() => _entries.clear();
+}
+"""
 
-    if (response.statusCode == 200) {
-      return HealthResponse.fromJson(jsonDecode(response.body));
-    } else {
-      throw Exception('Erreur de santé: ${response.statusCode}');
+DART_BATCH = DART_HEADER + """
+/// Exécute [calls] au plus [concurrency] à la fois ; résultats dans l'ordre des appels.
+Future<List<T>> runBatched<T>(
+  Iterable<Future<T> Function()> calls, {
+  int concurrency = 4,
+}) async {
+  final tasks = calls.toList();
+  final results = List<T?>.filled(tasks.length, null);
+  var next = 0;
+
+  Future<void> worker() async {
+    while (next < tasks.length) {
+      final i = next++;
+      results[i] = await tasks[i]();
     }
   }
 
+  await Future.wait([
+    for (var w = 0; w < concurrency && w < tasks.length; w++) worker(),
+  ]);
+  return results.cast<T>();
+}
 """
-    
-    # Ajouter les endpoints des entités
-    entities = []
-    for schema_name in openapi.get("components", {}).get("schemas", {}).keys():
-        if schema_name not in ["Error", "HealthResponse"] and not schema_name.endswith("List"):
-            entities.append(schema_name)
-    
-    for entity in entities:
-        entity_lower = entity.lower()
-        entity_plural = f"{entity_lower}s"
-        
-        client_content += f"""  // Endpoints {entity}
-  Future<List<{entity}>> get{entity_plural}() async {{
-    final response = await _httpClient.get(
-      Uri.parse('$baseUrl/{entity_plural}'),
-    );
 
-    if (response.statusCode == 200) {{
-      final data = jsonDecode(response.body);
-      return (data['data'] as List)
-          .map((json) => {entity}.fromJson(json))
-          .toList();
-    }} else {{
-      throw Exception('Erreur récupération {entity_plural}: ${{response.statusCode}}');
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _dart_type(prop_schema: Dict[str, Any]) -> str:
+    return {"integer": "int", "number": "double", "boolean": "bool"}.get(prop_schema.get("type"), "String")
+
+
+def _render_dart_model(name: str, schema: Dict[str, Any]) -> str:
+    """Classe Dart d'un schéma OpenAPI (constructeur, fromJson, toJson)."""
+    props = schema.get("properties", {})
+    casts = {
+        "int": "json['{0}'] as int",
+        "double": "(json['{0}'] as num).toDouble()",
+        "bool": "json['{0}'] as bool",
+        "String": "json['{0}'] as String",
+    }
+    out = DART_HEADER + f"\nclass {name} {{\n  {name}({{\n"
+    out += "".join(f"    required this.{prop},\n" for prop in props)
+    out += "  });\n\n"
+    out += "".join(f"  final {_dart_type(s)} {prop};\n" for prop, s in props.items())
+    out += f"\n  factory {name}.fromJson(Map<String, dynamic> json) {{\n    return {name}(\n"
+    out += "".join(f"      {prop}: {casts[_dart_type(s)].format(prop)},\n" for prop, s in props.items())
+    out += "    );\n  }\n\n  Map<String, dynamic> toJson() {\n    return {\n"
+    out += "".join(f"      '{prop}': {prop},\n" for prop in props)
+    out += "    };\n  }\n}\n"
+    return out
+
+
+def _render_dart_entity_methods(entity: str) -> str:
+    entity_lower = entity.lower()
+    entity_plural = f"{entity_lower}s"
+    plural = f"{entity}s"
+    return f"""  // Endpoints {entity}
+  Future<ResultPage<{entity}>> list{plural}({{
+    int page = 1,
+    int limit = 50,
+    String? cursor,
+  }}) async {{
+    final data = await _getJson('/{entity_plural}', {{
+      'limit': '$limit',
+      if (cursor != null) 'cursor': cursor else 'page': '$page',
+    }});
+    return ResultPage.fromJson(data as Map<String, dynamic>, {entity}.fromJson);
+  }}
+
+  /// Tous les {entity_lower}s, page par page : la page suivante n'est demandée
+  /// qu'une fois la précédente consommée.
+  Stream<{entity}> stream{plural}({{int limit = 50}}) async* {{
+    var page = 1;
+    String? cursor;
+    while (true) {{
+      final result = await list{plural}(page: page, limit: limit, cursor: cursor);
+      yield* Stream.fromIterable(result.items);
+      if (!result.hasMore || result.items.isEmpty) break;
+      cursor = result.nextCursor;
+      page += 1;
     }}
   }}
 
+  Future<List<{entity}>> get{entity_plural}({{int page = 1, int limit = 50, String? cursor}}) async {{
+    return (await list{plural}(page: page, limit: limit, cursor: cursor)).items;
+  }}
+
   Future<{entity}> get{entity}(String id) async {{
-    final response = await _httpClient.get(
-      Uri.parse('$baseUrl/{entity_plural}/$id'),
-    );
+    return {entity}.fromJson(await _getJson('/{entity_plural}/$id') as Map<String, dynamic>);
+  }}
 
-    if (response.statusCode == 200) {{
-      return {entity}.fromJson(jsonDecode(response.body));
-    }} else {{
-      throw Exception('Erreur récupération {entity}: ${{response.statusCode}}');
-    }}
+  /// Plusieurs {entity_lower}s par identifiant, au plus [concurrency] requêtes à la fois.
+  Future<List<{entity}>> getMany{plural}(Iterable<String> ids, {{int concurrency = 4}}) {{
+    return batch([for (final id in ids) () => get{entity}(id)], concurrency: concurrency);
   }}
 
   Future<{entity}> create{entity}({entity} {entity_lower}) async {{
@@ -520,6 +542,7 @@ import 'package:http/http.dart' as http;
       headers: {{'Content-Type': 'application/json'}},
       body: jsonEncode({entity_lower}.toJson()),
     );
+    _cache.invalidate('$baseUrl/{entity_plural}');
 
     if (response.statusCode == 200) {{
       return {entity}.fromJson(jsonDecode(response.body));
@@ -534,6 +557,7 @@ import 'package:http/http.dart' as http;
       headers: {{'Content-Type': 'application/json'}},
       body: jsonEncode({entity_lower}.toJson()),
     );
+    _cache.invalidate('$baseUrl/{entity_plural}');
 
     if (response.statusCode == 200) {{
       return {entity}.fromJson(jsonDecode(response.body));
@@ -546,6 +570,7 @@ import 'package:http/http.dart' as http;
     final response = await _httpClient.delete(
       Uri.parse('$baseUrl/{entity_plural}/$id'),
     );
+    _cache.invalidate('$baseUrl/{entity_plural}');
 
     if (response.statusCode != 200) {{
       throw Exception('Erreur suppression {entity}: ${{response.statusCode}}');
@@ -553,18 +578,87 @@ import 'package:http/http.dart' as http;
   }}
 
 """
-    
-    client_content += """  void dispose() {
+
+
+def _render_dart_client(model_files: List[str], entities: List[str]) -> str:
+    imports = "".join(f"import 'models/{f}';\n" for f in model_files)
+    out = DART_HEADER + f"""
+import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+
+import 'batch.dart';
+import 'etag_cache.dart';
+import 'page.dart';
+{imports}
+/// Client de l'API : un seul `http.Client` (connexions keep-alive réutilisées),
+/// GET conditionnels via [EtagCache], GET identiques simultanés fusionnés.
+class ForgeClient {{
+  ForgeClient({{
+    this.baseUrl = 'http://localhost:8000',
+    http.Client? httpClient,
+    EtagCache? cache,
+  }})  : _httpClient = httpClient ?? http.Client(),
+        _cache = cache ?? EtagCache();
+
+  final String baseUrl;
+  final http.Client _httpClient;
+  final EtagCache _cache;
+  final Map<String, Future<dynamic>> _inFlight = {{}};
+
+  Future<dynamic> _getJson(String path, [Map<String, String>? query]) {{
+    var uri = Uri.parse('$baseUrl$path');
+    if (query != null && query.isNotEmpty) {{
+      uri = uri.replace(queryParameters: query);
+    }}
+    final key = uri.toString();
+    return _inFlight.putIfAbsent(key, () => _fetch(uri).whenComplete(() => _inFlight.remove(key)));
+  }}
+
+  Future<dynamic> _fetch(Uri uri) async {{
+    final key = uri.toString();
+    final cached = _cache.lookup(key);
+    final response = await _httpClient.get(uri, headers: {{
+      'Accept': 'application/json',
+      if (cached != null) 'If-None-Match': cached.etag,
+    }});
+
+    if (response.statusCode == 304 && cached != null) {{
+      return jsonDecode(cached.body);
+    }}
+    if (response.statusCode != 200) {{
+      throw Exception('Erreur GET ${{uri.path}}: ${{response.statusCode}}');
+    }}
+    final etag = response.headers['etag'];
+    if (etag != null) {{
+      _cache.store(key, etag, response.body);
+    }}
+    return jsonDecode(response.body);
+  }}
+
+  /// Lance plusieurs appels du client en parallèle, au plus [concurrency] à la fois.
+  Future<List<T>> batch<T>(Iterable<Future<T> Function()> calls, {{int concurrency = 4}}) {{
+    return runBatched(calls, concurrency: concurrency);
+  }}
+
+  // Endpoints système
+  Future<HealthResponse> health() async {{
+    return HealthResponse.fromJson(await _getJson('/health') as Map<String, dynamic>);
+  }}
+
+"""
+    for entity in entities:
+        out += _render_dart_entity_methods(entity)
+    out += """  void dispose() {
     _httpClient.close();
   }
-}"""
-    
-    client_path = lib_dir / "forge_client.dart"
-    with open(client_path, 'w', encoding='utf-8') as f:
-        f.write(client_content)
-    
-    # 3. README.md
-    readme_content = f"""# Forge Client
+}
+"""
+    return out
+
+
+def _render_dart_readme(entities: List[str]) -> str:
+    readme = """# Forge Client
 
 Client Dart généré automatiquement par Forge AGI pour consommer l'API.
 
@@ -580,65 +674,137 @@ dart pub get
 ```dart
 import 'package:forge_client/forge_client.dart';
 
-void main() async {{
+void main() async {
   final client = ForgeClient(baseUrl: 'http://localhost:8000');
   
-  try {{
+  try {
     // Vérifier la santé de l'API
     final health = await client.health();
-    print('API Status: ${{health.status}}');
+    print('API Status: ${health.status}');
     
-    // Utiliser les endpoints des entités
-    // ... (voir les méthodes disponibles dans forge_client.dart)
+    // Listes paginées : listXs(page:, limit:, cursor:) pour une page,
+    // streamXs() pour tout parcourir sans tout charger d'un coup
     
-  }} catch (e) {{
+  } catch (e) {
     print('Erreur: $e');
-  }} finally {{
+  } finally {
     client.dispose();
-  }}
-}}
+  }
+}
 ```
 
+## Structure
+
+- `lib/forge_client.dart` : point d'entrée (exporte tout le reste)
+- `lib/src/models/` : un fichier par modèle
+- `lib/src/forge_client.dart` : le client HTTP
+- `lib/src/page.dart`, `etag_cache.dart`, `batch.dart` : pagination, cache, appels groupés
+
+Seuls les fichiers dont le contenu change sont réécrits à la régénération.
+
 ## Endpoints disponibles
 
 - `GET /health` - Vérification de santé
 """
-    
-    # Ajouter les endpoints des entités
     for entity in entities:
         entity_lower = entity.lower()
         entity_plural = f"{entity_lower}s"
-        readme_content += f"""
-- `GET /{entity_plural}` - Liste des {entity_lower}s
+        readme += f"""
+- `GET /{entity_plural}?page=&limit=&cursor=` - Liste paginée des {entity_lower}s
 - `POST /{entity_plural}` - Créer un {entity_lower}
 - `GET /{entity_plural}/{{id}}` - Récupérer un {entity_lower}
 - `PUT /{entity_plural}/{{id}}` - Mettre à jour un {entity_lower}
 - `DELETE /{entity_plural}/{{id}}` - Supprimer un {entity_lower}
 """
-    
-    readme_content += """
-## Modèles de données
+    readme += """
+## Réseau
 
-Les modèles sont générés automatiquement avec support JSON.
-Utilisez `fromJson()` pour désérialiser et `toJson()` pour sérialiser.
+- Un seul `http.Client` partagé : les connexions sont réutilisées (keep-alive).
+- GET conditionnels : l'ETag de chaque réponse est mémorisé et renvoyé en
+  `If-None-Match` ; un 304 réutilise le corps en cache. Les écritures
+  invalident les listes de l'entité.
+- Deux GET identiques simultanés ne partent qu'une fois.
+- `client.batch([...])` et `getManyXs(ids)` limitent le nombre de requêtes
+  parallèles.
 
 ## Gestion des erreurs
 
 Le client lève des exceptions en cas d'erreur HTTP.
 Gérez-les avec try/catch dans votre code.
 """
+    return readme
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Écrit `content` sauf si le fichier l'a déjà ; True si le fichier a été (ré)écrit."""
+    data = content.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def generate_dart_client_stub(openapi: dict, out_dir: Path) -> Dict[str, Any]:
+    """
+    Génère le client Dart à partir de la spécification OpenAPI : un fichier par
+    modèle sous lib/src/models, le client et ses utilitaires sous lib/src, et
+    lib/forge_client.dart qui exporte le tout.
+
+    Régénération incrémentale : un fichier n'est réécrit que si son contenu
+    change, et les modèles disparus de la spécification sont supprimés.
     
-    readme_path = dart_client_dir / "README.md"
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(readme_content)
-    
+    Args:
+        openapi: Spécification OpenAPI
+        out_dir: Dossier de sortie (artifacts/dart_client)
+        
+    Returns:
+        Dictionnaire avec le résumé des fichiers créés et réécrits
+    """
+    dart_client_dir = out_dir / "dart_client"
+    schemas = openapi.get("components", {}).get("schemas", {})
+
+    models = {name: schema for name, schema in schemas.items()
+              if name != "Error" and not name.endswith("List") and "properties" in schema}
+    entities = [name for name in models if name not in SYSTEM_SCHEMAS]
+    model_files = {name: f"{_snake_case(name)}.dart" for name in models}
+
+    files: Dict[str, str] = {
+        "pubspec.yaml": DART_PUBSPEC,
+        "README.md": _render_dart_readme(entities),
+        "lib/src/page.dart": DART_PAGE,
+        "lib/src/etag_cache.dart": DART_ETAG_CACHE,
+        "lib/src/batch.dart": DART_BATCH,
+        "lib/src/forge_client.dart": _render_dart_client(sorted(model_files.values()), entities),
+    }
+    for name, schema in models.items():
+        files[f"lib/src/models/{model_files[name]}"] = _render_dart_model(name, schema)
+    exports = ["src/batch.dart", "src/etag_cache.dart", "src/forge_client.dart", "src/page.dart"]
+    exports += [f"src/models/{f}" for f in sorted(model_files.values())]
+    files["lib/forge_client.dart"] = DART_HEADER + "\nlibrary forge_client;\n\n" + \
+        "".join(f"export '{e}';\n" for e in exports)
+
+    written = [rel for rel, content in files.items() if _write_if_changed(dart_client_dir / rel, content)]
+
+    # Modèles retirés de la spécification
+    removed = []
+    models_dir = dart_client_dir / "lib" / "src" / "models"
+    for stale in sorted(models_dir.glob("*.dart")):
+        rel = f"lib/src/models/{stale.name}"
+        if rel not in files:
+            stale.unlink()
+            removed.append(rel)
+
     return {
         "success": True,
-        "files_created": [
-            "pubspec.yaml",
-            "lib/forge_client.dart",
-            "README.md"
-        ],
-        "models_generated": len(models),
+        "files_created": list(files),
+        "files_written": written,
+        "files_removed": removed,
+        "models_generated": len(entities),
         "entities_supported": entities
     }
@@ -0,0 +1,168 @@
+"""
+Store d'APK adressé par contenu.
+
+La clé d'un APK est le hash de l'arbre source filtré (le même ensemble que
+`source.zip`, sans les fichiers réécrits par `pub get`) combiné aux versions
+de la toolchain. Deux apps identiques,
+quel que soit leur run_id, partagent donc le même APK et ne sont buildées
+qu'une seule fois. Les builds concurrents d'une même clé sont coalescés :
+un seul processus builde, les autres attendent puis réutilisent le résultat.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import yaml
+
+from .codegen import BRICK_DIR, PUB_GENERATED_FILES, WORK_DIR, _iter_filtered_sources, flutter_version
+
+DEFAULT_STORE_DIR = WORK_DIR / ".apk_store"
+LOCK_STALE_S = 3600  # un verrou plus vieux qu'un build complet est considéré orphelin
+LOCK_POLL_S = 0.5
+
+_key_locks: Dict[str, threading.Lock] = {}
+_key_locks_guard = threading.Lock()
+
+
+def toolchain_versions(build_mode: str = "debug") -> Dict[str, str]:
+    """Versions qui influencent le binaire produit, en plus des sources."""
+    brick_version = "unknown"
+    brick_yaml = BRICK_DIR / "brick.yaml"
+    if brick_yaml.exists():
+        brick = yaml.safe_load(brick_yaml.read_text(encoding="utf-8")) or {}
+        brick_version = str(brick.get("version", "unknown"))
+    return {
+        "flutter": flutter_version(),
+        "android_build_tools": os.environ.get("ANDROID_BUILD_TOOLS", "34.0.0"),
+        "brick": brick_version,
+        "build_mode": build_mode,
+    }
+
+
+def source_tree_key(app_dir: Path, toolchain: Optional[Dict[str, str]] = None) -> str:
+    """Hash sha256 de l'arbre source filtré + toolchain."""
+    h = hashlib.sha256()
+    h.update(json.dumps(toolchain or toolchain_versions(), sort_keys=True).encode("utf-8"))
+    for rel, p in _iter_filtered_sources(Path(app_dir), exclude_files=PUB_GENERATED_FILES):
+        h.update(rel.encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(p.read_bytes()).digest())
+    return h.hexdigest()
+
+
+class ApkStore:
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or os.environ.get("FORGE_APK_STORE", DEFAULT_STORE_DIR))
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.apk"
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)  # dernier usage : LRU du budget de caches (disk_gc)
+        except OSError:
+            pass
+        return path
+
+    def meta(self, key: str) -> Dict[str, Any]:
+        meta_path = self.path_for(key).with_suffix(".json")
+        if not meta_path.exists():
+            return {}
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+
+    def put(self, key: str, apk_path: Path, meta: Optional[Dict[str, Any]] = None) -> Path:
+        """Copie atomique de l'APK dans le store (tmp + rename)."""
+        dest = self.path_for(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(f".apk.tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.copy2(apk_path, tmp)
+        os.replace(tmp, dest)
+        meta = dict(meta or {})
+        meta.update({"key": key, "size": dest.stat().st_size, "stored_at": time.time()})
+        dest.with_suffix(".json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return dest
+
+    def get_or_build(self, key: str, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Retourne l'APK de la clé, en le buildant au besoin.
+        `build()` renvoie un dict {"success", "apk_path", ...} comme run_build_apk.
+        """
+        stored = self.get(key)
+        if stored:
+            return self._cached(key, stored)
+
+        # Coalescence intra-processus (threads) puis inter-processus (fichier verrou)
+        with _key_locks_guard:
+            key_lock = _key_locks.setdefault(key, threading.Lock())
+        with key_lock, self._file_lock(key):
+            stored = self.get(key)
+            if stored:
+                return self._cached(key, stored)
+            result = build()
+            if not result.get("success") or not result.get("apk_path"):
+                return result
+            apk_name = result.get("apk_name", "app-debug.apk")
+            stored = self.put(key, Path(result["apk_path"]), {"toolchain": toolchain_versions(), "apk_name": apk_name})
+            return {**result, "apk_path": str(stored), "apk_name": apk_name, "apk_key": key, "cached": False}
+
+    def _cached(self, key: str, stored: Path) -> Dict[str, Any]:
+        return {"success": True, "apk_path": str(stored), "apk_key": key, "cached": True,
+                "apk_name": self.meta(key).get("apk_name", "app-debug.apk")}
+
+    def _file_lock(self, key: str):
+        return _FileLock(self.root / key[:2] / f"{key}.lock")
+
+
+class _FileLock:
+    """Verrou par fichier créé en O_EXCL (portable, y compris Windows)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > LOCK_STALE_S:
+                        self.path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(LOCK_POLL_S)
+
+    def __exit__(self, *exc):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+
+def materialize(store_path: Path, artifacts_dir: Path, name: str = "app-debug.apk") -> Path:
+    """
+    Copie l'APK du store dans artifacts/ (tmp + rename). Jamais de hardlink :
+    l'artefact d'un run peut être réécrit ou supprimé sans toucher à l'objet
+    partagé par les autres runs.
+    """
+    dest = Path(artifacts_dir) / name
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    shutil.copy2(store_path, tmp)
+    os.replace(tmp, dest)
+    return dest
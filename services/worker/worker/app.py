@@ -1,7 +1,5 @@
-from fastapi import FastAPI
-
-app = FastAPI()
-
-@app.get("/health")
-def health():
-    return {"ok": True}
+"""
+Point d'entrée uvicorn du worker (`uvicorn worker.app:app`, voir Dockerfile.worker) :
+l'application HTTP complète de worker/http.py (santé, agent, annulation, logs).
+"""
+from .http import app  # noqa: F401
@@ -0,0 +1,195 @@
+"""
+Mode batch du pipeline : plusieurs specs par invocation.
+
+    python -m worker.batch specs/examples/ 'specs/**/*.yaml' --jobs 4
+    cat specs.ndjson | python -m worker.batch -
+
+Lancer `worker.pipeline` une fois par spec repaie à chaque run le démarrage de
+Python, les imports (rich, jsonschema, yaml, click) et la lecture du schéma.
+Ici un pool de `--jobs` processus se partage les specs ; chaque process est
+démarré une fois (spawn), réchauffé (imports, validateur compilé, détection
+Docker) et garde ses caches d'un run à l'autre. Le squelette Android `flutter create` est partagé
+entre runs et entre processus (codegen.SCAFFOLD_CACHE_DIR).
+
+Entrée NDJSON (`-`), une spec par ligne :
+    {"spec_path": "specs/a.yaml", "run_id": "..."}   chemin, run_id facultatif
+    {"spec": {...}, "run_id": "..."}                  spec en ligne
+    {...}                                             la spec elle-même
+Les specs en ligne sont écrites sous WORK_DIR/.batch/<batch_id>/.
+"""
+from __future__ import annotations
+
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from . import codegen, pipeline
+
+SPEC_SUFFIXES = (".yaml", ".yml", ".json")
+console = Console()
+
+
+@dataclass
+class BatchItem:
+    spec_path: str
+    run_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    label: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.label = self.label or self.spec_path
+
+
+def expand_specs(patterns: Iterable[str]) -> List[str]:
+    """Fichiers de specs désignés par des chemins, dossiers (non récursif) ou globs."""
+    out: List[str] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(str(p) for p in path.iterdir() if p.is_file() and p.suffix.lower() in SPEC_SUFFIXES)
+        elif path.is_file():
+            matches = [pattern]
+        else:
+            matches = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        if not matches:
+            raise click.BadParameter(f"aucune spec pour {pattern!r}", param_hint="SPECS")
+        out.extend(m for m in matches if m not in out)
+    return out
+
+
+def read_ndjson(stream: IO[str], spool_dir: Path) -> List[BatchItem]:
+    """Lit une spec par ligne (voir l'en-tête du module) ; lignes vides ignorées."""
+    items: List[BatchItem] = []
+    for lineno, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            raise click.BadParameter(f"ligne {lineno}: JSON invalide ({e})", param_hint="stdin")
+        if not isinstance(obj, dict):
+            raise click.BadParameter(f"ligne {lineno}: objet JSON attendu", param_hint="stdin")
+        run_id = obj.get("run_id") or str(uuid.uuid4())
+        if "spec_path" in obj:
+            items.append(BatchItem(str(obj["spec_path"]), run_id))
+            continue
+        spec = obj["spec"] if "spec" in obj else obj
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        spec_path = spool_dir / f"{lineno:05d}-{run_id}.json"
+        spec_path.write_text(json.dumps(spec, ensure_ascii=False), encoding="utf-8")
+        items.append(BatchItem(str(spec_path), run_id, label=f"stdin:{lineno}"))
+    return items
+
+
+def warm() -> None:
+    """Initialisation d'un process du pool : imports et caches chargés avant le premier run."""
+    import yaml  # noqa: F401  (différés dans pipeline)
+    from . import api_contracts, db_schema  # noqa: F401
+    try:
+        pipeline.schema_validator(pipeline.resolve_schema_path())
+    except Exception:
+        pass  # schéma absent : l'erreur sera rapportée par validate_spec, run par run
+    codegen.docker_available()
+
+
+def run_one(item: BatchItem, dry_run: bool = True, resume: bool = True, quiet: bool = True) -> Dict[str, Any]:
+    """Exécute un run ; ne lève pas, l'échec est rapporté dans le résultat."""
+    t0 = time.perf_counter()
+    out: Dict[str, Any] = {"spec": item.label, "spec_path": item.spec_path, "run_id": item.run_id,
+                           "status": None, "timings": {}, "error": None, "pid": os.getpid()}
+    try:
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            result = pipeline.run_pipeline(item.run_id, item.spec_path, dry_run, resume=resume)
+        if result.get("error"):
+            out.update(status="invalid_spec", error=result["error"])
+        else:
+            out.update(status=result["steps"]["judge"]["decision"], timings=result.get("timings", {}))
+    except Exception as e:
+        out.update(status="error", error=f"{type(e).__name__}: {e}")
+    out["duration_s"] = round(time.perf_counter() - t0, 3)
+    return out
+
+
+def run_batch(items: List[BatchItem], jobs: int = 1, dry_run: bool = True, resume: bool = True,
+              quiet: bool = True) -> List[Dict[str, Any]]:
+    """Résultats dans l'ordre des specs ; jobs <= 1 : tout dans le process courant."""
+    jobs = max(1, min(jobs, len(items)))
+    if jobs == 1:
+        warm()
+        return [run_one(item, dry_run, resume, quiet) for item in items]
+    # spawn : un fils forké hériterait des threads (bus d'événements, pools) et
+    # des verrous du parent dans un état incohérent ; chaque process se réchauffe seul
+    with ProcessPoolExecutor(max_workers=jobs, initializer=warm,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(run_one, item, dry_run, resume, quiet) for item in items]
+        return [f.result() for f in futures]
+
+
+def summary_table(results: List[Dict[str, Any]], wall_s: float) -> Table:
+    ok = sum(1 for r in results if r["status"] == "accept")
+    cpu_s = sum(r["duration_s"] for r in results)
+    table = Table(title=f"Batch : {ok}/{len(results)} acceptés",
+                  caption=f"mur {wall_s:.2f}s · cumul {cpu_s:.2f}s · "
+                          f"{len(results) / wall_s if wall_s else 0:.2f} spec/s")
+    table.add_column("Spec")
+    table.add_column("Run ID")
+    table.add_column("Statut")
+    table.add_column("Durée (s)", justify="right")
+    table.add_column("Étape la plus lente")
+    for r in results:
+        color = {"accept": "green", "revise": "yellow"}.get(r["status"], "red")
+        slowest = max(r["timings"].items(), key=lambda kv: kv[1]) if r["timings"] else None
+        table.add_row(
+            r["spec"], r["run_id"][:8], f"[{color}]{r['status']}[/{color}]", f"{r['duration_s']:.3f}",
+            f"{slowest[0]} ({slowest[1]:.3f}s)" if slowest else (r["error"] or "-"),
+        )
+    return table
+
+
+@click.command()
+@click.argument("specs", nargs=-1, required=True)
+@click.option("--jobs", "-j", type=int, default=lambda: int(os.getenv("FORGE_BATCH_JOBS", os.cpu_count() or 1)),
+              help="Processus du pool (défaut : FORGE_BATCH_JOBS ou nombre de CPU)")
+@click.option("--dry-run/--no-dry-run", default=True, help="Mode dry-run (par défaut)")
+@click.option("--resume/--no-resume", default=True, help="Reprendre depuis le journal de chaque run (par défaut)")
+@click.option("--verbose", "-v", is_flag=True, help="Afficher la sortie du pipeline de chaque run")
+@click.option("--summary", type=click.Path(dir_okay=False), default=None,
+              help="Écrire les résultats (une ligne JSON par spec) dans ce fichier")
+def cli(specs: tuple, jobs: int, dry_run: bool, resume: bool, verbose: bool, summary: Optional[str]):
+    """Exécute le pipeline sur un lot de specs (chemins, dossiers, globs, ou - pour NDJSON sur stdin)"""
+    items: List[BatchItem] = []
+    paths = [s for s in specs if s != "-"]
+    if "-" in specs:
+        spool = Path(os.getenv("WORK_DIR", "./work")) / ".batch" / uuid.uuid4().hex[:12]
+        items.extend(read_ndjson(sys.stdin, spool))
+    if paths:
+        items.extend(BatchItem(p) for p in expand_specs(paths))
+    if not items:
+        raise click.UsageError("aucune spec à exécuter")
+
+    console.print(f"[bold blue]Batch : {len(items)} spec(s), {max(1, min(jobs, len(items)))} process[/bold blue]")
+    t0 = time.perf_counter()
+    results = run_batch(items, jobs, dry_run, resume, quiet=not verbose)
+    console.print(summary_table(results, time.perf_counter() - t0))
+    if summary:
+        with open(summary, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    sys.exit(0 if all(r["status"] == "accept" for r in results) else 1)
+
+
+if __name__ == "__main__":
+    cli()
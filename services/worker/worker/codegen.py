@@ -1,13 +1,16 @@
 from __future__ import annotations
+import functools
 import json
 import os
+import shlex
 import shutil
 import subprocess
 import uuid
 from pathlib import Path
 import yaml
 from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
-import sys, shutil, subprocess, textwrap, time
+from .supervisor import run_supervised
+from .logstore import LogWriter, run_log_dir
 
 WORK_DIR = Path(os.environ.get("WORK_DIR", "./work"))
 # En mode local, utiliser le répertoire courant
@@ -17,44 +20,75 @@ else:
     REPO_ROOT = Path(__file__).parent.parent.parent.parent  # Remonter depuis worker/worker/codegen.py
 BRICK_DIR = REPO_ROOT / "bricks" / "mobile_app_base"
 
-def _run(cmd, cwd=None):
-    print(f"[run] {cmd}")
-    subprocess.run(cmd, shell=True, check=True, cwd=cwd)
+# Chemin stable du projet dans le conteneur runner_flutter : l'app du run y est
+# montée, les entrées Gradle ne dépendent plus du run_id et les tâches compilées
+# sont réutilisables d'un run (et d'un nœud) à l'autre via le build cache.
+STABLE_APP_DIR = "/src/app"
+# WORK_DIR vu par le démon Docker quand le worker tourne lui-même en conteneur
+# (socket de l'hôte) : les `-v` doivent désigner des chemins de l'hôte.
+HOST_WORK_DIR = os.environ.get("HOST_WORK_DIR")
+GRADLE_BUILD_CACHE_URL = os.environ.get("GRADLE_BUILD_CACHE_URL", "http://gradle_cache:5071/cache/")
+# Squelettes `flutter create` partagés entre runs (dossier point : ignoré par le GC)
+SCAFFOLD_CACHE_DIR = ".scaffold_cache"
+# Identité du squelette Android : entrée des tâches Gradle, donc de leurs clés de
+# build cache. scripts/warm_build_caches.sh lit les mêmes variables.
+SCAFFOLD_ORG = os.environ.get("FORGE_SCAFFOLD_ORG", "com.forge")
+SCAFFOLD_PROJECT_NAME = os.environ.get("FORGE_SCAFFOLD_PROJECT_NAME", "resa_cafe_atlas")
+# pub get sur le cache pré-résolu, le réseau seulement si un paquet manque
+PUB_GET = "(flutter pub get --offline || flutter pub get)"
+
+def _compose_file() -> str:
+    return str((Path(__file__).parents[3] / "infra" / "docker-compose.yml").as_posix())
+
+def host_path(path: Path) -> str:
+    """Chemin de `path` pour un bind mount : transposé sous HOST_WORK_DIR s'il est dans WORK_DIR."""
+    path = Path(path).resolve()
+    if HOST_WORK_DIR:
+        try:
+            rel = path.relative_to(WORK_DIR.resolve())
+        except ValueError:
+            pass
+        else:
+            return f"{HOST_WORK_DIR.rstrip('/')}/{rel.as_posix()}"
+    return path.as_posix()
+
+def _build_cache_args(app_dir: Path) -> list[str]:
+    """Arguments `docker compose run` : montage de l'app sur STABLE_APP_DIR + build cache Gradle."""
+    return [
+        "-v", f"{host_path(app_dir)}:{STABLE_APP_DIR}",
+        "-e", f"GRADLE_BUILD_CACHE_URL={GRADLE_BUILD_CACHE_URL}",
+    ]
 
-def _run_stream(cmd: list[str], cwd: Path | None, log_file: Path, timeout_s: int = 1800) -> int:
+def _run(cmd, cwd=None, timeout_s: int = 600):
+    """Exécute une commande sans shell (chaîne découpée via shlex), lève si rc != 0."""
+    argv = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+    print(f"[run] {' '.join(argv)}")
+    res = run_supervised(argv, cwd=cwd, wall_timeout_s=timeout_s)
+    if not res.ok:
+        raise subprocess.CalledProcessError(res.returncode, argv)
+
+def _run_stream(cmd: list[str], cwd: Path | None, run_id: str, log_name: str, timeout_s: int = 1800,
+                idle_timeout_s: int = 600) -> int:
     """
-    Lance un process en streamant stdout/stderr vers console + fichier log.
-    Kill dur si timeout atteint. Retourne l'exit code.
+    Lance un process en streamant stdout/stderr vers console + log compressé du run
+    (logstore, lisible via GET /runs/{run_id}/logs/{log_name}).
+    Kill du groupe de process si timeout (mur ou inactivité) ou annulation. Retourne l'exit code.
     """
-    log_file.parent.mkdir(parents=True, exist_ok=True)
-    with log_file.open("w", encoding="utf-8") as lf:
-        lf.write(f"$ {' '.join(cmd)}\n")
-        lf.flush()
-        start = time.time()
-        proc = subprocess.Popen(
-            cmd,
-            cwd=str(cwd) if cwd else None,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-        )
-        try:
-            for line in proc.stdout:
-                sys.stdout.write(line)
-                lf.write(line)
-                lf.flush()
-                if time.time() - start > timeout_s:
-                    lf.write("\n[TIMEOUT] killing process...\n")
-                    lf.flush()
-                    proc.kill()
-                    return 124
-        finally:
-            try:
-                proc.stdout.close()
-            except Exception:
-                pass
-        return proc.wait()
+    log = LogWriter(run_log_dir(run_id, log_name))
+    try:
+        res = run_supervised(cmd, cwd=cwd, subscribers=[log.subscriber], run_id=run_id,
+                             wall_timeout_s=timeout_s, idle_timeout_s=idle_timeout_s)
+    finally:
+        log.close()
+    if res.timed_out:
+        return 124
+    if res.cancelled:
+        return 130
+    return res.returncode
+
+def _docker_rm(container: str):
+    """on_kill : le CLI docker tué ne stoppe pas forcément le conteneur, on le supprime."""
+    return lambda: subprocess.run(["docker", "rm", "-f", container], capture_output=True, check=False)
 
 def _ensure_android_scaffold(app_dir: Path) -> None:
     """
@@ -78,7 +112,7 @@ def _ensure_android_scaffold(app_dir: Path) -> None:
         "bash", "-lc",
         "set -euo pipefail; flutter create . >/dev/null 2>&1 || flutter create ."
     ]
-    rc = _run_stream(cmd, cwd=Path("."), log_file=app_dir.parent / "artifacts" / "build_apk.log", timeout_s=600)
+    rc = _run_stream(cmd, cwd=Path("."), run_id=app_dir.parent.name, log_name="flutter_create", timeout_s=600)
     if rc not in (0,):
         raise RuntimeError(f"flutter create failed (rc={rc})")
 
@@ -95,9 +129,11 @@ def _ensure_android_scaffold(app_dir: Path) -> None:
                 shutil.copy2(src, dst)
 
 def run_build_apk(run_id: str, app_dir: Path) -> dict:
-    """Build APK avec vérifications et copie vers artifacts/."""
-    from pathlib import Path
-    import subprocess, os
+    """
+    Build APK avec vérifications et copie vers artifacts/.
+    L'APK est pris dans le store adressé par contenu si cet arbre source a déjà été buildé.
+    """
+    from .apk_store import ApkStore, source_tree_key, materialize
 
     # Sanity app
     pubspec = app_dir / "pubspec.yaml"
@@ -109,39 +145,64 @@ def run_build_apk(run_id: str, app_dir: Path) -> dict:
         return {"success": False, "error": "android/ manquant (scaffold)", "apk_path": None}
 
     # Artifacts
-    artifacts_dir = Path(f"./work/{run_id}/artifacts")
+    artifacts_dir = WORK_DIR / run_id / "artifacts"
     artifacts_dir.mkdir(parents=True, exist_ok=True)
 
-    # Build via docker compose runner_flutter (commande simple et lisible)
-    compose_file = str((Path(__file__).parents[3] / "infra" / "docker-compose.yml").as_posix())
+    key = source_tree_key(app_dir)
+    res = ApkStore().get_or_build(key, lambda: _docker_build_apk(run_id, app_dir))
+    if not res.get("success"):
+        return res
+
+    dest = materialize(Path(res["apk_path"]), artifacts_dir, res.get("apk_name", "app-debug.apk"))
+    print(f"[apk] {'réutilisé depuis le store' if res.get('cached') else 'buildé'} (clé {key[:12]})")
+    return {**res, "apk_path": str(dest)}
+
+def _docker_build_apk(run_id: str, app_dir: Path) -> dict:
+    """Build effectif via docker compose runner_flutter. Retourne le chemin de l'APK produit."""
+    compose_file = _compose_file()
+    container = f"forge-{run_id}-build"
+    # Build debug : c'est cet APK qu'on rend, jamais un APK laissé par un build antérieur
+    apk_name = "app-debug.apk"
+    apk_path = app_dir / "build" / "app" / "outputs" / "flutter-apk" / apk_name
+    apk_path.unlink(missing_ok=True)
     cmd = [
         "docker", "compose", "-f", compose_file, "run", "--rm",
+        "--name", container,
         "-e", f"RUN_ID={run_id}",
+        *_build_cache_args(app_dir),
+        "-w", STABLE_APP_DIR,
         "runner_flutter",
         "bash", "-lc",
-        f"cd /work/{run_id}/app && flutter pub get && flutter build apk --debug"
+        f"{PUB_GET} && flutter build apk --debug"
     ]
+    # Logs compressés/indexés : le résultat ne garde qu'une référence
+    log = LogWriter(run_log_dir(run_id, "build_apk"))
     try:
-        proc = subprocess.run(cmd, check=False)
-        if proc.returncode != 0:
-            return {"success": False, "error": f"flutter build rc={proc.returncode}", "apk_path": None}
+        proc = run_supervised(
+            cmd,
+            run_id=run_id,
+            subscribers=[log.subscriber],
+            wall_timeout_s=int(os.environ.get("FORGE_BUILD_TIMEOUT_S", "1800")),
+            idle_timeout_s=int(os.environ.get("FORGE_BUILD_IDLE_TIMEOUT_S", "600")),
+            on_kill=_docker_rm(container),
+        )
     except Exception as e:
-        return {"success": False, "error": str(e), "apk_path": None}
-
-    # Copie APK
-    apk_debug = app_dir / "build" / "app" / "outputs" / "flutter-apk" / "app-debug.apk"
-    apk_release = app_dir / "build" / "app" / "outputs" / "flutter-apk" / "app-release.apk"
-    dest = None
-    if apk_release.exists():
-        dest = artifacts_dir / "app-release.apk"
-        dest.write_bytes(apk_release.read_bytes())
-    elif apk_debug.exists():
-        dest = artifacts_dir / "app-debug.apk"
-        dest.write_bytes(apk_debug.read_bytes())
-    else:
-        return {"success": False, "error": "APK introuvable après build", "apk_path": None}
+        return {"success": False, "error": str(e), "apk_path": None, "log": log.ref()}
+    finally:
+        log.close()
+    if not proc.ok:
+        if proc.cancelled:
+            error = "build annulé"
+        elif proc.timed_out:
+            error = f"timeout ({proc.timed_out}) après {proc.duration_s}s"
+        else:
+            error = f"flutter build rc={proc.returncode}"
+        return {"success": False, "error": error, "apk_path": None, "process": proc.to_dict(), "log": log.ref()}
 
-    return {"success": True, "apk_path": str(dest)}
+    if apk_path.exists():
+        return {"success": True, "apk_path": str(apk_path), "apk_name": apk_name,
+                "process": proc.to_dict(), "log": log.ref()}
+    return {"success": False, "error": "APK introuvable après build", "apk_path": None, "log": log.ref()}
 
 def ensure_flutter_android_scaffold(app_dir: Path, org: str = "com.forge", project_name: str | None = None):
     """
@@ -181,29 +242,43 @@ def ensure_flutter_android_scaffold(app_dir: Path, org: str = "com.forge", proje
 
 DETERMINISTIC_TS = (1980, 1, 1, 0, 0, 0)
 
-def _zip_deterministic_filtered(zip_path: Path, root_dir: Path, exclude_dirs=("android", "build", ".dart_tool", ".gradle")):
+SOURCE_EXCLUDE_DIRS = ("android", "build", ".dart_tool", ".gradle")
+# Fichiers réécrits par `flutter pub get` (.flutter-plugins-dependencies porte un
+# date_created à chaque exécution) ou copiés du squelette `flutter create`
+# (.metadata, déterminé par la version de Flutter, déjà dans la clé) : exclus de
+# la clé du store APK, sinon deux apps identiques n'ont jamais la même clé.
+PUB_GENERATED_FILES = (".flutter-plugins", ".flutter-plugins-dependencies", ".packages", ".metadata")
+
+def _iter_filtered_sources(root_dir: Path, exclude_dirs=SOURCE_EXCLUDE_DIRS, exclude_files=()):
     """
-    Zip déterministe des sources Flutter, en excluant les dossiers lourds.
+    Parcourt les sources Flutter en ordre déterministe, sans les dossiers lourds.
+    Yield (chemin relatif posix, Path). Partagé par source.zip et la clé du store APK.
     """
     excl = {d.lower() for d in exclude_dirs}
+    excl_files = {f.lower() for f in exclude_files}
+    for base, dirs, files in os.walk(root_dir):
+        # filtre des dossiers exclus
+        dirs[:] = sorted(d for d in dirs if d.lower() not in excl)
+
+        for fn in sorted(files):
+            p = Path(base) / fn
+            # filtre fichiers lourds/inutiles (apk, aab, lock, etc.)
+            name_lower = p.name.lower()
+            if name_lower.endswith((".apk", ".aab", ".keystore")) or name_lower in excl_files:
+                continue
+            yield p.relative_to(root_dir).as_posix(), p
+
+def _zip_deterministic_filtered(zip_path: Path, root_dir: Path, exclude_dirs=SOURCE_EXCLUDE_DIRS):
+    """
+    Zip déterministe des sources Flutter, en excluant les dossiers lourds.
+    """
     with ZipFile(zip_path, "w", compression=ZIP_DEFLATED, compresslevel=9) as zf:
-        for base, dirs, files in os.walk(root_dir):
-            # filtre des dossiers exclus
-            dirs[:] = [d for d in dirs if d.lower() not in excl]
-
-            for fn in files:
-                p = Path(base) / fn
-                # filtre fichiers lourds/inutiles (apk, aab, lock, etc.)
-                name_lower = p.name.lower()
-                if name_lower.endswith((".apk", ".aab", ".keystore")):
-                    continue
-
-                rel = p.relative_to(root_dir).as_posix()
-                data = p.read_bytes()
-                info = ZipInfo(filename=rel, date_time=DETERMINISTIC_TS)
-                info.compress_type = ZIP_DEFLATED
-                info.external_attr = (0o100644 & 0xFFFF) << 16
-                zf.writestr(info, data)
+        for rel, p in _iter_filtered_sources(root_dir, exclude_dirs):
+            data = p.read_bytes()
+            info = ZipInfo(filename=rel, date_time=DETERMINISTIC_TS)
+            info.compress_type = ZIP_DEFLATED
+            info.external_attr = (0o100644 & 0xFFFF) << 16
+            zf.writestr(info, data)
 
 def spec_to_vars(spec: dict) -> dict:
     # Map minimal : app_name, primary_color, navigation, entities (noms + champs)
@@ -223,6 +298,55 @@ def spec_to_vars(spec: dict) -> dict:
         "entities": entities
     }
 
+@functools.lru_cache(maxsize=None)
+def docker_available() -> bool:
+    """`docker --version`, une fois par process (un lot de specs ne le relance pas à chaque run)."""
+    try:
+        return subprocess.run(["docker", "--version"], capture_output=True, text=True).returncode == 0
+    except FileNotFoundError:
+        return False
+
+@functools.lru_cache(maxsize=None)
+def flutter_version() -> str:
+    """
+    Version du Flutter qui builde réellement (`flutter --version --machine` dans
+    runner_flutter, sinon en local), sondée une fois par process : changer
+    d'image change la clé du store APK sans dépendre de FLUTTER_VERSION.
+    """
+    probes = [["flutter", "--version", "--machine"]]
+    if docker_available():
+        probes.insert(0, ["docker", "compose", "-f", _compose_file(), "run", "--rm", "-T",
+                          "runner_flutter", "flutter", "--version", "--machine"])
+    for argv in probes:
+        try:
+            out = subprocess.run(argv, capture_output=True, text=True, timeout=300)
+            info = json.loads(out.stdout[out.stdout.index("{"):]) if out.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            continue
+        if info and info.get("frameworkVersion"):
+            return f"{info['frameworkVersion']}+{str(info.get('engineRevision', ''))[:10]}"
+    # aucune toolchain joignable : le build échouera de toute façon
+    return os.environ.get("FLUTTER_VERSION", "unknown")
+
+def _scaffold_script(org: str, project_name: str) -> str:
+    """
+    Squelette Android `flutter create`, identique pour tous les runs d'une même
+    version de Flutter : créé une fois sous /work/SCAFFOLD_CACHE_DIR (renommage
+    atomique, un run concurrent garde le sien) puis copié dans l'app.
+    """
+    cache = f"/work/{SCAFFOLD_CACHE_DIR}/{org}-{project_name}"
+    return f"""FLUTTER_KEY=$(flutter --version 2>/dev/null | head -1 | tr -c 'A-Za-z0-9.' '_')
+SCAFFOLD={cache}-$FLUTTER_KEY
+if [ ! -d "$SCAFFOLD/android" ]; then
+  mkdir -p /work/{SCAFFOLD_CACHE_DIR}
+  rm -rf "$SCAFFOLD.tmp.$$"
+  flutter create -t app --platforms android --org {org} --project-name {project_name} "$SCAFFOLD.tmp.$$"
+  mv -T "$SCAFFOLD.tmp.$$" "$SCAFFOLD" 2>/dev/null || rm -rf "$SCAFFOLD.tmp.$$"
+fi
+touch "$SCAFFOLD"  # dernier usage : LRU du budget de caches (disk_gc)
+cp -r "$SCAFFOLD/android" .
+cp -r "$SCAFFOLD/.metadata" . 2>/dev/null || true"""
+
 def run_mason_make(run_id: str, vars_obj: dict, build_apk: bool = True) -> Path:
     run_root = WORK_DIR / run_id
     app_dir = run_root / "app"
@@ -230,21 +354,10 @@ def run_mason_make(run_id: str, vars_obj: dict, build_apk: bool = True) -> Path:
     vars_path = run_root / "vars.json"
     vars_path.write_text(json.dumps(vars_obj, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    # Vérifier si Docker est disponible
-    try:
-        result = subprocess.run(["docker", "--version"], capture_output=True, text=True)
-        docker_available = result.returncode == 0
-        print(f"Docker check result: {result.returncode}")
-    except FileNotFoundError:
-        docker_available = False
-        print("Docker not found")
-    
-    print(f"Docker available: {docker_available}")
-    
-    # Docker disponible, utiliser le mode normal
-    print("✅ Docker disponible, utilisation du mode normal")
+    available = docker_available()
+    print(f"Docker available: {available}")
 
-    if docker_available:
+    if available:
         # Appel du conteneur runner_flutter avec mason_cli
         compose_file = str((REPO_ROOT / "infra" / "docker-compose.yml").as_posix())
         # IMPORTANT : chemin interne au conteneur
@@ -259,55 +372,55 @@ mason add mobile_app_base --path {brick_path}
 mason make mobile_app_base -c /work/{run_id}/vars.json -o /work/{run_id}/app
 echo '[flutter] scaffolding Android'
 cd /work/{run_id}/app
-flutter create -t app --platforms android --org com.forge --project-name resa_cafe_atlas .flutter_scaffold_tmp
-cp -r .flutter_scaffold_tmp/android .
-cp -r .flutter_scaffold_tmp/.metadata . 2>/dev/null || true
-rm -rf .flutter_scaffold_tmp
+{_scaffold_script(SCAFFOLD_ORG, SCAFFOLD_PROJECT_NAME)}
 echo '[flutter] Android scaffold injecté'
-flutter pub get"""
-
-        # Ajouter la logique de build APK conditionnelle
-        if build_apk:
-            bash_script += f"""
-if true; then
-  echo '[flutter] build APK...'
-  flutter build apk --debug
-  mkdir -p /work/{run_id}/artifacts
-  if [ -f build/app/outputs/flutter-apk/app-debug.apk ]; then
-    cp build/app/outputs/flutter-apk/app-debug.apk /work/{run_id}/artifacts/app-debug.apk
-    echo '✅ APK copié dans artifacts/app-debug.apk'
-  else
-    echo '⚠️ APK non trouvé (regarde les logs gradle)'
-  fi
-else
-  echo '[flutter] build APK ignoré (mode génération uniquement)'
-fi"""
-        else:
-            bash_script += """
-echo '[flutter] build APK ignoré (mode génération uniquement)'"""
+cd {STABLE_APP_DIR}
+{PUB_GET}"""
 
         bash_script += """
 echo '[mason] done'"""
 
+        container = f"forge-{run_id}-mason"
         cmd = [
             "docker", "compose", "-f", compose_file, "run", "--rm",
+            "--name", container,
             "-w", "/work",
+            *_build_cache_args(app_dir),
             "runner_flutter",
             "bash", "-c", bash_script
         ]
-        # Exécuter avec timeout pour éviter le blocage
+        # Supervision : timeout mur + inactivité, kill du groupe et du conteneur
+        generated = False
+        log = LogWriter(run_log_dir(run_id, "mason_make"))
         try:
-            result = subprocess.run(cmd, cwd=str(REPO_ROOT), timeout=300)  # 5 minutes max
-            if result.returncode == 0:
-                print("✅ Génération Mason + scaffolding Android + build APK terminés")
+            result = run_supervised(
+                cmd,
+                cwd=REPO_ROOT,
+                subscribers=[log.subscriber],
+                run_id=run_id,
+                wall_timeout_s=300,
+                idle_timeout_s=180,
+                on_kill=_docker_rm(container),
+            )
+            if result.ok:
+                generated = True
+                print("✅ Génération Mason + scaffolding Android terminés")
+            elif result.timed_out:
+                print(f"⚠️ Timeout ({result.timed_out}) - génération Mason bloquée")
+            elif result.cancelled:
+                print("⚠️ Génération Mason annulée")
             else:
                 print(f"⚠️ Commande Docker terminée avec code {result.returncode}")
-        except subprocess.TimeoutExpired:
-            print("⚠️ Timeout après 5 minutes - build APK probablement bloqué")
-            print("✅ Génération Mason + scaffolding Android terminés (sans APK)")
         except Exception as e:
             print(f"⚠️ Erreur lors de l'exécution Docker: {e}")
-            print("✅ Génération Mason + scaffolding Android terminés (sans APK)")
+        finally:
+            log.close()
+
+        # Build APK unique, dédupliqué par le store (clé = arbre source + toolchain)
+        if build_apk and generated:
+            res = run_build_apk(run_id, app_dir)
+            if not res.get("success"):
+                print(f"⚠️ Build APK échoué: {res.get('error')}")
     else:
         # Mode simulation : créer les fichiers Flutter directement
         print("🔧 Mode simulation : génération directe des fichiers Flutter")
@@ -325,6 +438,8 @@ dependencies:
   go_router: ^14.2.0
   freezed_annotation: ^2.4.4
   json_annotation: ^4.9.0
+  http: ^1.2.1
+  sqflite: ^2.3.3
 dev_dependencies:
   flutter_test:
     sdk: flutter
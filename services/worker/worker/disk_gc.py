@@ -0,0 +1,391 @@
+"""
+Ramasse-miettes de WORK_DIR : quotas en octets et en nombre de runs, éviction LRU.
+
+Index SQLite `WORK_DIR/.gc/index.sqlite3` : taille, taille des intermédiaires
+et dernier accès de chaque `WORK_DIR/<run_id>`. Un passage (`tick`) ne parcourt
+pas tout l'arbre :
+- découverte : un `scandir` du premier niveau + stat de `journal.jsonl` (activité)
+- mesure : au plus `scan_batch` runs, ceux qui ont bougé ou dont la mesure est vieille
+- application des quotas sur les chiffres de l'index, du moins récemment utilisé
+  au plus récent, par paliers :
+    1. intermédiaires de build (build/, .dart_tool/, .gradle/) supprimés
+    2. run réduit à `artifacts/` (APK, source.zip, rapports), `logs/` (segments
+       compressés servis par /runs/{id}/logs) et au journal
+    3. en dernier recours, run supprimé : quota d'octets, ou plus de
+       `max_stripped_runs` runs déjà réduits (sinon leur nombre croît sans fin)
+  Un run actif depuis moins de `min_idle_s` n'est jamais touché.
+- caches partagés (`.apk_store`, `.scaffold_cache`, `.batch`) : budget d'octets
+  séparé (FORGE_GC_CACHE_MAX_BYTES), éviction LRU sur le mtime des entrées
+  (le store APK le rafraîchit à chaque réutilisation) ; un APK en cours de
+  build (verrou présent) n'est pas évincé.
+- uploads (`UPLOADS_DIR`, défaut WORK_DIR/uploads) : fichiers temporaires
+  orphelins de `tmp/`, et objets expirés si FORGE_GC_UPLOADS_TTL_S > 0, un
+  préfixe `objects/<xx>/` par passage.
+
+Les dossiers en `.` (caches, .gc, .runs) et les stores partagés (uploads, memory)
+ne sont pas des runs. Démon : `start_gc_daemon()` ; une passe : `python -m worker.disk_gc`.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+WORK_DIR = Path(os.environ.get("WORK_DIR", "./work"))
+INDEX_NAME = ".gc/index.sqlite3"
+RESERVED_DIRS = {"uploads", "memory"}
+KEEP_ENTRIES = {"artifacts", "logs", "journal.jsonl"}
+CACHE_DIRS = (".scaffold_cache", ".batch")  # une entrée = un sous-dossier
+INTERMEDIATE_DIRS = ("app/build", "app/.dart_tool", "app/android/.gradle",
+                     "app/android/build", "app/android/app/build")
+
+FULL, TRIMMED, ARTIFACTS_ONLY = "full", "trimmed", "artifacts"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    intermediate_bytes INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL,
+    scanned_at REAL NOT NULL DEFAULT 0,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    state TEXT NOT NULL DEFAULT 'full'
+);
+CREATE INDEX IF NOT EXISTS runs_lru ON runs(last_access);
+"""
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def dir_size(path: Path) -> int:
+    """Taille cumulée des fichiers (liens symboliques non suivis)."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _subdirs(path: Path) -> Iterator[os.DirEntry]:
+    try:
+        entries = list(os.scandir(path))
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield entry
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class WorkGC:
+    def __init__(self, work_dir: Optional[Path] = None, max_bytes: Optional[int] = None,
+                 max_runs: Optional[int] = None, min_idle_s: Optional[float] = None,
+                 scan_batch: int = 50, rescan_s: float = 3600.0,
+                 uploads_dir: Optional[Path] = None, uploads_tmp_ttl_s: float = 3600.0,
+                 uploads_ttl_s: Optional[float] = None, cache_max_bytes: Optional[int] = None,
+                 max_stripped_runs: Optional[int] = None):
+        self.work_dir = Path(work_dir or WORK_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("FORGE_GC_MAX_BYTES", 50 * 1024 ** 3)
+        self.max_runs = max_runs if max_runs is not None else _env_int("FORGE_GC_MAX_RUNS", 100)
+        self.max_stripped_runs = max_stripped_runs if max_stripped_runs is not None \
+            else _env_int("FORGE_GC_MAX_STRIPPED_RUNS", self.max_runs)
+        self.min_idle_s = min_idle_s if min_idle_s is not None else _env_int("FORGE_GC_MIN_IDLE_S", 3600)
+        self.scan_batch = scan_batch
+        self.rescan_s = rescan_s
+        self.uploads_dir = Path(uploads_dir or os.environ.get("UPLOADS_DIR", self.work_dir / "uploads"))
+        self.uploads_tmp_ttl_s = uploads_tmp_ttl_s
+        self.uploads_ttl_s = uploads_ttl_s if uploads_ttl_s is not None else _env_int("FORGE_GC_UPLOADS_TTL_S", 0)
+        self.cache_max_bytes = cache_max_bytes if cache_max_bytes is not None \
+            else _env_int("FORGE_GC_CACHE_MAX_BYTES", 20 * 1024 ** 3)
+        self.apk_store_dir = Path(os.environ.get("FORGE_APK_STORE", self.work_dir / ".apk_store"))
+        self._shard = 0
+        self._lock = threading.Lock()
+        index = self.work_dir / INDEX_NAME
+        index.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(index), timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+
+    # --- index ---
+    def touch(self, run_id: str, ts: Optional[float] = None, written: bool = False) -> None:
+        """
+        Signale un accès (lecture de log, téléchargement) : le run remonte dans la LRU.
+        `written` : le run a de nouveau produit des fichiers (reprise), il redevient complet.
+        """
+        ts = ts or time.time()
+        state = ", state = 'full'" if written else ""
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO runs(run_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET last_access = MAX(last_access, excluded.last_access), "
+                f"dirty = 1{state}",
+                (run_id, ts))
+
+    def _is_run_dir(self, entry: os.DirEntry) -> bool:
+        return entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".") \
+            and entry.name not in RESERVED_DIRS
+
+    def _activity(self, run_dir: Path, fallback: float) -> float:
+        try:
+            return max(fallback, (run_dir / "journal.jsonl").stat().st_mtime)
+        except FileNotFoundError:
+            return fallback
+
+    def discover(self) -> int:
+        """Premier niveau seulement : nouveaux runs, runs disparus, activité du journal."""
+        seen = set()
+        with self._lock:
+            known = {row[0]: row[1] for row in self.db.execute("SELECT run_id, last_access FROM runs")}
+        for entry in os.scandir(self.work_dir):
+            if not self._is_run_dir(entry):
+                continue
+            seen.add(entry.name)
+            # le mtime du dossier ne sert qu'à la découverte : l'éviction elle-même le modifie
+            fallback = known.get(entry.name) or entry.stat(follow_symlinks=False).st_mtime
+            activity = self._activity(Path(entry.path), fallback)
+            if entry.name not in known or activity > known[entry.name]:
+                self.touch(entry.name, activity, written=True)
+        gone = [run_id for run_id in known if run_id not in seen]
+        with self._lock:
+            self.db.executemany("DELETE FROM runs WHERE run_id = ?", [(r,) for r in gone])
+        return len(seen)
+
+    def _measure(self, run_id: str) -> None:
+        run_dir = self.work_dir / run_id
+        inter = sum(dir_size(run_dir / rel) for rel in INTERMEDIATE_DIRS)
+        with self._lock:
+            self.db.execute("UPDATE runs SET bytes = ?, intermediate_bytes = ?, scanned_at = ?, dirty = 0 "
+                            "WHERE run_id = ?", (dir_size(run_dir), inter, time.time(), run_id))
+
+    def scan(self, limit: Optional[int] = None) -> int:
+        """Mesure les runs modifiés ou à la mesure périmée, par lot."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT run_id FROM runs WHERE dirty = 1 OR scanned_at < ? ORDER BY dirty DESC, scanned_at LIMIT ?",
+                (time.time() - self.rescan_s, limit or self.scan_batch)).fetchall()
+        for (run_id,) in rows:
+            self._measure(run_id)
+        return len(rows)
+
+    def runs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            cur = self.db.execute("SELECT run_id, bytes, intermediate_bytes, last_access, state "
+                                  "FROM runs ORDER BY last_access")
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def _set_state(self, run_id: str, state: str) -> None:
+        with self._lock:
+            self.db.execute("UPDATE runs SET state = ? WHERE run_id = ?", (state, run_id))
+        self._measure(run_id)
+
+    # --- éviction ---
+    def trim_intermediates(self, run_id: str) -> None:
+        for rel in INTERMEDIATE_DIRS:
+            _remove(self.work_dir / run_id / rel)
+        self._set_state(run_id, TRIMMED)
+
+    def strip_to_artifacts(self, run_id: str) -> None:
+        run_dir = self.work_dir / run_id
+        for entry in os.scandir(run_dir):
+            if entry.name not in KEEP_ENTRIES:
+                _remove(Path(entry.path))
+        self._set_state(run_id, ARTIFACTS_ONLY)
+
+    def delete_run(self, run_id: str) -> None:
+        shutil.rmtree(self.work_dir / run_id, ignore_errors=True)
+        with self._lock:
+            self.db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def enforce(self) -> Dict[str, List[str]]:
+        """Applique les quotas à partir de l'index, run le moins récemment utilisé d'abord."""
+        actions: Dict[str, List[str]] = {"trimmed": [], "stripped": [], "deleted": []}
+        runs = self.runs()
+        idle = [r for r in runs if r["last_access"] < time.time() - self.min_idle_s]
+
+        def total() -> int:
+            with self._lock:
+                return self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM runs").fetchone()[0]
+
+        # quota en nombre : au-delà de max_runs runs complets, les plus anciens sont réduits
+        full = [r for r in runs if r["state"] != ARTIFACTS_ONLY]
+        excess = {r["run_id"] for r in full[:max(0, len(full) - self.max_runs)]}
+        for r in idle:
+            if r["run_id"] in excess:
+                self.strip_to_artifacts(r["run_id"])
+                r["state"] = ARTIFACTS_ONLY
+                actions["stripped"].append(r["run_id"])
+        # ... et au-delà de max_stripped_runs runs réduits, les plus anciens sont supprimés
+        stripped = [r for r in runs if r["state"] == ARTIFACTS_ONLY]
+        doomed = {r["run_id"] for r in stripped[:max(0, len(stripped) - self.max_stripped_runs)]}
+        for r in idle:
+            if r["run_id"] in doomed:
+                self.delete_run(r["run_id"])
+                actions["deleted"].append(r["run_id"])
+        idle = [r for r in idle if r["run_id"] not in doomed]
+
+        # quota en octets, par paliers
+        for r in idle:
+            if total() <= self.max_bytes:
+                return actions
+            if r["state"] == FULL and r["intermediate_bytes"]:
+                self.trim_intermediates(r["run_id"])
+                r["state"] = TRIMMED
+                actions["trimmed"].append(r["run_id"])
+        for r in idle:
+            if total() <= self.max_bytes:
+                return actions
+            if r["state"] != ARTIFACTS_ONLY:
+                self.strip_to_artifacts(r["run_id"])
+                r["state"] = ARTIFACTS_ONLY
+                actions["stripped"].append(r["run_id"])
+        for r in idle:
+            if total() <= self.max_bytes:
+                return actions
+            self.delete_run(r["run_id"])
+            actions["deleted"].append(r["run_id"])
+        return actions
+
+    # --- caches partagés ---
+    def cache_entries(self) -> List[Tuple[float, int, List[Path]]]:
+        """Entrées évictables des caches : (dernier usage, octets, chemins), plus ancienne d'abord."""
+        out: List[Tuple[float, int, List[Path]]] = []
+        for shard in _subdirs(self.apk_store_dir):
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".apk") or not entry.is_file():
+                    continue
+                apk = Path(entry.path)
+                if apk.with_suffix(".lock").exists():
+                    continue  # build en cours pour cette clé
+                meta = apk.with_suffix(".json")
+                size = entry.stat().st_size + (meta.stat().st_size if meta.exists() else 0)
+                out.append((entry.stat().st_mtime, size, [apk, meta]))
+        for name in CACHE_DIRS:
+            for entry in _subdirs(self.work_dir / name):
+                out.append((entry.stat().st_mtime, dir_size(Path(entry.path)), [Path(entry.path)]))
+        return sorted(out, key=lambda e: e[0])
+
+    def enforce_caches(self) -> List[str]:
+        """Évince les entrées de cache les moins récemment utilisées au-delà du budget."""
+        entries = self.cache_entries()
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.min_idle_s
+        evicted: List[str] = []
+        for last_used, size, paths in entries:
+            if total <= self.cache_max_bytes or last_used >= cutoff:
+                break
+            for path in paths:
+                _remove(path)
+            total -= size
+            evicted.append(paths[0].name)
+        return evicted
+
+    # --- uploads ---
+    def clean_uploads(self) -> int:
+        """Temporaires orphelins, puis objets expirés d'un préfixe `objects/<xx>/` par appel."""
+        removed = 0
+        now = time.time()
+        tmp = self.uploads_dir / "tmp"
+        if tmp.is_dir():
+            for entry in os.scandir(tmp):
+                if entry.is_file() and entry.stat().st_mtime < now - self.uploads_tmp_ttl_s:
+                    _remove(Path(entry.path))
+                    removed += 1
+        if self.uploads_ttl_s <= 0:
+            return removed
+        shard = self.uploads_dir / "objects" / f"{self._shard:02x}"
+        self._shard = (self._shard + 1) % 256
+        if not shard.is_dir():
+            return removed
+        for entry in os.scandir(shard):
+            if entry.name.endswith(".json") or not entry.is_file():
+                continue
+            st = entry.stat()
+            if max(st.st_atime, st.st_mtime) >= now - self.uploads_ttl_s:
+                continue
+            # objet, métadonnées et liens `<sha>.<ext>` servis sous /uploads
+            for link in self.uploads_dir.glob(f"{entry.name}.*"):
+                _remove(link)
+            _remove(Path(entry.path).with_suffix(".json"))
+            _remove(Path(entry.path))
+            removed += 1
+        return removed
+
+    def tick(self) -> Dict[str, Any]:
+        """Une passe incrémentale : découverte, mesure d'un lot, quotas, uploads."""
+        runs = self.discover()
+        scanned = self.scan()
+        actions = self.enforce()
+        uploads = self.clean_uploads()
+        caches = self.enforce_caches()
+        return {"runs": runs, "scanned": scanned, "uploads_removed": uploads, "cache_evicted": caches, **actions}
+
+    def close(self) -> None:
+        self.db.close()
+
+
+_gc: Optional[WorkGC] = None
+_daemon: Optional[threading.Thread] = None
+_gc_lock = threading.Lock()
+
+
+def get_gc() -> WorkGC:
+    global _gc
+    if _gc is None:
+        with _gc_lock:
+            if _gc is None:
+                _gc = WorkGC()
+    return _gc
+
+
+def _loop(gc: WorkGC, interval_s: float) -> None:
+    while True:
+        try:
+            gc.tick()
+        except Exception as e:
+            print(f"[gc] passe en échec: {e}")
+        time.sleep(interval_s)
+
+
+def start_gc_daemon(interval_s: Optional[float] = None) -> Optional[threading.Thread]:
+    """Lance la passe périodique dans un thread démon (une fois par process). FORGE_GC=0 la désactive."""
+    global _daemon
+    if os.environ.get("FORGE_GC", "1") == "0":
+        return None
+    gc = get_gc()
+    with _gc_lock:
+        if _daemon is None:
+            interval = interval_s or float(os.environ.get("FORGE_GC_INTERVAL_S", "60"))
+            _daemon = threading.Thread(target=_loop, args=(gc, interval), name="work-gc", daemon=True)
+            _daemon.start()
+    return _daemon
+
+
+if __name__ == "__main__":
+    print(get_gc().tick())
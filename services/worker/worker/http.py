@@ -1,18 +1,92 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from services.worker.agent_loop import agent_step
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from services.contracts.http_client import aclose_client
+from services.contracts.codec import JSON_MEDIA_TYPE, encode
+from services.contracts.streaming import NDJSON, encode_ndjson
+from .agent_loop import agent_step, agent_stream
+from .disk_gc import get_gc, start_gc_daemon
+from .logstore import open_log
+from .supervisor import cancel_run
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_gc_daemon()
+    try:
+        yield
+    finally:
+        await aclose_client()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+
 @app.post("/agent/step")
-def agent_step_route(req: Request):
-    data = req.json() if hasattr(req, 'json') else {}
-    conversation_id = data.get("conversation_id")
+async def agent_step_route(req: Request):
+    try:
+        data = await req.json()
+    except ValueError:
+        data = {}
+    conversation_id = data.get("conversation_id") if isinstance(data, dict) else None
+    if not conversation_id:
+        return JSONResponse(status_code=400, content={"error": "conversation_id required"})
+    messages = await agent_step(conversation_id)
+    return Response(encode({"messages": messages}), media_type=JSON_MEDIA_TYPE)
+
+@app.post("/agent/step/stream")
+async def agent_step_stream_route(req: Request):
+    """Messages de l'agent en NDJSON, envoyés au fil de l'eau."""
+    try:
+        data = await req.json()
+    except ValueError:
+        data = {}
+    conversation_id = data.get("conversation_id") if isinstance(data, dict) else None
     if not conversation_id:
         return JSONResponse(status_code=400, content={"error": "conversation_id required"})
-    messages = agent_step(conversation_id)
-    return {"messages": messages}
+
+    async def events():
+        try:
+            async for message in agent_stream(conversation_id):
+                yield encode_ndjson("message", message)
+        except Exception as e:
+            yield encode_ndjson("error", {"error": str(e)})
+        yield encode_ndjson("done")
+    return StreamingResponse(events(), media_type=NDJSON)
+
+@app.post("/runs/{run_id}/cancel")
+def cancel_run_route(run_id: str):
+    """Annule les process (mason, build APK) en cours pour ce run."""
+    signalled = cancel_run(run_id)
+    return {"run_id": run_id, "cancel_requested": True, "local_processes": signalled}
+
+def _open_log_or_404(run_id: str, name: str):
+    try:
+        reader = open_log(run_id, name)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="Log not found")
+    get_gc().touch(run_id)
+    return reader
+
+@app.get("/runs/{run_id}/logs/{name}")
+def get_run_log(run_id: str, name: str, start: Optional[int] = None, count: int = 200,
+                offset: Optional[int] = None, length: int = 65536):
+    """Plage de lignes (start/count), plage d'octets (offset/length) ou, par défaut, la fin du log."""
+    reader = _open_log_or_404(run_id, name)
+    if offset is not None:
+        return Response(reader.read_bytes(offset, length), media_type="text/plain; charset=utf-8")
+    if start is None:
+        start, lines = reader.tail(count)
+    else:
+        lines = reader.read_lines(start, count)
+    return {"run_id": run_id, "name": name, "start": start, "lines": lines, **reader.stats()}
+
+@app.get("/runs/{run_id}/logs/{name}/follow")
+def follow_run_log(run_id: str, name: str, start: Optional[int] = None, timeout_s: float = 1800):
+    """Suit le log (tail -f) jusqu'à sa fermeture."""
+    reader = _open_log_or_404(run_id, name)
+    lines = (line + "\n" for line in reader.follow(start, timeout_s=timeout_s))
+    return StreamingResponse(lines, media_type="text/plain; charset=utf-8")
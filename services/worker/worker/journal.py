@@ -0,0 +1,128 @@
+"""
+Journal d'étapes par run : `WORK_DIR/<run_id>/journal.jsonl`, en ajout seul.
+
+Une ligne JSON par événement, écrite d'un bloc puis fsync :
+- `run`    : en-tête, digest de la spec (une autre spec => journal repris à zéro)
+- `start`  : début d'une étape ; invalide l'étape et celles qui en dépendent
+- `finish` : fin d'étape, avec le patch d'état (résultat + clés modifiées) et
+             le digest sha256 de chaque sortie déclarée (fichier ou dossier)
+- `fail`   : exception non rattrapée par l'étape
+
+À la reprise, une étape terminée dont les sorties ont toujours le même digest
+est rejouée depuis le journal au lieu d'être recalculée. Une dernière ligne
+tronquée (crash pendant l'écriture) est ignorée.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+WORK_DIR = Path(os.environ.get("WORK_DIR", "./work"))
+JOURNAL_NAME = "journal.jsonl"
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def path_digest(path: Path) -> Optional[str]:
+    """sha256 d'un fichier, ou de l'arbre filtré d'un dossier (comme source.zip) ; None si absent.
+
+    Les fichiers réécrits par ``pub get`` sont exclus, comme pour la clé APK :
+    sinon l'étape de build invaliderait l'empreinte de ``app/`` au run suivant.
+    """
+    if path.is_file():
+        return file_digest(path)
+    if not path.is_dir():
+        return None
+    from .codegen import PUB_GENERATED_FILES, _iter_filtered_sources  # différé : codegen est lourd à importer
+    h = hashlib.sha256()
+    for rel, p in _iter_filtered_sources(path, exclude_files=PUB_GENERATED_FILES):
+        h.update(rel.encode("utf-8") + b"\0")
+        h.update(bytes.fromhex(file_digest(p)))
+    return h.hexdigest()
+
+
+class RunJournal:
+    def __init__(self, run_id: str, work_dir: Optional[Path] = None):
+        self.run_id = run_id
+        self.run_dir = Path(work_dir or WORK_DIR) / run_id
+        self.path = self.run_dir / JOURNAL_NAME
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def records(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        out = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue  # ligne tronquée par un crash
+        return out
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record = {"ts": time.time(), **record}
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def matches(self, spec_digest: Optional[str]) -> bool:
+        """True si le journal existe et a été ouvert pour cette spec."""
+        records = self.records()
+        return bool(records) and records[0].get("event") == "run" and records[0].get("spec_digest") == spec_digest
+
+    def open(self, spec_digest: Optional[str]) -> bool:
+        """Prépare le journal pour cette spec. Retourne True si un journal compatible existait."""
+        if self.matches(spec_digest):
+            return True
+        self.reset()
+        self._append({"event": "run", "run_id": self.run_id, "spec_digest": spec_digest})
+        return False
+
+    def start(self, stage: str) -> None:
+        self._append({"event": "start", "stage": stage})
+
+    def finish(self, stage: str, patch: Dict[str, Any], outputs: Iterable[str]) -> None:
+        digests = {rel: path_digest(self.run_dir / rel) for rel in outputs}
+        self._append({"event": "finish", "stage": stage, "patch": patch, "outputs": digests})
+
+    def fail(self, stage: str, error: str) -> None:
+        self._append({"event": "fail", "stage": stage, "error": error})
+
+    def completed(self, downstream: Callable[[str], Iterable[str]]) -> Dict[str, Dict[str, Any]]:
+        """Dernier `finish` valide par étape ; relancer une étape invalide aussi son aval."""
+        done: Dict[str, Dict[str, Any]] = {}
+        for rec in self.records():
+            stage = rec.get("stage")
+            if rec.get("event") == "start":
+                done.pop(stage, None)
+                for name in downstream(stage):
+                    done.pop(name, None)
+            elif rec.get("event") == "finish":
+                done[stage] = rec
+        return done
+
+    def verify(self, record: Dict[str, Any]) -> bool:
+        """Les sorties enregistrées sont-elles toujours là, à l'identique ?"""
+        return all(path_digest(self.run_dir / rel) == digest for rel, digest in record["outputs"].items())
@@ -0,0 +1,270 @@
+"""
+Logs de build compressés, segmentés et indexés.
+
+Un log est un dossier `WORK_DIR/<run_id>/logs/<name>/` :
+- `seg-000000.log.zst` / `.log.gz` : segments scellés (zstd si disponible, sinon gzip)
+- `seg-00000N.log`                 : segment actif en clair (lisible pendant l'écriture)
+- `index.json`                     : première ligne / premier octet de chaque segment,
+                                     points de reprise (offset tous les N lignes), état fermé
+
+Le résultat d'une étape ne garde que `LogWriter.ref()` ; le contenu se lit par
+plage de lignes ou d'octets, ou en suivant la fin (`LogReader.follow`).
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle
+    zstandard = None
+
+WORK_DIR = Path(os.environ.get("WORK_DIR", "./work"))
+SEGMENT_BYTES = 4 * 1024 * 1024
+CHECKPOINT_LINES = 1000
+DEFAULT_CODEC = "zstd" if zstandard else "gzip"
+_EXT = {"zstd": ".zst", "gzip": ".gz"}
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def run_log_dir(run_id: str, name: str) -> Path:
+    if not _NAME_RE.match(run_id) or not _NAME_RE.match(name) or ".." in (run_id + name):
+        raise ValueError(f"nom de log invalide: {run_id}/{name}")
+    return WORK_DIR / run_id / "logs" / name
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, filename: str) -> bytes:
+    if filename.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("segment zstd mais le module zstandard est absent")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if filename.endswith(".gz"):
+        return gzip.decompress(data)
+    return data
+
+
+def _write_json_atomic(path: Path, obj: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(obj), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class LogWriter:
+    """Écrit un log ligne par ligne ; utilisable comme abonné du superviseur."""
+
+    def __init__(self, log_dir: Path, segment_bytes: int = SEGMENT_BYTES,
+                 codec: Optional[str] = None, checkpoint_lines: int = CHECKPOINT_LINES):
+        self.dir = Path(log_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.codec = codec or DEFAULT_CODEC
+        self.checkpoint_lines = checkpoint_lines
+        self._segments: List[Dict[str, Any]] = []
+        self._lines = 0
+        self._bytes = 0
+        self._active = None
+        self._closed = False
+        self._open_active()
+
+    # --- API publique ---
+    def write(self, line: str) -> None:
+        data = line.encode("utf-8", errors="replace")
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        self._active.write(data)
+        self._active.flush()
+        self._active_lines += 1
+        self._active_bytes += len(data)
+        self._lines += 1
+        self._bytes += len(data)
+        if self._active_lines % self.checkpoint_lines == 0:
+            self._checkpoints.append(self._active_bytes)
+        if self._active_bytes >= self.segment_bytes:
+            self._rotate()
+
+    def subscriber(self, stream: str, line: str) -> None:
+        self.write(line)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        old = self._seal()
+        self._closed = True
+        self._write_index()
+        old.unlink()
+
+    def ref(self) -> Dict[str, Any]:
+        """Référence légère à stocker dans le résultat d'étape."""
+        return {
+            "log_dir": str(self.dir),
+            "lines": self._lines,
+            "bytes": self._bytes,
+            "segments": len(self._segments) + (0 if self._closed else 1),
+            "codec": self.codec,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # --- interne ---
+    def _open_active(self) -> None:
+        self._active_name = f"seg-{len(self._segments):06d}.log"
+        self._active = open(self.dir / self._active_name, "wb")
+        self._active_first_line = self._lines
+        self._active_first_byte = self._bytes
+        self._active_lines = 0
+        self._active_bytes = 0
+        self._checkpoints = [0]
+        self._write_index()
+
+    def _seal(self) -> Path:
+        """Ferme et compresse le segment actif. Retourne le chemin en clair à supprimer."""
+        self._active.close()
+        plain = self.dir / self._active_name
+        if self._active_lines:
+            name = self._active_name + _EXT[self.codec]
+            (self.dir / name).write_bytes(_compress(plain.read_bytes(), self.codec))
+            self._segments.append({
+                "file": name,
+                "first_line": self._active_first_line,
+                "lines": self._active_lines,
+                "first_byte": self._active_first_byte,
+                "bytes": self._active_bytes,
+                "checkpoints": self._checkpoints,
+            })
+        return plain
+
+    def _rotate(self) -> None:
+        old = self._seal()
+        self._open_active()
+        # suppression après publication de l'index : un lecteur ne voit jamais de trou
+        old.unlink()
+
+    def _write_index(self) -> None:
+        active = None
+        if not self._closed:
+            active = {
+                "file": self._active_name,
+                "first_line": self._active_first_line,
+                "first_byte": self._active_first_byte,
+            }
+        _write_json_atomic(self.dir / "index.json", {
+            "codec": self.codec,
+            "checkpoint_lines": self.checkpoint_lines,
+            "segments": self._segments,
+            "active": active,
+            "closed": self._closed,
+        })
+
+
+class LogReader:
+    def __init__(self, log_dir: Path):
+        self.dir = Path(log_dir)
+        if not (self.dir / "index.json").exists():
+            raise FileNotFoundError(f"log introuvable: {self.dir}")
+
+    def _index(self) -> Dict[str, Any]:
+        return json.loads((self.dir / "index.json").read_text(encoding="utf-8"))
+
+    def _snapshot(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Index + segments (le segment actif est complété avec ses compteurs)."""
+        for _ in range(5):
+            index = self._index()
+            segments = list(index["segments"])
+            active = index.get("active")
+            if not active:
+                return index, segments
+            try:
+                data = (self.dir / active["file"]).read_bytes()
+            except FileNotFoundError:
+                continue  # rotation en cours : on relit l'index
+            end = data.rfind(b"\n") + 1  # ignore une ligne partielle
+            segments.append({**active, "lines": data.count(b"\n", 0, end), "bytes": end,
+                             "data": data[:end], "checkpoints": [0]})
+            return index, segments
+        raise RuntimeError(f"index de log instable: {self.dir}")
+
+    def _segment_data(self, seg: Dict[str, Any]) -> bytes:
+        if "data" in seg:
+            return seg["data"]
+        return _decompress((self.dir / seg["file"]).read_bytes(), seg["file"])
+
+    def stats(self) -> Dict[str, Any]:
+        index, segments = self._snapshot()
+        lines = sum(s["lines"] for s in segments)
+        size = sum(s["bytes"] for s in segments)
+        return {"lines": lines, "bytes": size, "segments": len(segments), "closed": index["closed"]}
+
+    def read_lines(self, start: int = 0, count: int = 200) -> List[str]:
+        index, segments = self._snapshot()
+        step = index.get("checkpoint_lines", CHECKPOINT_LINES)
+        out: List[str] = []
+        end = start + count
+        for seg in segments:
+            first, n = seg["first_line"], seg["lines"]
+            if first + n <= start or first >= end:
+                continue
+            data = self._segment_data(seg)
+            local = max(start - first, 0)
+            cp = min(local // step, len(seg["checkpoints"]) - 1)
+            skip = local - cp * step
+            chunk = data[seg["checkpoints"][cp]:].split(b"\n")[:-1]
+            wanted = chunk[skip:skip + (end - max(start, first))]
+            out.extend(l.decode("utf-8", errors="replace") for l in wanted)
+            if len(out) >= count:
+                break
+        return out[:count]
+
+    def read_bytes(self, offset: int = 0, length: int = 65536) -> bytes:
+        _, segments = self._snapshot()
+        out = bytearray()
+        end = offset + length
+        for seg in segments:
+            first, size = seg["first_byte"], seg["bytes"]
+            if first + size <= offset or first >= end:
+                continue
+            data = self._segment_data(seg)
+            out += data[max(offset - first, 0):end - first]
+        return bytes(out)
+
+    def tail(self, n: int = 200) -> Tuple[int, List[str]]:
+        """Retourne (numéro de la première ligne, n dernières lignes)."""
+        total = self.stats()["lines"]
+        start = max(total - n, 0)
+        return start, self.read_lines(start, n)
+
+    def follow(self, start: Optional[int] = None, poll_s: float = 0.5,
+               timeout_s: Optional[float] = None) -> Iterator[str]:
+        """Génère les lignes à partir de `start` (fin du log par défaut) jusqu'à la fermeture."""
+        pos = self.stats()["lines"] if start is None else start
+        deadline = time.monotonic() + timeout_s if timeout_s else None
+        while True:
+            stats = self.stats()
+            if stats["lines"] > pos:
+                for line in self.read_lines(pos, stats["lines"] - pos):
+                    pos += 1
+                    yield line
+                continue
+            if stats["closed"] or (deadline and time.monotonic() > deadline):
+                return
+            time.sleep(poll_s)
+
+
+def open_log(run_id: str, name: str) -> LogReader:
+    return LogReader(run_log_dir(run_id, name))
@@ -1,27 +1,181 @@
-from celery import Celery
+"""
+Application Celery du worker : le pipeline découpé en tâches par groupe d'étapes.
+
+    pipeline.spec ─┬─ pipeline.build  (file `build`) ─┬─ pipeline.finalize
+                   └─ pipeline.checks (file `spec`)  ─┘
+
+- file `spec` : étapes rapides (validation, critic, codegen, schémas, rapports),
+  forte concurrence ; file `build` : build APK (Docker/Gradle), peu de slots.
+  Les nœuds de build se dimensionnent indépendamment : `python -m worker.main build`.
+- clé idempotente `<run_id>:<groupe>` utilisée comme task_id : une tâche
+  relivrée (acks_late) ou un run resoumis dont le groupe a déjà réussi renvoie
+  le résultat stocké dans le backend au lieu de rejouer l'étape. Ces résultats
+  sont oubliés quand le run est resoumis sans reprise ou avec une autre spec.
+  À l'intérieur d'un groupe, le journal du run (worker/journal.py) fait
+  reprendre un groupe interrompu à sa première étape incomplète.
+- les nœuds spec et build se passent l'état par WORK_DIR : ils doivent monter
+  le même volume (voir infra/docker-compose.yml).
+- FORGE_CELERY_EAGER=1 : tout s'exécute dans le process appelant (tests, dev),
+  résultats conservés en mémoire.
+"""
 import os
-import uvicorn
-from services.worker.http import app
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+from celery import Celery, chord
+from celery.signals import worker_ready
+from celery.result import AsyncResult
+from kombu import Queue
+
+from . import pipeline
+from .disk_gc import start_gc_daemon
+from .journal import RunJournal
+
+SPEC_QUEUE = "spec"
+BUILD_QUEUE = "build"
+GROUPS = ("spec", "build", "checks", "finalize")
+
+# Réglages par file : un worker ne consomme qu'une file (voir worker_argv).
+# Build : prefetch 1 pour qu'une tâche longue ne garde pas les suivantes en otage.
+QUEUES: Dict[str, Dict[str, int]] = {
+    SPEC_QUEUE: {
+        "concurrency": int(os.getenv("FORGE_SPEC_CONCURRENCY", "8")),
+        "prefetch_multiplier": int(os.getenv("FORGE_SPEC_PREFETCH", "4")),
+    },
+    BUILD_QUEUE: {
+        "concurrency": int(os.getenv("FORGE_BUILD_CONCURRENCY", "1")),
+        "prefetch_multiplier": 1,
+    },
+}
+
+EAGER = os.getenv("FORGE_CELERY_EAGER", "0") == "1"
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
 # Configuration Celery
 app = Celery('forge_worker')
 
 # Configuration depuis les variables d'environnement
 app.conf.update(
-    broker_url=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
-    result_backend=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+    broker_url=REDIS_URL,
+    result_backend="cache+memory://" if EAGER else REDIS_URL,
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    task_queues=(Queue(SPEC_QUEUE), Queue(BUILD_QUEUE)),
+    task_default_queue=SPEC_QUEUE,
+    task_routes={"pipeline.build": {"queue": BUILD_QUEUE}},
+    # acquittement après exécution : une tâche perdue avec son worker est relivrée,
+    # la clé idempotente évite de rejouer un groupe déjà terminé
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    task_track_started=True,
+    result_extended=True,
+    result_expires=7 * 24 * 3600,
+    task_always_eager=EAGER,
+    task_eager_propagates=True,
+    task_store_eager_result=EAGER,
 )
 
+
+def stage_key(run_id: str, group: str) -> str:
+    return f"{run_id}:{group}"
+
+
+def forget_results(run_id: str) -> None:
+    """Efface les résultats stockés sous les clés du run : le prochain passage recalcule."""
+    for group in GROUPS:
+        AsyncResult(stage_key(run_id, group), app=app).forget()
+
+
+def _once(run_id: str, group: str, fn: Callable[[], Any]) -> Any:
+    """Exécute un groupe une seule fois par run : relivraison ou resoumission
+    renvoient le résultat du passage réussi, stocké sous la clé run_id:groupe."""
+    done = AsyncResult(stage_key(run_id, group), app=app)
+    if done.state == "SUCCESS":
+        return done.result
+    return fn()
+
+
+def _stages_task(group: str, names: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        return _once(state["run_id"], group, lambda: pipeline.run_stages(state, names))
+    return run
+
+
+spec_stages = app.task(name="pipeline.spec")(_stages_task("spec", pipeline.SPEC_STAGES))
+build_stages = app.task(name="pipeline.build")(_stages_task("build", pipeline.BUILD_STAGES))
+check_stages = app.task(name="pipeline.checks")(_stages_task("checks", pipeline.CHECK_STAGES))
+
+
+def merge_states(states: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fusionne les états renvoyés par les branches parallèles du chord."""
+    merged = dict(states[0])
+    merged["steps"] = dict(merged["steps"])
+    merged["timings"] = dict(merged.get("timings", {}))
+    for other in states[1:]:
+        merged["steps"].update(other["steps"])
+        merged["timings"].update(other.get("timings", {}))
+        if other.get("error"):
+            merged["error"] = other["error"]
+    return merged
+
+
+@app.task(name="pipeline.finalize")
+def finalize(states: List[Dict[str, Any]]) -> Dict[str, Any]:
+    state = merge_states(states)
+    return _once(state["run_id"], "finalize",
+                 lambda: pipeline.finish_pipeline(pipeline.run_stages(state, pipeline.FINALIZE_STAGES)))
+
+
+def pipeline_signature(run_id: str, spec_path: str, dry_run: bool = True):
+    """Canvas complet du run : spec, puis build et checks en parallèle, puis finalize."""
+    key = lambda group: stage_key(run_id, group)  # noqa: E731
+    return (
+        spec_stages.si(pipeline.new_state(run_id, spec_path, dry_run)).set(task_id=key("spec"))
+        | chord(
+            [build_stages.s().set(task_id=key("build")), check_stages.s().set(task_id=key("checks"))],
+            finalize.s().set(task_id=key("finalize")),
+        )
+    )
+
+
+def submit_pipeline(run_id: str, spec_path: str, dry_run: bool = True, resume: bool = True) -> AsyncResult:
+    """
+    Lance le run ; le résultat final est celui de la tâche `<run_id>:finalize`.
+    Chaque groupe reprend à la première étape incomplète du journal du run.
+    Sans reprise, ou si la spec a changé depuis le journal, les résultats
+    stockés sous `<run_id>:<groupe>` sont oubliés avant de relancer.
+    """
+    if not resume or not RunJournal(run_id).matches(pipeline.spec_digest(spec_path)):
+        forget_results(run_id)
+    pipeline.prepare_resume(run_id, resume)
+    return pipeline_signature(run_id, spec_path, dry_run).apply_async()
+
+
 @app.task(name="run_pipeline")
-def run_pipeline_task(run_id: str, spec_path: str, dry_run: bool = True):
-    """Tâche Celery pour exécuter le pipeline de génération"""
-    from .pipeline import run_pipeline
-    return run_pipeline(run_id, spec_path, dry_run)
+def run_pipeline_task(run_id: str, spec_path: str, dry_run: bool = True) -> str:
+    """Point d'entrée historique : distribue le run et renvoie l'id de la tâche finale."""
+    return submit_pipeline(run_id, spec_path, dry_run).id
+
+
+@worker_ready.connect
+def _start_work_gc(**_: Any) -> None:
+    # les nœuds de build sont ceux qui remplissent le disque
+    start_gc_daemon()
+
+
+def worker_argv(queue: str) -> List[str]:
+    """Arguments `celery worker` pour un nœud dédié à une file."""
+    opts = QUEUES[queue]
+    return [
+        "worker", "-Q", queue, "-n", f"{queue}@%h", "--loglevel=info",
+        f"--concurrency={opts['concurrency']}",
+        f"--prefetch-multiplier={opts['prefetch_multiplier']}",
+    ]
+
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    # python -m worker.main spec|build
+    app.worker_main(worker_argv(sys.argv[1] if len(sys.argv) > 1 else SPEC_QUEUE))
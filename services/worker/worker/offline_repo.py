@@ -0,0 +1,603 @@
+"""
+Couche de données offline-first de l'application générée (lib/data/).
+
+Une classe OfflineRepository par entité :
+- lectures servies par un cache SQLite local (sqflite) créé depuis
+  artifacts/db_schema.sql, rafraîchi en arrière-plan quand il est périmé ;
+- rafraîchissement complet depuis l'endpoint de liste OpenAPI de l'entité
+  (`GET /<entité>s?limit=&page=`, ou `cursor=` si le serveur renvoie
+  next_cursor) : next_cursor est un curseur de pagination, pas un flux de
+  changements, il ne sert qu'à l'intérieur d'un parcours ; chaque sync relit
+  toutes les pages, met à jour les lignes vues et retire celles que le serveur
+  n'a plus (hors écritures locales en attente) ;
+- écritures locales immédiates, envoyées à l'API par une file persistante
+  (table _outbox) rejouée dans l'ordre, avec reprise après coupure réseau.
+
+Les fichiers sont écrits sous artifacts/offline_repo/lib/data puis copiés dans
+l'application par l'étape codegen (install_offline_layer).
+"""
+import hashlib
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .api_contracts import DART_HEADER, _write_if_changed
+
+OFFLINE_DIR = "offline_repo"
+DEFAULT_BASE_URL = "http://10.0.2.2:8000"
+
+
+def sql_statements(sql: str) -> List[str]:
+    """Instructions d'un script SQL (commentaires `--` retirés), une par entrée."""
+    body = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+    return [stmt.strip() for stmt in body.split(";") if stmt.strip()]
+
+
+def column_name(field_name: str) -> str:
+    """Nom de colonne tel qu'écrit par db_schema.render_sql."""
+    return field_name.lower().replace(' ', '_')
+
+
+def field_columns(entity: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Clé JSON de l'API -> colonne SQLite, pour chaque champ de l'entité.
+
+    render_openapi garde le nom du champ tel quel comme propriété (`partySize`),
+    render_sql le met en minuscules (`partysize`) : le dépôt traduit dans les
+    deux sens.
+    """
+    return {f['name']: column_name(f['name']) for f in entity.get('fields', [])}
+
+
+def _dart_map(mapping: Dict[str, str]) -> str:
+    return "{" + ", ".join(f"'{k}': '{v}'" for k, v in mapping.items()) + "}"
+
+
+def _dart_identifier(name: str) -> str:
+    parts = re.split(r"[^0-9A-Za-z]+", name)
+    ident = "".join(p[:1].upper() + p[1:] for p in parts if p)
+    return ident[:1].lower() + ident[1:]
+
+
+def list_paths(openapi: Dict[str, Any]) -> Dict[str, str]:
+    """Endpoint de liste (GET sans {id}) par tag d'entité."""
+    paths = {}
+    for path, methods in openapi.get("paths", {}).items():
+        get = methods.get("get")
+        if get and "{" not in path and get.get("tags") and get["tags"][0] != "system":
+            paths[get["tags"][0]] = path
+    return paths
+
+
+DART_LOCAL_DB = """
+import 'package:sqflite/sqflite.dart';
+
+import 'schema.dart';
+
+/// Colonnes de synchronisation ajoutées à chaque table du cache.
+const _syncColumns = <String>[
+  '_id TEXT',
+  '_dirty INTEGER NOT NULL DEFAULT 0',
+  '_deleted INTEGER NOT NULL DEFAULT 0',
+  '_seen INTEGER',
+];
+
+/// Cache SQLite local : tables de db_schema.sql, file d'écritures, état de sync.
+class LocalDatabase {
+  LocalDatabase._(this.db);
+
+  final Database db;
+
+  static Future<LocalDatabase> open({String name = 'forge_cache.db'}) async {
+    final db = await openDatabase(
+      '${await getDatabasesPath()}/$name',
+      version: schemaVersion,
+      onCreate: (db, _) => _create(db),
+      // Nouveau schéma : le cache est reconstruit (il se resynchronise),
+      // la file d'écritures en attente est conservée.
+      onUpgrade: (db, _, __) => _rebuild(db),
+      onDowngrade: (db, _, __) => _rebuild(db),
+    );
+    return LocalDatabase._(db);
+  }
+
+  static Future<void> _create(Database db) async {
+    final batch = db.batch();
+    for (final sql in schemaStatements) {
+      batch.execute(sql);
+    }
+    for (final table in cachedTables) {
+      for (final column in _syncColumns) {
+        batch.execute('ALTER TABLE "$table" ADD COLUMN $column');
+      }
+      batch.execute('CREATE UNIQUE INDEX "${table}__id" ON "$table"(_id)');
+    }
+    batch.execute('CREATE TABLE IF NOT EXISTS _outbox ('
+        'seq INTEGER PRIMARY KEY AUTOINCREMENT, entity TEXT NOT NULL, method TEXT NOT NULL, '
+        'local_id TEXT NOT NULL, path TEXT NOT NULL, body TEXT, attempts INTEGER NOT NULL DEFAULT 0)');
+    batch.execute('CREATE TABLE IF NOT EXISTS _sync_state ('
+        'entity TEXT PRIMARY KEY, synced_at TEXT)');
+    await batch.commit(noResult: true);
+  }
+
+  static Future<void> _rebuild(Database db) async {
+    final batch = db.batch();
+    for (final table in cachedTables) {
+      batch.execute('DROP TABLE IF EXISTS "$table"');
+    }
+    batch.execute('DROP TABLE IF EXISTS _sync_state');
+    await batch.commit(noResult: true);
+    await _create(db);
+  }
+}
+"""
+
+DART_OUTBOX = """
+import 'dart:async';
+import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+import 'package:sqflite/sqflite.dart';
+
+/// File persistante des écritures (table _outbox), rejouée dans l'ordre vers
+/// l'API. Une erreur réseau ou 5xx arrête la file et la relance plus tard
+/// (délai doublé jusqu'à 5 min) ; une 4xx retire l'écriture rejetée.
+class Outbox {
+  Outbox(this.db, this.client, this.baseUrl);
+
+  final Database db;
+  final http.Client client;
+  final String baseUrl;
+
+  Timer? _periodic;
+  Timer? _retry;
+  Future<void>? _flushing;
+  Duration _backoff = const Duration(seconds: 2);
+
+  Future<void> enqueue(
+    DatabaseExecutor txn, {
+    required String entity,
+    required String method,
+    required String localId,
+    required String path,
+    Map<String, dynamic>? body,
+  }) {
+    return txn.insert('_outbox', {
+      'entity': entity,
+      'method': method,
+      'local_id': localId,
+      'path': path,
+      'body': body == null ? null : jsonEncode(body),
+    });
+  }
+
+  void start({Duration every = const Duration(seconds: 30)}) {
+    _periodic ??= Timer.periodic(every, (_) => flush());
+  }
+
+  void stop() {
+    _periodic?.cancel();
+    _retry?.cancel();
+    _periodic = null;
+    _retry = null;
+  }
+
+  Future<int> pending() async {
+    return Sqflite.firstIntValue(await db.rawQuery('SELECT COUNT(*) FROM _outbox')) ?? 0;
+  }
+
+  /// Vide la file ; un seul envoi à la fois, les appels concurrents attendent le même.
+  Future<void> flush() => _flushing ??= _drain().whenComplete(() => _flushing = null);
+
+  Future<void> _drain() async {
+    while (true) {
+      final rows = await db.query('_outbox', orderBy: 'seq', limit: 1);
+      if (rows.isEmpty) {
+        _backoff = const Duration(seconds: 2);
+        return;
+      }
+      final op = Map<String, Object?>.of(rows.first); // lignes de query en lecture seule
+      http.Response response;
+      try {
+        response = await _send(op);
+      } catch (_) {
+        _retryLater(op);
+        return;
+      }
+      if (response.statusCode >= 500 || response.statusCode == 429) {
+        _retryLater(op);
+        return;
+      }
+      await db.transaction((txn) async {
+        final ok = response.statusCode < 300;
+        if (ok && op['method'] == 'POST') {
+          final id = (jsonDecode(response.body) as Map<String, dynamic>)['id'];
+          if (id != null) {
+            await _adoptRemoteId(txn, op, '$id');
+          }
+        }
+        await txn.delete('_outbox', where: 'seq = ?', whereArgs: [op['seq']]);
+        await _settle(txn, op, ok);
+      });
+    }
+  }
+
+  Future<http.Response> _send(Map<String, Object?> op) {
+    final uri = Uri.parse('$baseUrl${op['path']}');
+    const headers = {'Content-Type': 'application/json', 'Accept': 'application/json'};
+    final body = op['body'] as String?;
+    switch (op['method']) {
+      case 'POST':
+        return client.post(uri, headers: headers, body: body);
+      case 'PUT':
+        return client.put(uri, headers: headers, body: body);
+      default:
+        return client.delete(uri, headers: headers);
+    }
+  }
+
+  /// Le serveur a attribué un identifiant : la ligne et les écritures suivantes le reprennent.
+  Future<void> _adoptRemoteId(Transaction txn, Map<String, Object?> op, String remoteId) async {
+    final localId = op['local_id'] as String;
+    await txn.update('"${op['entity']}"', {'_id': remoteId}, where: '_id = ?', whereArgs: [localId]);
+    await txn.rawUpdate(
+      'UPDATE _outbox SET local_id = ?, path = replace(path, ?, ?) WHERE local_id = ?',
+      [remoteId, localId, remoteId, localId],
+    );
+    op['local_id'] = remoteId;
+  }
+
+  /// Plus d'écriture en attente pour la ligne : elle redevient propre (ou disparaît si supprimée).
+  Future<void> _settle(Transaction txn, Map<String, Object?> op, bool ok) async {
+    final id = op['local_id'];
+    final table = '"${op['entity']}"';
+    final more = Sqflite.firstIntValue(
+        await txn.rawQuery('SELECT COUNT(*) FROM _outbox WHERE local_id = ?', [id]));
+    if ((more ?? 0) > 0) {
+      return;
+    }
+    if (op['method'] == 'DELETE' && ok) {
+      await txn.delete(table, where: '_id = ?', whereArgs: [id]);
+    } else {
+      await txn.update(table, {'_dirty': 0}, where: '_id = ?', whereArgs: [id]);
+    }
+  }
+
+  void _retryLater(Map<String, Object?> op) {
+    db.rawUpdate('UPDATE _outbox SET attempts = attempts + 1 WHERE seq = ?', [op['seq']]);
+    _retry?.cancel();
+    _retry = Timer(_backoff, flush);
+    final next = _backoff * 2;
+    _backoff = next > const Duration(minutes: 5) ? const Duration(minutes: 5) : next;
+  }
+}
+"""
+
+DART_REPOSITORY = """
+import 'dart:async';
+import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+import 'package:sqflite/sqflite.dart';
+
+import 'outbox.dart';
+
+/// Accès offline-first à une table : lectures locales, rafraîchissement par
+/// parcours des pages de l'API, écritures locales puis envoyées par l'[Outbox].
+class OfflineRepository {
+  OfflineRepository({
+    required this.db,
+    required this.outbox,
+    required this.client,
+    required this.baseUrl,
+    required this.table,
+    required this.fields,
+    this.boolFields = const {},
+    this.path,
+    this.pageSize = 100,
+    this.maxAge = const Duration(minutes: 5),
+  });
+
+  final Database db;
+  final Outbox outbox;
+  final http.Client client;
+  final String baseUrl;
+  final String table;
+
+  /// Clé JSON de l'API (propriété OpenAPI) -> colonne SQLite (db_schema.sql).
+  final Map<String, String> fields;
+
+  /// Clés JSON booléennes, stockées 0/1 en SQLite.
+  final Set<String> boolFields;
+
+  /// Endpoint de liste de l'API ; null : entité locale uniquement.
+  final String? path;
+  final int pageSize;
+  final Duration maxAge;
+
+  Future<int>? _syncing;
+  int _localSeq = 0;
+
+  /// Objets du cache (clés de l'API, plus `id`), tout de suite ; le cache est
+  /// rafraîchi en arrière-plan s'il est périmé.
+  Future<List<Map<String, dynamic>>> all({
+    String? where,
+    List<Object?>? whereArgs,
+    String? orderBy,
+    int? limit,
+    int? offset,
+  }) async {
+    unawaited(_syncIfStale());
+    final rows = await db.query(
+      '"$table"',
+      where: where == null ? '_deleted = 0' : '_deleted = 0 AND ($where)',
+      whereArgs: whereArgs,
+      orderBy: orderBy,
+      limit: limit,
+      offset: offset,
+    );
+    return [for (final row in rows) {'id': row['_id'], ..._toJson(row)}];
+  }
+
+  Future<Map<String, dynamic>?> byId(String id) async {
+    final rows = await db.query('"$table"', where: '_id = ? AND _deleted = 0', whereArgs: [id], limit: 1);
+    return rows.isEmpty ? null : {'id': rows.first['_id'], ..._toJson(rows.first)};
+  }
+
+  /// Enregistre localement puis met l'envoi en file ; retourne l'identifiant
+  /// (provisoire pour une création, remplacé par celui du serveur à l'envoi).
+  /// [values] a les clés de l'API ; le corps envoyé est relu de la ligne.
+  Future<String> save(Map<String, dynamic> values, {String? id}) async {
+    final localId = id ?? 'local-${DateTime.now().microsecondsSinceEpoch}-${_localSeq++}';
+    final row = _toRow(values);
+    await db.transaction((txn) async {
+      await txn.insert(
+        '"$table"',
+        {...row, '_id': localId, '_dirty': 1, '_deleted': 0},
+        conflictAlgorithm: ConflictAlgorithm.replace,
+      );
+      if (path != null) {
+        await outbox.enqueue(txn,
+            entity: table,
+            method: id == null ? 'POST' : 'PUT',
+            localId: localId,
+            path: id == null ? path! : '$path/$localId',
+            body: _toJson(row));
+      }
+    });
+    unawaited(outbox.flush());
+    return localId;
+  }
+
+  Future<void> delete(String id) async {
+    await db.transaction((txn) async {
+      if (path == null) {
+        await txn.delete('"$table"', where: '_id = ?', whereArgs: [id]);
+        return;
+      }
+      await txn.update('"$table"', {'_deleted': 1, '_dirty': 1}, where: '_id = ?', whereArgs: [id]);
+      await outbox.enqueue(txn, entity: table, method: 'DELETE', localId: id, path: '$path/$id');
+    });
+    unawaited(outbox.flush());
+  }
+
+  /// Relit toutes les pages de l'endpoint de liste et aligne le cache : lignes
+  /// vues insérées ou mises à jour, lignes absentes côté serveur supprimées.
+  /// Les lignes modifiées localement et pas encore envoyées ne sont pas touchées.
+  /// Un parcours interrompu (réseau) ne supprime rien. Retourne le nombre d'objets reçus.
+  Future<int> sync() => _syncing ??= _sync().whenComplete(() => _syncing = null);
+
+  Future<void> _syncIfStale() async {
+    if (path == null) {
+      return;
+    }
+    final state = await db.query('_sync_state', where: 'entity = ?', whereArgs: [table]);
+    final syncedAt = state.isEmpty ? null : DateTime.tryParse('${state.first['synced_at']}');
+    if (syncedAt != null && DateTime.now().toUtc().difference(syncedAt) < maxAge) {
+      return;
+    }
+    try {
+      await sync();
+    } catch (_) {
+      // hors ligne : le cache reste servi tel quel
+    }
+  }
+
+  Future<int> _sync() async {
+    if (path == null) {
+      return 0;
+    }
+    // Marque de ce parcours : les lignes qui ne l'ont pas à la fin ont disparu du serveur
+    final mark = DateTime.now().microsecondsSinceEpoch;
+    String? cursor;
+    var page = 1;
+    var received = 0;
+    while (true) {
+      final uri = Uri.parse('$baseUrl$path').replace(queryParameters: {
+        'limit': '$pageSize',
+        if (cursor != null) 'cursor': cursor else 'page': '$page',
+      });
+      final response = await client.get(uri, headers: {'Accept': 'application/json'});
+      if (response.statusCode != 200) {
+        throw Exception('Erreur sync $table: ${response.statusCode}');
+      }
+      final data = jsonDecode(response.body) as Map<String, dynamic>;
+      final items = (data['data'] as List).cast<Map<String, dynamic>>();
+      final next = data['next_cursor'] as String?;
+      await db.transaction((txn) async {
+        final dirty = {
+          for (final row in await txn.query('"$table"', columns: ['_id'], where: '_dirty = 1')) row['_id'],
+        };
+        final batch = txn.batch();
+        for (final item in items) {
+          final id = item['id']?.toString();
+          if (id == null || dirty.contains(id)) {
+            continue;
+          }
+          batch.insert('"$table"', {..._toRow(item), '_id': id, '_dirty': 0, '_deleted': 0, '_seen': mark},
+              conflictAlgorithm: ConflictAlgorithm.replace);
+        }
+        await batch.commit(noResult: true);
+      });
+      received += items.length;
+      if (next != null) {
+        cursor = next;
+      } else if (cursor != null || items.isEmpty || page * pageSize >= (data['total'] as int? ?? 0)) {
+        break;
+      } else {
+        page += 1;
+      }
+    }
+    await db.transaction((txn) async {
+      await txn.delete('"$table"', where: '_dirty = 0 AND (_seen IS NULL OR _seen != ?)', whereArgs: [mark]);
+      await txn.insert('_sync_state', {'entity': table, 'synced_at': DateTime.now().toUtc().toIso8601String()},
+          conflictAlgorithm: ConflictAlgorithm.replace);
+    });
+    return received;
+  }
+
+  /// Objet de l'API -> ligne SQLite (colonnes de db_schema.sql).
+  Map<String, Object?> _toRow(Map<String, dynamic> values) {
+    return {
+      for (final entry in fields.entries)
+        if (values.containsKey(entry.key))
+          entry.value: values[entry.key] is bool ? (values[entry.key] as bool ? 1 : 0) : values[entry.key],
+    };
+  }
+
+  /// Ligne SQLite -> objet de l'API (sans `id`).
+  Map<String, dynamic> _toJson(Map<String, Object?> row) {
+    return {
+      for (final entry in fields.entries)
+        if (row.containsKey(entry.value))
+          entry.key: boolFields.contains(entry.key) && row[entry.value] is int
+              ? row[entry.value] == 1
+              : row[entry.value],
+    };
+  }
+}
+"""
+
+
+def _dart_string_list(values: List[str], raw: bool = False) -> str:
+    if not values:
+        return "<String>[]"
+    quote = "r'''" if raw else "'"
+    end = "'''" if raw else "'"
+    return "<String>[\n" + "".join(f"  {quote}{v}{end},\n" for v in values) + "]"
+
+
+def render_offline_layer(entities: List[Dict[str, Any]], schema_sql: str, openapi: Dict[str, Any],
+                         base_url: str = DEFAULT_BASE_URL) -> Dict[str, str]:
+    """
+    Fichiers Dart de la couche offline-first, par chemin relatif (lib/data/...).
+
+    Args:
+        entities: Entités (db_schema.infer_entities_from_spec)
+        schema_sql: Contenu de artifacts/db_schema.sql
+        openapi: Spécification OpenAPI (endpoints de liste pour la sync)
+        base_url: URL de l'API par défaut (surchargée par --dart-define=API_BASE_URL)
+
+    Returns:
+        Dictionnaire chemin relatif -> contenu
+    """
+    statements = sql_statements(schema_sql)
+    paths = list_paths(openapi)
+    # Entités sans champ : pas de table dans db_schema.sql
+    cached = [e for e in entities if e.get("fields")]
+    version = int(hashlib.sha256("\n".join(statements).encode("utf-8")).hexdigest()[:7], 16) + 1
+
+    schema = DART_HEADER + "\n// Depuis artifacts/db_schema.sql.\n"
+    schema += f"const schemaVersion = {version};\n\n"
+    schema += f"const schemaStatements = {_dart_string_list(statements, raw=True)};\n\n"
+    schema += f"const cachedTables = {_dart_string_list([e['table_name'] for e in cached])};\n"
+
+    fields = "".join(f"  final OfflineRepository {_dart_identifier(e['name'])};\n" for e in cached)
+    params = "".join(f"    this.{_dart_identifier(e['name'])},\n" for e in cached)
+    repos = ""
+    for e in cached:
+        bools = ", ".join(f"'{f['name']}'" for f in e["fields"] if f.get("type") in ("bool", "boolean"))
+        path = paths.get(e["name"].lower())
+        repos += (f"      OfflineRepository(db: local.db, outbox: outbox, client: httpClient, baseUrl: baseUrl,\n"
+                  f"          table: '{e['table_name']}', fields: const {_dart_map(field_columns(e))},\n"
+                  f"          boolFields: const {{{bools}}}, path: {repr(path) if path else 'null'}),\n")
+    repositories = DART_HEADER + f"""
+import 'dart:async';
+
+import 'package:http/http.dart' as http;
+
+import 'local_db.dart';
+import 'offline_repository.dart';
+import 'outbox.dart';
+
+const apiBaseUrl = String.fromEnvironment('API_BASE_URL', defaultValue: '{base_url}');
+
+/// Dépôts offline-first de l'application, un par entité.
+///
+///     final repos = await Repositories.open();
+///     final rows = await repos.<entité>.all();
+class Repositories {{
+  Repositories._(
+    this.local,
+    this.outbox,
+{params}  );
+
+  final LocalDatabase local;
+  final Outbox outbox;
+{fields}
+  static Future<Repositories> open({{String baseUrl = apiBaseUrl, http.Client? client}}) async {{
+    final local = await LocalDatabase.open();
+    final httpClient = client ?? http.Client();
+    final outbox = Outbox(local.db, httpClient, baseUrl)..start();
+    unawaited(outbox.flush()); // écritures restées en file au lancement précédent
+    return Repositories._(
+      local,
+      outbox,
+{repos}    );
+  }}
+
+  Future<void> close() async {{
+    outbox.stop();
+    await local.db.close();
+  }}
+}}
+"""
+    return {
+        "lib/data/schema.dart": schema,
+        "lib/data/local_db.dart": DART_HEADER + DART_LOCAL_DB,
+        "lib/data/outbox.dart": DART_HEADER + DART_OUTBOX,
+        "lib/data/offline_repository.dart": DART_HEADER + DART_REPOSITORY,
+        "lib/data/repositories.dart": repositories,
+    }
+
+
+def write_offline_layer(run_path: Path, files: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Écrit la couche sous artifacts/offline_repo (seuls les fichiers modifiés sont réécrits).
+
+    Args:
+        run_path: Chemin vers le dossier de run
+        files: Sortie de render_offline_layer
+
+    Returns:
+        Dictionnaire avec le résumé des fichiers créés
+    """
+    out_dir = run_path / "artifacts" / OFFLINE_DIR
+    written = [rel for rel, content in files.items() if _write_if_changed(out_dir / rel, content)]
+    for stale in sorted((out_dir / "lib" / "data").glob("*.dart")):
+        if f"lib/data/{stale.name}" not in files:
+            stale.unlink()
+    return {"success": True, "files_created": list(files), "files_written": written}
+
+
+def install_offline_layer(run_path: Path, app_dir: Path) -> Optional[List[str]]:
+    """Copie la couche générée dans l'application ; None si elle n'a pas été générée."""
+    src = run_path / "artifacts" / OFFLINE_DIR / "lib" / "data"
+    if not src.is_dir():
+        return None
+    dst = Path(app_dir) / "lib" / "data"
+    if dst.exists():
+        shutil.rmtree(dst)
+    shutil.copytree(src, dst)
+    return sorted(f"lib/data/{p.name}" for p in dst.iterdir())
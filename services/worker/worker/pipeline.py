@@ -1,145 +1,387 @@
 import os
 import json
-import yaml
 import uuid
 import zipfile
 import hashlib
+import time
 from pathlib import Path
-from typing import Dict, Any, List
-from jsonschema import validate, ValidationError
-import click
-from rich.console import Console
-from rich.table import Table
-from . import codegen, db_schema, api_contracts
-from .codegen import generate_app_from_spec
-console = Console()
-
-def run_pipeline(run_id: str, spec_path: str, dry_run: bool = True) -> Dict[str, Any]:
-    """
-    Pipeline principal de génération d'application
-    
-    Args:
-        run_id: Identifiant unique de l'exécution
-        spec_path: Chemin vers le fichier de spécification
-        dry_run: Mode test sans génération de code Flutter
-    
-    Returns:
-        Dict contenant les résultats de chaque étape
-    """
-    console.print(f"[bold blue]🚀 Démarrage du pipeline - Run ID: {run_id}[/bold blue]")
-    
-    # Étape 1: VALIDATE_SPEC
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+from . import run_index
+from .journal import RunJournal, path_digest
+
+# Imports lourds différés (rich, click, jsonschema, yaml, codegen, bus) : le worker
+# et la CLI ne les paient qu'à la première étape qui s'en sert. Garde-fou :
+# tests/test_startup.py.
+
+
+class _LazyConsole:
+    """Console rich créée au premier affichage."""
+
+    def __init__(self) -> None:
+        self._console = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+
+def _emit_run_finished(run_id: str, status: str) -> None:
+    try:
+        # différé : le bus tire asyncio et msgspec, inutiles avant la fin du run
+        from services.contracts.bus import RUN_FINISHED, get_bus
+        from services.contracts.events import RunFinished
+    except ImportError:  # worker lancé sans le paquet services (PYTHONPATH=/worker)
+        return
+    bus = get_bus()
+    if bus is not None:
+        bus.emit(RUN_FINISHED, RunFinished(run_id=run_id, status=status))
+        bus.flush()  # fin de run : le process (CLI, tâche) peut s'arrêter juste après
+
+# --- Étapes ---------------------------------------------------------------
+# Chaque étape prend et renvoie l'état du run : un dict JSON-sérialisable
+# (run_id, spec_path, dry_run, spec_data, app_dir, steps) pour pouvoir être
+# transmis entre tâches Celery (voir worker/main.py). Les étapes sont
+# regroupées par nature : SPEC (rapides, CPU léger), BUILD (lourdes, Docker/
+# Gradle), FINALIZE (rapports et décision).
+
+StageFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+_MISSING = object()
+
+STAGES: Dict[str, StageFn] = {}
+
+
+def stage(name: str) -> Callable[[StageFn], StageFn]:
+    def register(fn: StageFn) -> StageFn:
+        STAGES[name] = fn
+        return fn
+    return register
+
+
+def new_state(run_id: str, spec_path: str, dry_run: bool = True) -> Dict[str, Any]:
+    return {"run_id": run_id, "spec_path": str(spec_path), "dry_run": dry_run, "steps": {}}
+
+
+@stage("validate_spec")
+def stage_validate_spec(state: Dict[str, Any]) -> Dict[str, Any]:
     console.print("\n[bold green]1. VALIDATE_SPEC[/bold green]")
-    validation_result = validate_spec(spec_path)
+    validation_result = validate_spec(state["spec_path"])
+    state["steps"]["validate_spec"] = validation_result
     if not validation_result["valid"]:
-        return {"error": "Validation de la spécification échouée", "details": validation_result}
-    
-    spec_data = validation_result["spec_data"]
-    
-    # Étape 2: CRITIC
+        state["error"] = "Validation de la spécification échouée"
+    else:
+        state["spec_data"] = validation_result["spec_data"]
+    return state
+
+
+@stage("critic")
+def stage_critic(state: Dict[str, Any]) -> Dict[str, Any]:
     console.print("\n[bold green]2. CRITIC[/bold green]")
     from .critic import run_critic
-    critic_result = run_critic(spec_data)
-    
-    # Étape 3: CODEGEN_stub (génération rapide sans build APK)
-    console.print("\n[bold green]3. CODEGEN_stub[/bold green]")
-    work_dir = os.getenv('WORK_DIR', './work')
-    run_path = Path(work_dir) / run_id
-    app_dir = generate_app_from_spec(Path(spec_path), run_id=run_id, build_apk=True)  # build_apk=True pour build effectif
-    codegen_result = {
+    state["steps"]["critic"] = run_critic(state["spec_data"])
+    return state
+
+
+@stage("db_schema")
+def stage_db_schema(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]3. DB_SCHEMA[/bold green]")
+    state["steps"]["db_schema"] = run_db_schema(state["run_id"], state["spec_data"])
+    return state
+
+
+@stage("api_contracts")
+def stage_api_contracts(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]4. API_CONTRACTS[/bold green]")
+    state["steps"]["api_contracts"] = run_api_contracts(state["run_id"], state["spec_data"],
+                                                        state["steps"]["db_schema"])
+    return state
+
+
+@stage("offline_repo")
+def stage_offline_repo(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]5. OFFLINE_REPO[/bold green]")
+    state["steps"]["offline_repo"] = run_offline_repo(state["run_id"], state["spec_data"])
+    return state
+
+
+@stage("codegen_stub")
+def stage_codegen(state: Dict[str, Any]) -> Dict[str, Any]:
+    # génération rapide sans build APK
+    console.print("\n[bold green]6. CODEGEN_stub[/bold green]")
+    # Le build APK est fait une seule fois, à l'étape BUILD_APK (store dédupliqué)
+    from .codegen import generate_app_from_spec
+    app_dir = generate_app_from_spec(Path(state["spec_path"]), run_id=state["run_id"], build_apk=False)
+    # Couche offline-first générée à l'étape précédente, copiée avec le reste des
+    # sources : elle entre dans le digest de app/, la source.zip et la clé du store APK
+    from .offline_repo import install_offline_layer
+    offline_files = install_offline_layer(Path(os.getenv('WORK_DIR', './work')) / state["run_id"], app_dir)
+    state["app_dir"] = str(app_dir)
+    state["steps"]["codegen_stub"] = {
         "success": True,
         "app_dir": str(app_dir),
-        "message": "Application Flutter générée via Mason (avec build APK)"
+        "offline_files": offline_files or [],
+        "message": "Application Flutter générée via Mason"
     }
-    
-    # Étape 4: DB_SCHEMA
-    console.print("\n[bold green]4. DB_SCHEMA[/bold green]")
-    db_schema_result = run_db_schema(run_id, spec_data)
-    
-    # Étape 5: API_CONTRACTS
-    console.print("\n[bold green]5. API_CONTRACTS[/bold green]")
-    api_contracts_result = run_api_contracts(run_id, spec_data, db_schema_result)
+    return state
+
 
-    # Étape 6: BUILD_APK
-    print("\n6. BUILD_APK")
+@stage("build_apk")
+def stage_build_apk(state: Dict[str, Any]) -> Dict[str, Any]:
+    print("\n7. BUILD_APK")
     res_apk = None
     if os.environ.get("FORGE_BUILD_APK", "0") != "1":
         print("[skip] BUILD_APK (dev fast mode)")
     else:
         try:
-            res_apk = codegen.run_build_apk(run_id, app_dir)
+            from .codegen import run_build_apk
+            res_apk = run_build_apk(state["run_id"], Path(state["app_dir"]))
             print(f"APK: {res_apk.get('apk_path')}")
         except Exception as e:
             res_apk = {"success": False, "error": str(e)}
             print(f"[WARN] BUILD_APK failed: {e}")
         # On continue malgré tout pour l’instant (Phase 1): ne bloque pas le pipeline.
+    state["steps"]["build_apk"] = res_apk
+    return state
 
-    # Étape 7: STATIC_CHECKS_stub
-    console.print("\n[bold green]7. STATIC_CHECKS_stub[/bold green]")
-    static_checks_result = run_static_checks_stub(run_id)
-    
-    # Étape 8: TESTS_stub
-    console.print("\n[bold green]8. TESTS_stub[/bold green]")
-    tests_result = run_tests_stub(run_id)
-    
-    # Étape 9: PACKAGE
-    console.print("\n[bold green]9. PACKAGE[/bold green]")
-    package_result = run_package(run_id, critic_result, static_checks_result, tests_result)
-    
-    # Étape 10: JUDGE
-    console.print("\n[bold green]10. JUDGE[/bold green]")
+
+@stage("static_checks_stub")
+def stage_static_checks(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]8. STATIC_CHECKS_stub[/bold green]")
+    state["steps"]["static_checks_stub"] = run_static_checks_stub(state["run_id"])
+    return state
+
+
+@stage("tests_stub")
+def stage_tests(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]9. TESTS_stub[/bold green]")
+    state["steps"]["tests_stub"] = run_tests_stub(state["run_id"])
+    return state
+
+
+@stage("package")
+def stage_package(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]10. PACKAGE[/bold green]")
+    steps = state["steps"]
+    steps["package"] = run_package(state["run_id"], steps["critic"], steps["static_checks_stub"], steps["tests_stub"])
+    return state
+
+
+@stage("judge")
+def stage_judge(state: Dict[str, Any]) -> Dict[str, Any]:
+    console.print("\n[bold green]11. JUDGE[/bold green]")
     from .judge import run_judge
-    judge_result = run_judge(critic_result, static_checks_result, tests_result)
-    
+    steps = state["steps"]
+    judge_result = run_judge(steps["critic"], steps["static_checks_stub"], steps["tests_stub"])
+    steps["judge"] = judge_result
+
     # Mettre à jour le rapport judge dans les artifacts
     work_dir = os.getenv('WORK_DIR', './work')
-    judge_report_path = os.path.join(work_dir, run_id, 'artifacts', 'judge_report.json')
+    judge_report_path = os.path.join(work_dir, state["run_id"], 'artifacts', 'judge_report.json')
     if os.path.exists(judge_report_path):
         with open(judge_report_path, 'w', encoding='utf-8') as f:
             json.dump(judge_result, f, indent=2, ensure_ascii=False)
-    
-    # Résultat final
+    return state
+
+
+# Groupes d'étapes, dans l'ordre d'exécution. BUILD et CHECKS sont indépendants
+# l'un de l'autre (les checks ne lisent pas l'APK) : en Celery ils tournent en
+# parallèle, sur des files différentes.
+# L'app est générée après les contrats : codegen y copie la couche offline
+# (lib/data), qui dépend de db_schema.sql et des endpoints OpenAPI.
+SPEC_STAGES = ("validate_spec", "critic", "db_schema", "api_contracts", "offline_repo", "codegen_stub")
+BUILD_STAGES = ("build_apk",)
+CHECK_STAGES = ("static_checks_stub", "tests_stub")
+FINALIZE_STAGES = ("package", "judge")
+STAGE_ORDER = SPEC_STAGES + BUILD_STAGES + CHECK_STAGES + FINALIZE_STAGES
+
+STEP_KEYS = ("validate_spec", "critic", "codegen_stub", "db_schema", "api_contracts", "offline_repo",
+             "static_checks_stub", "tests_stub", "build_apk", "package", "judge")
+
+# Sorties de chaque étape (relatives à WORK_DIR/<run_id>) dont le digest est
+# journalisé : une étape n'est rejouée depuis le journal que si elles sont intactes.
+STAGE_OUTPUTS: Dict[str, Tuple[str, ...]] = {
+    "codegen_stub": ("app",),
+    "db_schema": ("artifacts/db_schema.sql", "artifacts/db_migration_0001.sql", "artifacts/db_report.json"),
+    "api_contracts": ("artifacts/openapi.yaml", "artifacts/dart_client"),
+    "offline_repo": ("artifacts/offline_repo",),
+    "build_apk": ("artifacts/app-debug.apk", "artifacts/app-release.apk"),
+    "package": ("artifacts/source.zip", "artifacts/checksums.txt"),
+    "judge": ("artifacts/judge_report.json",),
+}
+
+
+def downstream_stages(name: str) -> Tuple[str, ...]:
+    """Étapes à invalider quand `name` est relancée (BUILD et CHECKS sont indépendants)."""
+    after = STAGE_ORDER[STAGE_ORDER.index(name) + 1:]
+    if name in BUILD_STAGES:
+        after = tuple(s for s in after if s not in CHECK_STAGES)
+    return after
+
+
+def spec_digest(spec_path: str) -> Optional[str]:
+    return path_digest(Path(spec_path)) if os.path.isfile(spec_path) else None
+
+
+def open_journal(state: Dict[str, Any]) -> RunJournal:
+    journal = RunJournal(state["run_id"])
+    journal.open(spec_digest(state["spec_path"]))
+    return journal
+
+
+def run_stages(state: Dict[str, Any], names: Iterable[str],
+               journal: Optional[RunJournal] = None) -> Dict[str, Any]:
+    """
+    Exécute les étapes `names` dans l'ordre ; s'arrête dès qu'une étape pose `error`.
+    Chaque étape est journalisée ; une étape déjà terminée (sorties vérifiées par
+    digest) est rejouée depuis le journal, la première étape incomplète reprend le calcul.
+    """
+    journal = journal or open_journal(state)
+    run_id = state["run_id"]
+    started = False
+    for name in names:
+        if state.get("error"):
+            break
+        done = journal.completed(downstream_stages).get(name)
+        if done is not None and journal.verify(done):
+            console.print(f"[dim]↺ {name} : repris du journal[/dim]")
+            patch = dict(done["patch"])
+            state["steps"][name] = patch.pop("step")
+            state.update(patch)
+            continue
+        if not started:
+            run_index.start_run(run_id)
+            started = True
+        before = {k: v for k, v in state.items() if k != "steps"}
+        journal.start(name)
+        run_index.start_stage(run_id, name)
+        t0 = time.monotonic()
+        try:
+            state = STAGES[name](state)
+        except Exception as e:
+            journal.fail(name, str(e))
+            run_index.finish_stage(run_id, name, time.monotonic() - t0, "failed")
+            run_index.fail_run(run_id)
+            raise
+        duration = round(time.monotonic() - t0, 3)
+        state["timings"] = {**state.get("timings", {}), name: duration}
+        run_index.finish_stage(run_id, name, duration, "error" if state.get("error") else "ok")
+        patch = {k: v for k, v in state.items() if k != "steps" and before.get(k, _MISSING) != v}
+        journal.finish(name, {"step": state["steps"].get(name), **patch}, STAGE_OUTPUTS.get(name, ()))
+    return state
+
+
+def finish_pipeline(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Construit le résultat final du run et publie `run.finished`."""
+    run_id = state["run_id"]
+    run_index.finish_run(state, Path(os.getenv('WORK_DIR', './work')) / run_id, spec_digest(state["spec_path"]))
+    if state.get("error"):
+        _emit_run_finished(run_id, "invalid_spec")
+        return {"error": state["error"], "details": state["steps"].get("validate_spec")}
+
+    judge_result = state["steps"]["judge"]
     final_result = {
         "run_id": run_id,
-        "dry_run": dry_run,
-        "steps": {
-            "validate_spec": validation_result,
-            "critic": critic_result,
-            "codegen_stub": codegen_result,
-            "db_schema": db_schema_result,
-            "api_contracts": api_contracts_result,
-            "static_checks_stub": static_checks_result,
-            "tests_stub": tests_result,
-            "build_apk": res_apk, # Use res_apk from the new BUILD_APK step
-            "package": package_result,
-            "judge": judge_result
-        },
+        "dry_run": state["dry_run"],
+        "steps": {key: state["steps"].get(key) for key in STEP_KEYS},
+        "timings": state.get("timings", {}),
         "success": judge_result["decision"] == "accept"
     }
-    
+
     color = 'green' if final_result['success'] else 'red'
     console.print(f"\n[bold {color}]✅ Pipeline terminé - Décision: {judge_result['decision']}[/bold {color}]")
-    
+    _emit_run_finished(run_id, judge_result["decision"])
     return final_result
 
+
+def prepare_resume(run_id: str, resume: bool = True) -> bool:
+    """
+    Relance d'un run : garde le journal (sauf resume=False) et retire un
+    marqueur CANCEL laissé par l'exécution précédente, qui tuerait sinon le
+    premier build. Retourne True si des étapes pourront être reprises.
+    """
+    journal = RunJournal(run_id)
+    if not resume:
+        journal.reset()
+    resuming = journal.exists()
+    if resuming:
+        from .supervisor import clear_cancel
+        clear_cancel(run_id)
+    return resuming
+
+
+def run_pipeline(run_id: str, spec_path: str, dry_run: bool = True, resume: bool = True) -> Dict[str, Any]:
+    """
+    Pipeline principal de génération d'application, exécuté dans le process courant
+    (CLI, tests). En production les mêmes étapes sont distribuées par worker/main.py.
+    
+    Args:
+        run_id: Identifiant unique de l'exécution
+        spec_path: Chemin vers le fichier de spécification
+        dry_run: Mode test sans génération de code Flutter
+        resume: Reprendre à la première étape incomplète du journal du run
+    
+    Returns:
+        Dict contenant les résultats de chaque étape
+    """
+    console.print(f"[bold blue]🚀 Démarrage du pipeline - Run ID: {run_id}[/bold blue]")
+    if prepare_resume(run_id, resume):
+        console.print("[dim]Journal existant : reprise à la première étape incomplète[/dim]")
+    state = run_stages(new_state(run_id, spec_path, dry_run), STAGE_ORDER)
+    return finish_pipeline(state)
+
+_validators: Dict[Tuple[str, int, int], Any] = {}
+
+
+def resolve_schema_path() -> str:
+    schema_path = os.getenv('SCHEMA_PATH', 'specs/schema/mobile-app-0.1.0.json')
+    if not os.path.exists(schema_path):
+        # Essayer le chemin relatif depuis le workspace
+        workspace_path = os.getenv('WORKSPACE_PATH', '/workspace')
+        schema_path = os.path.join(workspace_path, 'specs/schema/mobile-app-0.1.0.json')
+    return schema_path
+
+
+def _load_schema(schema_path: str) -> Dict[str, Any]:
+    # Essayer d'abord avec utf-8-sig pour gérer le BOM
+    try:
+        with open(schema_path, 'r', encoding='utf-8-sig') as f:
+            return json.load(f)
+    except:
+        # Si ça échoue, essayer avec utf-8 normal
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def schema_validator(schema_path: str):
+    """
+    Validateur compilé pour le schéma, gardé dans le process tant que le fichier
+    ne change pas (mtime, taille) : un worker ou un lot de specs ne relit et ne
+    revérifie le schéma qu'une fois.
+    """
+    st = os.stat(schema_path)
+    key = (os.path.abspath(schema_path), st.st_mtime_ns, st.st_size)
+    validator = _validators.get(key)
+    if validator is None:
+        from jsonschema.validators import validator_for
+        schema = _load_schema(schema_path)
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema)
+        _validators[key] = validator
+    return validator
+
+
 def validate_spec(spec_path: str) -> Dict[str, Any]:
     """Valide la spécification avec le schéma JSON"""
+    import yaml
+    from jsonschema import ValidationError
+    from jsonschema.exceptions import best_match
     try:
-        # Charger le schéma
-        schema_path = os.getenv('SCHEMA_PATH', 'specs/schema/mobile-app-0.1.0.json')
-        if not os.path.exists(schema_path):
-            # Essayer le chemin relatif depuis le workspace
-            workspace_path = os.getenv('WORKSPACE_PATH', '/workspace')
-            schema_path = os.path.join(workspace_path, 'specs/schema/mobile-app-0.1.0.json')
-        
-        # Essayer d'abord avec utf-8-sig pour gérer le BOM
-        try:
-            with open(schema_path, 'r', encoding='utf-8-sig') as f:
-                schema = json.load(f)
-        except:
-            # Si ça échoue, essayer avec utf-8 normal
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                schema = json.load(f)
+        validator = schema_validator(resolve_schema_path())
         
         # Charger la spécification
         with open(spec_path, 'r', encoding='utf-8') as f:
@@ -148,8 +390,10 @@ def validate_spec(spec_path: str) -> Dict[str, Any]:
             else:
                 spec_data = json.load(f)
         
-        # Valider
-        validate(instance=spec_data, schema=schema)
+        # Valider (même erreur que jsonschema.validate)
+        error = best_match(validator.iter_errors(spec_data))
+        if error is not None:
+            raise error
         
         return {
             "valid": True,
@@ -280,272 +524,6 @@ def run_db_schema(run_id: str, spec: dict) -> Dict[str, Any]:
         }
 
 
-# ... existing code ...
-def run_build_apk(run_id: str, app_dir: Path) -> Dict[str, Any]:
-    """Exécute le build APK de manière robuste avec logs détaillés"""
-    try:
-        console.print("�� Build APK en cours...")
-        
-        # Vérifier si l'app existe
-        if not app_dir.exists():
-            console.print(f"❌ Dossier app non trouvé: {app_dir}")
-            return {
-                "success": False,
-                "error": "Dossier app non trouvé",
-                "apk_path": None
-            }
-        
-        console.print(f"✅ Dossier app trouvé: {app_dir}")
-        
-        # Créer le dossier artifacts
-        artifacts_dir = Path(f"./work/{run_id}/artifacts")
-        artifacts_dir.mkdir(parents=True, exist_ok=True)
-        console.print(f"✅ Dossier artifacts créé: {artifacts_dir}")
-        
-        # Vérifier que l'app Flutter est valide
-        pubspec_path = app_dir / "pubspec.yaml"
-        if not pubspec_path.exists():
-            console.print("❌ pubspec.yaml non trouvé - app Flutter invalide")
-            return {
-                "success": False,
-                "error": "pubspec.yaml non trouvé",
-                "apk_path": None
-            }
-        
-        console.print("✅ pubspec.yaml trouvé")
-        
-        # Vérifier la structure Android
-        android_dir = app_dir / "android"
-        if not android_dir.exists():
-            console.print("❌ Dossier android/ non trouvé - scaffolding Android manquant")
-            return {
-                "success": False,
-                "error": "Dossier android/ manquant",
-                "apk_path": None
-            }
-        
-        console.print("✅ Dossier android/ trouvé")
-        
-        # Exécuter le build APK via Docker avec timeout et logs détaillés
-        console.print("�� Lancement du build APK via Docker...")
-        
-        import subprocess
-        
-        # Construire la commande Docker pour le build APK uniquement
-        compose_file = str((Path(__file__).parent.parent.parent.parent / "infra" / "docker-compose.yml").as_posix())
-        
-        # COMMANDE SIMPLIFIÉE - Test étape par étape
-        cmd = [
-            "docker", "compose", "-f", compose_file, "run", "--rm",
-            "-w", "/work",
-            "runner_flutter",
-            "bash", "-c",
-            f"cd /work/{run_id}/app && flutter build apk --debug"
-        ]
-        
-        console.print("🔧 Commande Docker simplifiée, exécution...")
-        console.print(f"Commande: {' '.join(cmd)}")
-        
-        # Exécuter avec timeout et capture des logs
-        result = subprocess.run(
-            cmd, 
-            cwd=str(Path(__file__).parent.parent.parent),
-            timeout=300,  # 5 minutes max
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            console.print("✅ Build APK réussi!")
-            console.print(f"📝 Logs stdout: {result.stdout[-200:]}")  # Derniers 200 caractères
-            
-            # Vérifier si l'APK a été créé
-            apk_path = artifacts_dir / "app-debug.apk"
-            if apk_path.exists():
-                apk_size = apk_path.stat().st_size
-                console.print(f"✅ APK généré: {apk_path} ({apk_size} bytes)")
-                
-                return {
-                    "success": True,
-                    "apk_path": str(apk_path),
-                    "apk_size": apk_size,
-                    "build_logs": result.stdout,
-                    "message": f"APK généré avec succès ({apk_size} bytes)"
-                }
-            else:
-                console.print("❌ APK non trouvé après build réussi")
-                return {
-                    "success": False,
-                    "error": "APK non trouvé après build réussi",
-                    "build_logs": result.stdout,
-                    "apk_path": None
-                }
-        else:
-            console.print(f"❌ Build APK échoué (code {result.returncode})")
-            console.print(f"📝 Logs stdout: {result.stdout}")
-            console.print(f"📝 Logs stderr: {result.stderr}")
-            
-            return {
-                "success": False,
-                "error": f"Build APK échoué (code {result.returncode})",
-                "build_logs": result.stdout,
-                "build_errors": result.stderr,
-                "apk_path": None
-            }
-            
-    except subprocess.TimeoutExpired:
-        console.print("⏰ Timeout après 5 minutes - build APK trop long")
-        return {
-            "success": False,
-            "error": "Timeout après 5 minutes",
-            "apk_path": None
-        }
-    except Exception as e:
-        console.print(f"❌ Erreur lors du build APK: {e}")
-        return {
-            "success": False,
-            "error": str(e),
-            "apk_path": None
-        }
-# ... existing code ...
-        
-
-
-        console.print("✅ Dossier android/ trouvé")
-        
-        # Exécuter le build APK via Docker avec timeout et logs détaillés
-        console.print("🚀 Lancement du build APK via Docker...")
-        
-        import subprocess
-        import tempfile
-        
-        # Créer un fichier temporaire pour les variables
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            temp_vars = {
-                "app_name": "temp_build", 
-                "primary_color": "#000000", 
-                "navigation": "tabs", 
-                "entities": []
-            }
-            json.dump(temp_vars, f)
-            temp_vars_path = f.name
-        
-        try:
-            # Construire la commande Docker pour le build APK uniquement
-            compose_file = str((Path(__file__).parent.parent.parent.parent / "infra" / "docker-compose.yml").as_posix())
-            
-            cmd = [
-                "docker", "compose", "-f", compose_file, "run", "--rm",
-                "-w", "/work",
-                "runner_flutter",
-                "bash", "-c",
-                f"""
-                set -e
-                echo '[build] Vérification de l\'environnement Flutter'
-                flutter --version
-                echo '[build] Vérification de l\'environnement Android'
-                flutter doctor -v
-                echo '[build] Navigation vers le dossier app'
-                cd /work/{run_id}/app
-                echo '[build] Vérification des dépendances'
-                flutter pub get
-                echo '[build] Vérification de la structure Android'
-                ls -la android/
-                echo '[build] Lancement du build APK debug'
-                flutter build apk --debug --verbose
-                echo '[build] Vérification du résultat'
-                ls -la build/app/outputs/flutter-apk/
-                echo '[build] Copie de l\'APK vers artifacts'
-                mkdir -p /work/{run_id}/artifacts
-                if [ -f build/app/outputs/flutter-apk/app-debug.apk ]; then
-                    cp build/app/outputs/flutter-apk/app-debug.apk /work/{run_id}/artifacts/app-debug.apk
-                    echo '✅ APK copié: /work/{run_id}/artifacts/app-debug.apk'
-                    ls -la /work/{run_id}/artifacts/app-debug.apk
-                else
-                    echo '❌ APK non trouvé après build'
-                    find build/ -name "*.apk" -type f
-                    exit 1
-                fi
-                echo '[build] Build APK terminé avec succès'
-                """
-            ]
-            
-            console.print("🔧 Commande Docker construite, exécution...")
-            
-            # Exécuter avec timeout et capture des logs
-            result = subprocess.run(
-                cmd, 
-                cwd=str(Path(__file__).parent.parent.parent),
-                timeout=600,  # 10 minutes max
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                console.print("✅ Build APK réussi!")
-                console.print(f"📝 Logs stdout: {result.stdout[-500:]}")  # Derniers 500 caractères
-                
-                # Vérifier si l'APK a été créé
-                apk_path = artifacts_dir / "app-debug.apk"
-                if apk_path.exists():
-                    apk_size = apk_path.stat().st_size
-                    console.print(f"✅ APK généré: {apk_path} ({apk_size} bytes)")
-                    
-                    return {
-                        "success": True,
-                        "apk_path": str(apk_path),
-                        "apk_size": apk_size,
-                        "build_logs": result.stdout,
-                        "message": f"APK généré avec succès ({apk_size} bytes)"
-                    }
-                else:
-                    console.print("❌ APK non trouvé après build réussi")
-                    return {
-                        "success": False,
-                        "error": "APK non trouvé après build réussi",
-                        "build_logs": result.stdout,
-                        "apk_path": None
-                    }
-            else:
-                console.print(f"❌ Build APK échoué (code {result.returncode})")
-                console.print(f"📝 Logs stdout: {result.stdout}")
-                console.print(f"📝 Logs stderr: {result.stderr}")
-                
-                return {
-                    "success": False,
-                    "error": f"Build APK échoué (code {result.returncode})",
-                    "build_logs": result.stdout,
-                    "build_errors": result.stderr,
-                    "apk_path": None
-                }
-                
-        except subprocess.TimeoutExpired:
-            console.print("⏰ Timeout après 10 minutes - build APK trop long")
-            return {
-                "success": False,
-                "error": "Timeout après 10 minutes",
-                "apk_path": None
-            }
-        except Exception as e:
-            console.print(f"❌ Erreur lors du build APK: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "apk_path": None
-            }
-        finally:
-            # Nettoyer le fichier temporaire
-            os.unlink(temp_vars_path)
-            
-    except Exception as e:
-        console.print(f"❌ Erreur fatale dans run_build_apk: {str(e)}")
-        return {
-            "success": False,
-            "error": str(e),
-            "apk_path": None
-        }
-
-
 def run_api_contracts(run_id: str, spec: dict, db_schema_result: Dict[str, Any]) -> Dict[str, Any]:
     """Génère les contrats OpenAPI et le client Dart stub"""
     try:
@@ -580,6 +558,7 @@ def run_api_contracts(run_id: str, spec: dict, db_schema_result: Dict[str, Any])
             "entities_supported": len(entities),
             "openapi_files": openapi_result["files_created"],
             "dart_client_files": dart_result["files_created"],
+            "dart_client_written": dart_result["files_written"],
             "models_generated": dart_result.get("models_generated", 0),
             "message": f"Contrats API générés: {len(endpoints)} endpoints, {len(entities)} entités"
         }
@@ -591,6 +570,40 @@ def run_api_contracts(run_id: str, spec: dict, db_schema_result: Dict[str, Any])
             "message": "Erreur lors de la génération des contrats API"
         }
 
+def run_offline_repo(run_id: str, spec: dict) -> Dict[str, Any]:
+    """Génère la couche de données offline-first (cache SQLite, sync, file d'écritures)"""
+    try:
+        import yaml
+        from .db_schema import infer_entities_from_spec
+        from .offline_repo import render_offline_layer, write_offline_layer
+        
+        work_dir = os.getenv('WORK_DIR', './work')
+        run_path = Path(work_dir) / run_id
+        artifacts_dir = run_path / "artifacts"
+        
+        # Schéma local = db_schema.sql, endpoints de sync = openapi.yaml
+        schema_sql = (artifacts_dir / "db_schema.sql").read_text(encoding="utf-8")
+        with open(artifacts_dir / "openapi.yaml", 'r', encoding='utf-8') as f:
+            openapi = yaml.safe_load(f)
+        
+        entities = infer_entities_from_spec(spec)
+        result = write_offline_layer(run_path, render_offline_layer(entities, schema_sql, openapi))
+        
+        return {
+            "success": True,
+            "entities": [e["name"] for e in entities if e.get("fields")],
+            "files_created": result["files_created"],
+            "files_written": result["files_written"],
+            "message": f"Couche offline générée: {len(result['files_created'])} fichiers"
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "Erreur lors de la génération de la couche offline"
+        }
+
 def run_package(run_id: str, critic_result: Dict[str, Any], static_checks_result: Dict[str, Any], tests_result: Dict[str, Any]) -> Dict[str, Any]:
     """Empaquette les résultats et calcule les checksums"""
     work_dir = os.getenv('WORK_DIR', './work')
@@ -618,11 +631,16 @@ def run_package(run_id: str, critic_result: Dict[str, Any], static_checks_result
                 with open(spec_dest, 'wb') as dst:
                     dst.write(src.read())
         
-        # Copier app-release.apk ou app-debug.apk si présent
+        # Copier app-release.apk ou app-debug.apk si présent, sauf si BUILD_APK l'a
+        # déjà placé dans artifacts/ depuis le store (pas de réécriture de l'artefact)
         apk_src_release = os.path.join(run_path, 'app', 'build', 'app', 'outputs', 'flutter-apk', 'app-release.apk')
         apk_src_debug = os.path.join(run_path, 'app', 'build', 'app', 'outputs', 'flutter-apk', 'app-debug.apk')
+        materialized = [n for n in ('app-release.apk', 'app-debug.apk')
+                        if os.path.exists(os.path.join(artifacts_dir, n))]
         
-        if os.path.exists(apk_src_release):
+        if materialized:
+            print(f"✅ APK déjà dans les artifacts: {materialized[0]}")
+        elif os.path.exists(apk_src_release):
             apk_dest = os.path.join(artifacts_dir, 'app-release.apk')
             with open(apk_src_release, 'rb') as src:
                 with open(apk_dest, 'wb') as dst:
@@ -741,27 +759,49 @@ Voir `spec.yml` pour les détails de la configuration.
 
 
 
-@click.command()
-@click.option('--spec', required=True, help='Chemin vers le fichier de spécification')
-@click.option('--run-id', default=None, help='ID de run (généré automatiquement si non fourni)')
-@click.option('--dry-run', is_flag=True, default=True, help='Mode dry-run (par défaut)')
-def cli(spec: str, run_id: str, dry_run: bool):
-    """CLI pour exécuter le pipeline en local"""
-    if run_id is None:
-        run_id = str(uuid.uuid4())
-    
-    console.print(f"[bold blue]Pipeline CLI - Spec: {spec}, Run ID: {run_id}[/bold blue]")
-    
-    result = run_pipeline(run_id, spec, dry_run)
-    
-    # Afficher le résultat
-    if result.get("success"):
-        console.print(f"\n[bold green]✅ Pipeline réussi![/bold green]")
-        console.print(f"Run ID: {run_id}")
-        console.print(f"Artifacts: {os.path.join(os.getenv('WORK_DIR', '/work'), run_id, 'artifacts')}")
-    else:
-        console.print(f"\n[bold red]❌ Pipeline échoué![/bold red]")
-        console.print(f"Erreur: {result.get('error', 'Unknown error')}")
+def _make_cli():
+    import click
+
+    @click.command()
+    @click.option('--spec', required=True, help='Chemin vers le fichier de spécification')
+    @click.option('--run-id', default=None, help='ID de run (généré automatiquement si non fourni)')
+    @click.option('--dry-run', is_flag=True, default=True, help='Mode dry-run (par défaut)')
+    @click.option('--resume/--no-resume', default=True, help='Reprendre depuis le journal du run (par défaut)')
+    @click.option('--jobs', '-j', type=int, default=None, help='Mode batch : processus du pool (voir worker/batch.py)')
+    @click.pass_context
+    def cli(ctx: click.Context, spec: str, run_id: str, dry_run: bool, resume: bool, jobs: Optional[int]):
+        """CLI pour exécuter le pipeline en local (--spec dossier, glob ou - : mode batch)"""
+        if spec == "-" or os.path.isdir(spec) or any(c in spec for c in "*?["):
+            from .batch import cli as batch_cli
+            params = {"jobs": jobs} if jobs is not None else {}
+            return ctx.invoke(batch_cli, specs=(spec,), dry_run=dry_run, resume=resume, **params)
+
+        if run_id is None:
+            run_id = str(uuid.uuid4())
+        
+        console.print(f"[bold blue]Pipeline CLI - Spec: {spec}, Run ID: {run_id}[/bold blue]")
+        
+        result = run_pipeline(run_id, spec, dry_run, resume=resume)
+        
+        # Afficher le résultat
+        if result.get("success"):
+            console.print(f"\n[bold green]✅ Pipeline réussi![/bold green]")
+            console.print(f"Run ID: {run_id}")
+            console.print(f"Artifacts: {os.path.join(os.getenv('WORK_DIR', '/work'), run_id, 'artifacts')}")
+        else:
+            console.print(f"\n[bold red]❌ Pipeline échoué![/bold red]")
+            console.print(f"Erreur: {result.get('error', 'Unknown error')}")
+
+    return cli
+
+
+def __getattr__(name: str) -> Any:
+    # `pipeline.cli` reste disponible, construit (et click importé) à la demande
+    if name == "cli":
+        globals()["cli"] = _make_cli()
+        return globals()["cli"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
-    cli()
+    _make_cli()()
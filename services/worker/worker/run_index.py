@@ -0,0 +1,135 @@
+"""
+Alimentation de l'index des runs (services/contracts/runs.py) par le pipeline.
+
+Ne lève jamais : un index indisponible (paquet services absent du PYTHONPATH,
+base verrouillée...) ne doit pas faire échouer un run. FORGE_RUN_INDEX=0 le coupe.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .journal import file_digest
+
+REPORT_TYPES = {
+    "critic_report": ("critic", "critic"),
+    "verifier_report": ("verifier", "static_checks_stub"),
+    "judge_report": ("judge", "judge"),
+}
+
+
+def _enabled() -> bool:
+    return os.getenv("FORGE_RUN_INDEX", "1") != "0"
+
+
+def _record(method: str, *args: Any) -> None:
+    if not _enabled():
+        return
+    try:
+        # différé : services.contracts.runs tire pydantic (~130 ms au démarrage)
+        from services.contracts.runs import get_run_repository
+    except ImportError:  # worker lancé sans le paquet services (PYTHONPATH=/worker)
+        return
+    try:
+        getattr(get_run_repository(), method)(*args)
+    except Exception as e:
+        print(f"[runs] index non mis à jour ({method}): {e}")
+
+
+def start_run(run_id: str) -> None:
+    _record("start_run", run_id)
+
+
+def start_stage(run_id: str, stage: str) -> None:
+    _record("start_stage", run_id, stage)
+
+
+def finish_stage(run_id: str, stage: str, duration_s: float, status: str) -> None:
+    _record("finish_stage", run_id, stage, duration_s, status)
+
+
+def fail_run(run_id: str) -> None:
+    _record("fail_run", run_id)
+
+
+def artifact_type(name: str) -> str:
+    lower = name.lower()
+    if lower.endswith(".apk"):
+        return "apk"
+    if "coverage" in lower or lower == "lcov.info":
+        return "coverage"
+    for prefix, (kind, _) in REPORT_TYPES.items():
+        if lower.startswith(prefix):
+            return kind
+    if lower in ("spec.yml", "spec.yaml"):
+        return "spec"
+    if lower == "source.zip":
+        return "source"
+    return "other"
+
+
+def collect_artifacts(run_id: str, run_dir: Path, steps: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fichiers de premier niveau de artifacts/ + un artefact `logs` par log d'étape."""
+    checksums = (steps.get("package") or {}).get("checksums") or {}
+    kpis_by_type = {kind: steps.get(step) for kind, step in REPORT_TYPES.values()}
+    out = []
+    artifacts_dir = run_dir / "artifacts"
+    if artifacts_dir.is_dir():
+        for path in sorted(artifacts_dir.iterdir()):
+            if not path.is_file():
+                continue
+            kind = artifact_type(path.name)
+            out.append({
+                "id": f"{run_id}:artifacts/{path.name}", "run_id": run_id, "path": f"artifacts/{path.name}",
+                "type": kind, "size_bytes": path.stat().st_size,
+                "sha256": checksums.get(path.name) or file_digest(path),
+                "kpis": kpis_by_type.get(kind),
+            })
+    logs_dir = run_dir / "logs"
+    if logs_dir.is_dir():
+        for log in sorted(p for p in logs_dir.iterdir() if p.is_dir()):
+            out.append({
+                "id": f"{run_id}:logs/{log.name}", "run_id": run_id, "path": f"logs/{log.name}",
+                "type": "logs", "size_bytes": sum(p.stat().st_size for p in log.iterdir() if p.is_file()),
+                "sha256": None, "kpis": None,
+            })
+    return out
+
+
+def run_summary(state: Dict[str, Any], spec_sha256: Optional[str]) -> Dict[str, Any]:
+    steps = state["steps"]
+    app = (state.get("spec_data") or {}).get("app") or {}
+    decision = (steps.get("judge") or {}).get("decision")
+    apk = steps.get("build_apk") or {}
+    apk_path = Path(apk["apk_path"]) if apk.get("success") and apk.get("apk_path") else None
+    if apk_path is not None and not apk_path.is_file():
+        apk_path = None
+    timings = state.get("timings") or {}
+    return {
+        "id": state["run_id"],
+        "status": "invalid_spec" if state.get("error") else decision,
+        "decision": decision,
+        "app_name": app.get("name"),
+        "bundle_id": app.get("bundle_id_android"),
+        "spec_sha256": spec_sha256,
+        "git_sha": os.getenv("GIT_SHA"),
+        "flutter_version": os.getenv("FLUTTER_VERSION"),
+        "apk_size_bytes": apk_path.stat().st_size if apk_path else None,
+        "apk_sha256": file_digest(apk_path) if apk_path else None,
+        "coverage": (steps.get("tests_stub") or {}).get("coverage"),
+        "lint_errors": (steps.get("static_checks_stub") or {}).get("lint_errors"),
+        "duration_s": round(sum(timings.values()), 3) if timings else None,
+    }
+
+
+def finish_run(state: Dict[str, Any], run_dir: Path, spec_sha256: Optional[str]) -> None:
+    if not _enabled():
+        return
+    try:
+        run = run_summary(state, spec_sha256)
+        artifacts = collect_artifacts(state["run_id"], run_dir, state["steps"])
+    except Exception as e:
+        print(f"[runs] résumé du run impossible: {e}")
+        return
+    _record("finish_run", run, artifacts)
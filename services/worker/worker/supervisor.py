@@ -0,0 +1,271 @@
+"""
+Supervision des sous-processus du pipeline (mason, flutter, docker compose).
+
+- stdout/stderr lus en parallèle (asyncio) vers un fichier log et des abonnés
+- timeout mur (durée totale) et timeout d'inactivité (aucune sortie) vérifiés
+  en continu par un watchdog, même si le process ne produit plus rien
+- kill du groupe de process (SIGTERM puis SIGKILL) pour ne pas laisser d'orphelins
+- annulation par run_id, y compris depuis un autre process (fichier CANCEL)
+- consommation ressources relevée via wait4
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+WORK_DIR = Path(os.environ.get("WORK_DIR", "./work"))
+CANCEL_MARKER = "CANCEL"
+POLL_INTERVAL_S = 0.25
+KILL_GRACE_S = 5.0
+DRAIN_GRACE_S = 2.0  # lecture des pipes encore ouverts par des petits-enfants après la fin du process
+LINE_LIMIT = 4 * 1024 * 1024
+
+# Abonné : appelé pour chaque ligne, avec le nom du flux ("stdout" / "stderr")
+Subscriber = Callable[[str, str], None]
+
+
+@dataclass
+class ProcessResult:
+    returncode: int
+    duration_s: float
+    timed_out: Optional[str] = None  # "wall" | "idle"
+    cancelled: bool = False
+    rusage: Dict[str, float] = field(default_factory=dict)
+    log_file: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _Handle:
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self.cancel_event = threading.Event()
+
+
+_running: Dict[str, Set[_Handle]] = {}
+_running_lock = threading.Lock()
+
+
+def _cancel_marker(run_id: str) -> Path:
+    return WORK_DIR / run_id / CANCEL_MARKER
+
+
+def cancel_run(run_id: str) -> int:
+    """
+    Demande l'arrêt des process d'un run. Le marqueur CANCEL est vu par les
+    watchdogs des autres process (worker Celery) ; les process de ce process-ci
+    sont signalés immédiatement. Retourne le nombre de process locaux signalés.
+    """
+    marker = _cancel_marker(run_id)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.write_text(str(time.time()), encoding="utf-8")
+    with _running_lock:
+        handles = list(_running.get(run_id, ()))
+    for h in handles:
+        h.cancel_event.set()
+    return len(handles)
+
+
+def is_cancel_requested(run_id: Optional[str]) -> bool:
+    return bool(run_id) and _cancel_marker(run_id).exists()
+
+
+def clear_cancel(run_id: str) -> None:
+    try:
+        _cancel_marker(run_id).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _kill_group(proc: subprocess.Popen, sig: int) -> None:
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, sig)
+        elif sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _wait(proc: subprocess.Popen):
+    """Bloquant (exécuté dans un thread) : attend la fin et relève les ressources."""
+    if hasattr(os, "wait4"):
+        _, status, ru = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return proc.returncode, {
+            "user_s": ru.ru_utime,
+            "system_s": ru.ru_stime,
+            "max_rss_kb": ru.ru_maxrss,
+            "major_faults": ru.ru_majflt,
+            "inblock": ru.ru_inblock,
+            "oublock": ru.ru_oublock,
+        }
+    return proc.wait(), {}
+
+
+async def run_process(
+    cmd: List[str],
+    *,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    log_file: Optional[Path] = None,
+    run_id: Optional[str] = None,
+    wall_timeout_s: Optional[float] = 1800,
+    idle_timeout_s: Optional[float] = 600,
+    subscribers: Iterable[Subscriber] = (),
+    echo: bool = True,
+    on_kill: Optional[Callable[[], None]] = None,
+) -> ProcessResult:
+    """Lance `cmd` (liste, jamais de shell) sous supervision."""
+    subscribers = list(subscribers)
+    log = None
+    if log_file is not None:
+        log_file = Path(log_file)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        log = log_file.open("a", encoding="utf-8")
+        log.write(f"$ {' '.join(cmd)}\n")
+        log.flush()
+
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    last_activity = start
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(cwd) if cwd else None,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=(os.name == "posix"),
+    )
+    handle = _Handle(proc)
+    if run_id:
+        with _running_lock:
+            _running.setdefault(run_id, set()).add(handle)
+
+    def emit(stream: str, line: str) -> None:
+        if echo:
+            (sys.stderr if stream == "stderr" else sys.stdout).write(line)
+        if log:
+            log.write(line)
+            log.flush()
+        for sub in subscribers:
+            try:
+                sub(stream, line)
+            except Exception:
+                pass  # un abonné défaillant ne doit pas casser le build
+
+    async def pump(pipe, stream: str) -> None:
+        nonlocal last_activity
+        reader = asyncio.StreamReader(limit=LINE_LIMIT)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except ValueError:
+                    raw = await reader.read(LINE_LIMIT)
+                if not raw:
+                    break
+                last_activity = time.monotonic()
+                emit(stream, raw.decode("utf-8", errors="replace"))
+        finally:
+            transport.close()
+
+    pumps = [
+        asyncio.ensure_future(pump(proc.stdout, "stdout")),
+        asyncio.ensure_future(pump(proc.stderr, "stderr")),
+    ]
+    waiter = loop.run_in_executor(None, _wait, proc)
+
+    timed_out: Optional[str] = None
+    cancelled = False
+    killed_at: Optional[float] = None
+    try:
+        while not waiter.done():
+            await asyncio.wait({waiter}, timeout=POLL_INTERVAL_S)
+            if waiter.done():
+                break
+            now = time.monotonic()
+            if killed_at is None:
+                reason = None
+                if handle.cancel_event.is_set() or is_cancel_requested(run_id):
+                    cancelled, reason = True, "CANCELLED"
+                elif wall_timeout_s and now - start > wall_timeout_s:
+                    timed_out, reason = "wall", f"TIMEOUT wall {wall_timeout_s}s"
+                elif idle_timeout_s and now - last_activity > idle_timeout_s:
+                    timed_out, reason = "idle", f"TIMEOUT idle {idle_timeout_s}s"
+                if reason:
+                    emit("stderr", f"\n[{reason}] killing process group...\n")
+                    _kill_group(proc, signal.SIGTERM)
+                    killed_at = now
+                    if on_kill:
+                        try:
+                            await loop.run_in_executor(None, on_kill)
+                        except Exception:
+                            pass
+            elif now - killed_at > KILL_GRACE_S:
+                _kill_group(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+        returncode, rusage = await waiter
+        # les petits-enfants peuvent garder les pipes ouverts : on ne les attend pas indéfiniment
+        _, pending = await asyncio.wait(pumps, timeout=DRAIN_GRACE_S)
+        for p in pending:
+            p.cancel()
+    finally:
+        if run_id:
+            with _running_lock:
+                _running.get(run_id, set()).discard(handle)
+        for p in pumps:
+            if not p.done():
+                p.cancel()
+
+    result = ProcessResult(
+        returncode=returncode,
+        duration_s=round(time.monotonic() - start, 3),
+        timed_out=timed_out,
+        cancelled=cancelled,
+        rusage=rusage,
+        log_file=str(log_file) if log_file else None,
+    )
+    if log:
+        log.write(f"[exit] rc={returncode} duration={result.duration_s}s rusage={rusage}\n")
+        log.close()
+    return result
+
+
+def run_supervised(cmd: List[str], **kwargs) -> ProcessResult:
+    """Version synchrone de run_process (code pipeline / tâches Celery)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run_process(cmd, **kwargs))
+    # Appelé depuis une boucle déjà active : exécution dans un thread dédié
+    box: dict = {}
+
+    def target():
+        try:
+            box["result"] = asyncio.run(run_process(cmd, **kwargs))
+        except BaseException as e:
+            box["error"] = e
+
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
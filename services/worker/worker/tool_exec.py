@@ -0,0 +1,114 @@
+"""
+Exécution des tools de l'agent.
+
+Si le registre de l'API (`services.api.agents.tools_registry.REGISTRY`) est
+importable — worker et API déployés ensemble — les tools s'exécutent dans le
+process (thread pool, pas d'aller-retour réseau). Sinon on passe par
+`GET /v1/tools` (liste mise en cache avec un TTL) et `POST /v1/tools/{name}/invoke`.
+FORGE_TOOLS_INPROCESS=0 force le mode HTTP.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.contracts.bus import TOOL_CALLED, emit
+from services.contracts.events import ToolCalled
+from services.contracts.http_client import ServiceClient, get_client
+from .tool_iface import Tool
+
+API_URL = os.getenv("API_BASE_URL", "http://api:8080")
+TOOLS_TTL_S = float(os.getenv("FORGE_TOOLS_TTL_S", "30"))
+
+# (nom du tool, arguments)
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+class ToolError(Exception):
+    pass
+
+
+def _run_direct(tool: Any, args: Dict[str, Any]) -> Any:
+    return tool.run(args)
+
+
+def _load_registry() -> Tuple[Dict[str, Any], Callable[[Any, Dict[str, Any]], Any]]:
+    """(registre, fonction d'exécution) ; celle de l'API passe par son cache de résultats."""
+    if os.getenv("FORGE_TOOLS_INPROCESS", "1") == "0":
+        return {}, _run_direct
+    try:
+        from services.api.agents.tools_registry import REGISTRY, run_tool
+    except ImportError:
+        return {}, _run_direct
+    return dict(REGISTRY), run_tool
+
+
+class ToolExecutor:
+    def __init__(self, api_url: str = API_URL, registry: Optional[Dict[str, Any]] = None,
+                 ttl_s: float = TOOLS_TTL_S, client: Optional[ServiceClient] = None):
+        self.api_url = api_url.rstrip("/")
+        if registry is None:
+            registry, self._run = _load_registry()
+        else:
+            self._run = _run_direct
+        self.local: Dict[str, Any] = dict(registry)
+        # registre de l'API disponible : la liste locale fait foi, aucun appel réseau
+        self.inprocess = bool(self.local)
+        self.ttl_s = ttl_s
+        self._client = client
+        self._remote_tools: Optional[List[str]] = None
+        self._remote_at = 0.0
+
+    def register(self, tool: Tool) -> None:
+        """Ajoute un tool local (interface `worker.tool_iface.Tool`)."""
+        self.local[tool.name] = tool
+
+    @property
+    def client(self) -> ServiceClient:
+        return self._client or get_client()
+
+    async def list_tools(self) -> List[str]:
+        if self.inprocess:
+            return sorted(self.local)
+        return sorted(set(self.local) | set(await self._list_remote()))
+
+    async def _list_remote(self) -> List[str]:
+        now = time.monotonic()
+        if self._remote_tools is None or now - self._remote_at > self.ttl_s:
+            resp = await self.client.get(self.api_url + "/v1/tools")
+            resp.raise_for_status()
+            self._remote_tools = list(resp.json())
+            self._remote_at = now
+        return self._remote_tools
+
+    async def invoke(self, name: str, args: Dict[str, Any], conversation_id: str = "") -> Any:
+        tool = self.local.get(name)
+        if tool is not None:
+            # en HTTP, c'est l'API qui publie l'événement
+            emit(TOOL_CALLED, ToolCalled(conversation_id=conversation_id, tool=name, args=args))
+            try:
+                return await asyncio.to_thread(self._run, tool, args)
+            except ValueError as e:  # arguments refusés par le schéma du tool
+                raise ToolError(f"{name}: {e}") from e
+        resp = await self.client.post(f"{self.api_url}/v1/tools/{name}/invoke", json=args,
+                                      headers={"X-Conversation-Id": conversation_id})
+        if resp.status_code != 200:
+            raise ToolError(f"{name}: HTTP {resp.status_code}")
+        return resp.json()["result"]
+
+    async def invoke_many(self, calls: Sequence[ToolCall], conversation_id: str = "") -> List[Any]:
+        """Appels indépendants exécutés en parallèle ; une exception est renvoyée à sa place."""
+        return await asyncio.gather(*(self.invoke(name, args, conversation_id) for name, args in calls),
+                                    return_exceptions=True)
+
+
+_executor: Optional[ToolExecutor] = None
+
+
+def get_executor() -> ToolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ToolExecutor()
+    return _executor
@@ -0,0 +1,23 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+/// Exécute [calls] au plus [concurrency] à la fois ; résultats dans l'ordre des appels.
+Future<List<T>> runBatched<T>(
+  Iterable<Future<T> Function()> calls, {
+  int concurrency = 4,
+}) async {
+  final tasks = calls.toList();
+  final results = List<T?>.filled(tasks.length, null);
+  var next = 0;
+
+  Future<void> worker() async {
+    while (next < tasks.length) {
+      final i = next++;
+      results[i] = await tasks[i]();
+    }
+  }
+
+  await Future.wait([
+    for (var w = 0; w < concurrency && w < tasks.length; w++) worker(),
+  ]);
+  return results.cast<T>();
+}
@@ -0,0 +1,41 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+/// Réponse GET mémorisée avec son ETag.
+class CachedResponse {
+  const CachedResponse(this.etag, this.body);
+
+  final String etag;
+  final String body;
+}
+
+/// Cache LRU des réponses GET : le client renvoie `If-None-Match` et réutilise
+/// le corps mémorisé sur un 304, sans le retélécharger.
+class EtagCache {
+  EtagCache({this.maxEntries = 256});
+
+  final int maxEntries;
+  final Map<String, CachedResponse> _entries = {};
+
+  CachedResponse? lookup(String url) {
+    final entry = _entries.remove(url);
+    if (entry != null) {
+      _entries[url] = entry; // plus récemment utilisé en dernier
+    }
+    return entry;
+  }
+
+  void store(String url, String etag, String body) {
+    _entries.remove(url);
+    _entries[url] = CachedResponse(etag, body);
+    while (_entries.length > maxEntries) {
+      _entries.remove(_entries.keys.first);
+    }
+  }
+
+  /// Oublie les réponses dont l'URL commence par [prefix] (après une écriture).
+  void invalidate(String prefix) {
+    _entries.removeWhere((url, _) => url.startsWith(prefix));
+  }
+
+  void clear() => _entries.clear();
+}
@@ -0,0 +1,316 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+import 'dart:convert';
+
+import 'package:http/http.dart' as http;
+
+import 'batch.dart';
+import 'etag_cache.dart';
+import 'page.dart';
+import 'models/booking.dart';
+import 'models/health_response.dart';
+import 'models/restaurant.dart';
+import 'models/user.dart';
+
+/// Client de l'API : un seul `http.Client` (connexions keep-alive réutilisées),
+/// GET conditionnels via [EtagCache], GET identiques simultanés fusionnés.
+class ForgeClient {
+  ForgeClient({
+    this.baseUrl = 'http://localhost:8000',
+    http.Client? httpClient,
+    EtagCache? cache,
+  })  : _httpClient = httpClient ?? http.Client(),
+        _cache = cache ?? EtagCache();
+
+  final String baseUrl;
+  final http.Client _httpClient;
+  final EtagCache _cache;
+  final Map<String, Future<dynamic>> _inFlight = {};
+
+  Future<dynamic> _getJson(String path, [Map<String, String>? query]) {
+    var uri = Uri.parse('$baseUrl$path');
+    if (query != null && query.isNotEmpty) {
+      uri = uri.replace(queryParameters: query);
+    }
+    final key = uri.toString();
+    return _inFlight.putIfAbsent(key, () => _fetch(uri).whenComplete(() => _inFlight.remove(key)));
+  }
+
+  Future<dynamic> _fetch(Uri uri) async {
+    final key = uri.toString();
+    final cached = _cache.lookup(key);
+    final response = await _httpClient.get(uri, headers: {
+      'Accept': 'application/json',
+      if (cached != null) 'If-None-Match': cached.etag,
+    });
+
+    if (response.statusCode == 304 && cached != null) {
+      return jsonDecode(cached.body);
+    }
+    if (response.statusCode != 200) {
+      throw Exception('Erreur GET ${uri.path}: ${response.statusCode}');
+    }
+    final etag = response.headers['etag'];
+    if (etag != null) {
+      _cache.store(key, etag, response.body);
+    }
+    return jsonDecode(response.body);
+  }
+
+  /// Lance plusieurs appels du client en parallèle, au plus [concurrency] à la fois.
+  Future<List<T>> batch<T>(Iterable<Future<T> Function()> calls, {int concurrency = 4}) {
+    return runBatched(calls, concurrency: concurrency);
+  }
+
+  // Endpoints système
+  Future<HealthResponse> health() async {
+    return HealthResponse.fromJson(await _getJson('/health') as Map<String, dynamic>);
+  }
+
+  // Endpoints User
+  Future<ResultPage<User>> listUsers({
+    int page = 1,
+    int limit = 50,
+    String? cursor,
+  }) async {
+    final data = await _getJson('/users', {
+      'limit': '$limit',
+      if (cursor != null) 'cursor': cursor else 'page': '$page',
+    });
+    return ResultPage.fromJson(data as Map<String, dynamic>, User.fromJson);
+  }
+
+  /// Tous les users, page par page : la page suivante n'est demandée
+  /// qu'une fois la précédente consommée.
+  Stream<User> streamUsers({int limit = 50}) async* {
+    var page = 1;
+    String? cursor;
+    while (true) {
+      final result = await listUsers(page: page, limit: limit, cursor: cursor);
+      yield* Stream.fromIterable(result.items);
+      if (!result.hasMore || result.items.isEmpty) break;
+      cursor = result.nextCursor;
+      page += 1;
+    }
+  }
+
+  Future<List<User>> getusers({int page = 1, int limit = 50, String? cursor}) async {
+    return (await listUsers(page: page, limit: limit, cursor: cursor)).items;
+  }
+
+  Future<User> getUser(String id) async {
+    return User.fromJson(await _getJson('/users/$id') as Map<String, dynamic>);
+  }
+
+  /// Plusieurs users par identifiant, au plus [concurrency] requêtes à la fois.
+  Future<List<User>> getManyUsers(Iterable<String> ids, {int concurrency = 4}) {
+    return batch([for (final id in ids) () => getUser(id)], concurrency: concurrency);
+  }
+
+  Future<User> createUser(User user) async {
+    final response = await _httpClient.post(
+      Uri.parse('$baseUrl/users'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(user.toJson()),
+    );
+    _cache.invalidate('$baseUrl/users');
+
+    if (response.statusCode == 200) {
+      return User.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur création User: ${response.statusCode}');
+    }
+  }
+
+  Future<User> updateUser(String id, User user) async {
+    final response = await _httpClient.put(
+      Uri.parse('$baseUrl/users/$id'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(user.toJson()),
+    );
+    _cache.invalidate('$baseUrl/users');
+
+    if (response.statusCode == 200) {
+      return User.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur mise à jour User: ${response.statusCode}');
+    }
+  }
+
+  Future<void> deleteUser(String id) async {
+    final response = await _httpClient.delete(
+      Uri.parse('$baseUrl/users/$id'),
+    );
+    _cache.invalidate('$baseUrl/users');
+
+    if (response.statusCode != 200) {
+      throw Exception('Erreur suppression User: ${response.statusCode}');
+    }
+  }
+
+  // Endpoints Restaurant
+  Future<ResultPage<Restaurant>> listRestaurants({
+    int page = 1,
+    int limit = 50,
+    String? cursor,
+  }) async {
+    final data = await _getJson('/restaurants', {
+      'limit': '$limit',
+      if (cursor != null) 'cursor': cursor else 'page': '$page',
+    });
+    return ResultPage.fromJson(data as Map<String, dynamic>, Restaurant.fromJson);
+  }
+
+  /// Tous les restaurants, page par page : la page suivante n'est demandée
+  /// qu'une fois la précédente consommée.
+  Stream<Restaurant> streamRestaurants({int limit = 50}) async* {
+    var page = 1;
+    String? cursor;
+    while (true) {
+      final result = await listRestaurants(page: page, limit: limit, cursor: cursor);
+      yield* Stream.fromIterable(result.items);
+      if (!result.hasMore || result.items.isEmpty) break;
+      cursor = result.nextCursor;
+      page += 1;
+    }
+  }
+
+  Future<List<Restaurant>> getrestaurants({int page = 1, int limit = 50, String? cursor}) async {
+    return (await listRestaurants(page: page, limit: limit, cursor: cursor)).items;
+  }
+
+  Future<Restaurant> getRestaurant(String id) async {
+    return Restaurant.fromJson(await _getJson('/restaurants/$id') as Map<String, dynamic>);
+  }
+
+  /// Plusieurs restaurants par identifiant, au plus [concurrency] requêtes à la fois.
+  Future<List<Restaurant>> getManyRestaurants(Iterable<String> ids, {int concurrency = 4}) {
+    return batch([for (final id in ids) () => getRestaurant(id)], concurrency: concurrency);
+  }
+
+  Future<Restaurant> createRestaurant(Restaurant restaurant) async {
+    final response = await _httpClient.post(
+      Uri.parse('$baseUrl/restaurants'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(restaurant.toJson()),
+    );
+    _cache.invalidate('$baseUrl/restaurants');
+
+    if (response.statusCode == 200) {
+      return Restaurant.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur création Restaurant: ${response.statusCode}');
+    }
+  }
+
+  Future<Restaurant> updateRestaurant(String id, Restaurant restaurant) async {
+    final response = await _httpClient.put(
+      Uri.parse('$baseUrl/restaurants/$id'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(restaurant.toJson()),
+    );
+    _cache.invalidate('$baseUrl/restaurants');
+
+    if (response.statusCode == 200) {
+      return Restaurant.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur mise à jour Restaurant: ${response.statusCode}');
+    }
+  }
+
+  Future<void> deleteRestaurant(String id) async {
+    final response = await _httpClient.delete(
+      Uri.parse('$baseUrl/restaurants/$id'),
+    );
+    _cache.invalidate('$baseUrl/restaurants');
+
+    if (response.statusCode != 200) {
+      throw Exception('Erreur suppression Restaurant: ${response.statusCode}');
+    }
+  }
+
+  // Endpoints Booking
+  Future<ResultPage<Booking>> listBookings({
+    int page = 1,
+    int limit = 50,
+    String? cursor,
+  }) async {
+    final data = await _getJson('/bookings', {
+      'limit': '$limit',
+      if (cursor != null) 'cursor': cursor else 'page': '$page',
+    });
+    return ResultPage.fromJson(data as Map<String, dynamic>, Booking.fromJson);
+  }
+
+  /// Tous les bookings, page par page : la page suivante n'est demandée
+  /// qu'une fois la précédente consommée.
+  Stream<Booking> streamBookings({int limit = 50}) async* {
+    var page = 1;
+    String? cursor;
+    while (true) {
+      final result = await listBookings(page: page, limit: limit, cursor: cursor);
+      yield* Stream.fromIterable(result.items);
+      if (!result.hasMore || result.items.isEmpty) break;
+      cursor = result.nextCursor;
+      page += 1;
+    }
+  }
+
+  Future<List<Booking>> getbookings({int page = 1, int limit = 50, String? cursor}) async {
+    return (await listBookings(page: page, limit: limit, cursor: cursor)).items;
+  }
+
+  Future<Booking> getBooking(String id) async {
+    return Booking.fromJson(await _getJson('/bookings/$id') as Map<String, dynamic>);
+  }
+
+  /// Plusieurs bookings par identifiant, au plus [concurrency] requêtes à la fois.
+  Future<List<Booking>> getManyBookings(Iterable<String> ids, {int concurrency = 4}) {
+    return batch([for (final id in ids) () => getBooking(id)], concurrency: concurrency);
+  }
+
+  Future<Booking> createBooking(Booking booking) async {
+    final response = await _httpClient.post(
+      Uri.parse('$baseUrl/bookings'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(booking.toJson()),
+    );
+    _cache.invalidate('$baseUrl/bookings');
+
+    if (response.statusCode == 200) {
+      return Booking.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur création Booking: ${response.statusCode}');
+    }
+  }
+
+  Future<Booking> updateBooking(String id, Booking booking) async {
+    final response = await _httpClient.put(
+      Uri.parse('$baseUrl/bookings/$id'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode(booking.toJson()),
+    );
+    _cache.invalidate('$baseUrl/bookings');
+
+    if (response.statusCode == 200) {
+      return Booking.fromJson(jsonDecode(response.body));
+    } else {
+      throw Exception('Erreur mise à jour Booking: ${response.statusCode}');
+    }
+  }
+
+  Future<void> deleteBooking(String id) async {
+    final response = await _httpClient.delete(
+      Uri.parse('$baseUrl/bookings/$id'),
+    );
+    _cache.invalidate('$baseUrl/bookings');
+
+    if (response.statusCode != 200) {
+      throw Exception('Erreur suppression Booking: ${response.statusCode}');
+    }
+  }
+
+  void dispose() {
+    _httpClient.close();
+  }
+}
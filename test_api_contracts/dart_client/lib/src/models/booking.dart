@@ -0,0 +1,33 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+class Booking {
+  Booking({
+    required this.userId,
+    required this.restaurantId,
+    required this.date,
+    required this.partySize,
+  });
+
+  final String userId;
+  final String restaurantId;
+  final String date;
+  final int partySize;
+
+  factory Booking.fromJson(Map<String, dynamic> json) {
+    return Booking(
+      userId: json['userId'] as String,
+      restaurantId: json['restaurantId'] as String,
+      date: json['date'] as String,
+      partySize: json['partySize'] as int,
+    );
+  }
+
+  Map<String, dynamic> toJson() {
+    return {
+      'userId': userId,
+      'restaurantId': restaurantId,
+      'date': date,
+      'partySize': partySize,
+    };
+  }
+}
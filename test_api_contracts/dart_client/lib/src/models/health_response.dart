@@ -0,0 +1,25 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+class HealthResponse {
+  HealthResponse({
+    required this.status,
+    required this.timestamp,
+  });
+
+  final String status;
+  final String timestamp;
+
+  factory HealthResponse.fromJson(Map<String, dynamic> json) {
+    return HealthResponse(
+      status: json['status'] as String,
+      timestamp: json['timestamp'] as String,
+    );
+  }
+
+  Map<String, dynamic> toJson() {
+    return {
+      'status': status,
+      'timestamp': timestamp,
+    };
+  }
+}
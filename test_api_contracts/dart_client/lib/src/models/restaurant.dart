@@ -0,0 +1,33 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+class Restaurant {
+  Restaurant({
+    required this.title,
+    required this.address,
+    required this.seats,
+    required this.phone,
+  });
+
+  final String title;
+  final String address;
+  final int seats;
+  final String phone;
+
+  factory Restaurant.fromJson(Map<String, dynamic> json) {
+    return Restaurant(
+      title: json['title'] as String,
+      address: json['address'] as String,
+      seats: json['seats'] as int,
+      phone: json['phone'] as String,
+    );
+  }
+
+  Map<String, dynamic> toJson() {
+    return {
+      'title': title,
+      'address': address,
+      'seats': seats,
+      'phone': phone,
+    };
+  }
+}
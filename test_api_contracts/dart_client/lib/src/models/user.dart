@@ -0,0 +1,25 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+class User {
+  User({
+    required this.email,
+    required this.displayName,
+  });
+
+  final String email;
+  final String displayName;
+
+  factory User.fromJson(Map<String, dynamic> json) {
+    return User(
+      email: json['email'] as String,
+      displayName: json['displayName'] as String,
+    );
+  }
+
+  Map<String, dynamic> toJson() {
+    return {
+      'email': email,
+      'displayName': displayName,
+    };
+  }
+}
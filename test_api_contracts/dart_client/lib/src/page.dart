@@ -0,0 +1,36 @@
+// Généré par Forge AGI : ne pas modifier, régénéré à chaque run.
+
+/// Une page d'une liste paginée (`data`, `total`, `page`, `limit`, `next_cursor`).
+class ResultPage<T> {
+  const ResultPage({
+    required this.items,
+    required this.total,
+    this.page,
+    this.limit,
+    this.nextCursor,
+  });
+
+  final List<T> items;
+  final int total;
+  final int? page;
+  final int? limit;
+  final String? nextCursor;
+
+  bool get hasMore =>
+      nextCursor != null || (page != null && limit != null && page! * limit! < total);
+
+  factory ResultPage.fromJson(
+    Map<String, dynamic> json,
+    T Function(Map<String, dynamic>) fromJson,
+  ) {
+    return ResultPage(
+      items: (json['data'] as List)
+          .map((item) => fromJson(item as Map<String, dynamic>))
+          .toList(),
+      total: json['total'] as int,
+      page: json['page'] as int?,
+      limit: json['limit'] as int?,
+      nextCursor: json['next_cursor'] as String?,
+    );
+  }
+}
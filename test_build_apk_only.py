@@ -11,7 +11,7 @@ from pathlib import Path
 worker_path = Path(__file__).parent / "services" / "worker"
 sys.path.insert(0, str(worker_path))
 
-from worker.pipeline import run_build_apk
+from worker.codegen import run_build_apk
 
 def test_build_apk_only():
     """Test uniquement de l'étape BUILD_APK"""